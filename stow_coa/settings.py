@@ -137,6 +137,46 @@ if not DEBUG:
     SESSION_COOKIE_SECURE = True
     CSRF_COOKIE_SECURE = True
 
+# number of worker processes used to load reports that span multiple months
+# 0 or 1 loads reports in a single process, which is also what processes running more than one thread (like a threaded uWSGI) do
+REPORT_PARALLEL_WORKERS = int(os.environ.get('DJANGO_REPORT_PARALLEL_WORKERS', '0'))
+
+# number of loaded reports that each process keeps in memory, so that viewing, printing, and exporting the same report only loads it once
+# 0 disables the cache
+REPORT_CACHE_SIZE = int(os.environ.get('DJANGO_REPORT_CACHE_SIZE', '8'))
+
 # the "update trips" function for clients POSTs a value for each trip, which can be well over the default 1000 fields
 # so, we'll instead rely on DATA_UPLOAD_MAX_MEMORY_SIZE, which has a more generous default of 2.5MB
 DATA_UPLOAD_MAX_NUMBER_FIELDS = None
+
+# number of frequent destinations listed in reports, with the rest combined in to a single "Other" row
+# 0 lists every destination
+REPORT_FREQUENT_DESTINATIONS_LIMIT = int(os.environ.get('DJANGO_REPORT_FREQUENT_DESTINATIONS_LIMIT', '50'))
+
+# each report request writes one line to the 'transit.report' logger, with the time spent in each stage of loading and rendering the report
+# set DJANGO_REPORT_LOG_LEVEL to WARNING to turn these lines off
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'transit.report': {
+            'handlers': ['console'],
+            'level': os.environ.get('DJANGO_REPORT_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
+# report ranges longer than this number of days are loaded in the background by the report_jobs management command
+# 0 always loads reports during the request
+REPORT_JOB_MIN_DAYS = int(os.environ.get('DJANGO_REPORT_JOB_MIN_DAYS', '731'))
+
+# where the finished background reports are stored, and how many days they are kept
+# the default directory is in the source checkout (and ignored by git), so it is best set to a data directory outside of it in production
+REPORT_JOB_DIR = os.environ.get('DJANGO_REPORT_JOB_DIR', os.path.join(BASE_DIR, 'report_jobs'))
+REPORT_JOB_KEEP_DAYS = int(os.environ.get('DJANGO_REPORT_JOB_KEEP_DAYS', '7'))
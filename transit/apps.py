@@ -18,3 +18,6 @@ from django.apps import AppConfig
 
 class TransitConfig(AppConfig):
     name = 'transit'
+
+    def ready(self):
+        import transit.signals
@@ -0,0 +1,97 @@
+# Copyright © 2019-2023 Justin Jacobs
+#
+# This file is part of the Transit Log System.
+#
+# The Transit Log System is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+#
+# The Transit Log System is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# The Transit Log System.  If not, see http://www.gnu.org/licenses/
+
+from transit.common.util.parse import parse_odometer
+
+# Shifts and Trips keep the odometer readings as they were logged, and trips are usually logged with only the last few digits.
+# The start_odometer/end_odometer columns hold the full readings as numbers, so that they can be compared and sorted in the database.
+# These functions only use the fields of the shifts and trips, so they also work with the historical models in migrations.
+
+def parse_odometer_value(string):
+    # the reading as a number, or None if it is empty or can't be parsed
+    if string == '':
+        return None
+    try:
+        return parse_odometer(string)
+    except ValueError:
+        return None
+
+def merge_odometer_value(base, suffix):
+    # completes a trip reading with the leading digits of its shift's start reading, same as Report.Mileage.mergeStrings()
+    if suffix == '':
+        return None
+    if len(suffix) < len(base):
+        suffix = base[0:len(base) - len(suffix)] + suffix
+    return parse_odometer_value(suffix)
+
+def set_shift_odometers(shift):
+    shift.start_odometer = parse_odometer_value(shift.start_miles)
+    shift.end_odometer = parse_odometer_value(shift.end_miles)
+
+def find_trip_shift(trip, shifts):
+    # shifts are the day's shifts that have a start reading, in their schedule order
+    # like the report, a trip belongs to a shift with the same driver and vehicle, or else the same vehicle
+    # if there are several, it belongs to the first one that both of its readings fit in to (or the first one, if it doesn't fit any)
+    matched_shifts = [i for i in shifts if i.vehicle_id == trip.vehicle_id and i.driver_id == trip.driver_id]
+    if len(matched_shifts) == 0:
+        matched_shifts = [i for i in shifts if i.vehicle_id == trip.vehicle_id]
+    if len(matched_shifts) == 0:
+        return None
+
+    def ShiftMilesMatch(shift, trip_miles):
+        if trip_miles == '':
+            return True
+        for base in (shift.start_miles, shift.end_miles):
+            value = merge_odometer_value(base, trip_miles)
+            if value != None and value >= shift.start_odometer and (shift.end_odometer == None or value <= shift.end_odometer):
+                return True
+        return False
+
+    if len(matched_shifts) > 1:
+        for shift in matched_shifts:
+            if ShiftMilesMatch(shift, trip.start_miles) and ShiftMilesMatch(shift, trip.end_miles):
+                return shift
+
+    return matched_shifts[0]
+
+def set_trip_odometers(trip, shifts):
+    # trips without a matching shift can't be completed, so they are left empty
+    shift = None
+    if trip.vehicle_id != None and (trip.start_miles != '' or trip.end_miles != ''):
+        shift = find_trip_shift(trip, shifts)
+
+    if shift == None:
+        trip.start_odometer = None
+        trip.end_odometer = None
+    else:
+        trip.start_odometer = merge_odometer_value(shift.start_miles, trip.start_miles)
+        trip.end_odometer = merge_odometer_value(shift.start_miles, trip.end_miles)
+
+def resolve_trip_odometers(trips, shifts):
+    # sets the odometers of the trips from the shifts of the same days, and returns the trips that changed
+    # shifts should only include the normal (not canceled) shifts with a start reading, ordered by date and sort_index
+    shifts_by_date = {}
+    for i in shifts:
+        if i.start_odometer != None and i.vehicle_id != None:
+            shifts_by_date.setdefault(i.date, []).append(i)
+
+    changed_trips = []
+    for trip in trips:
+        previous_values = (trip.start_odometer, trip.end_odometer)
+        set_trip_odometers(trip, shifts_by_date.get(trip.date, []))
+        if (trip.start_odometer, trip.end_odometer) != previous_values:
+            changed_trips.append(trip)
+
+    return changed_trips
@@ -0,0 +1,67 @@
+# Copyright © 2019-2023 Justin Jacobs
+#
+# This file is part of the Transit Log System.
+#
+# The Transit Log System is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+#
+# The Transit Log System is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# The Transit Log System.  If not, see http://www.gnu.org/licenses/
+
+import re, datetime
+
+from functools import lru_cache
+
+# Log times are stored as strings, and the same few hundred of them are parsed over and over.
+# parse_log_time() remembers its results, so each string is only parsed once per process.
+PARSE_CACHE_SIZE = 8192
+
+# the same pattern that datetime.strptime() builds for '%I:%M %p'
+LOG_TIME_PATTERN = re.compile(r'(1[0-2]|0[1-9]|[1-9]):([0-5]\d|\d)\s+(am|pm)\Z', re.IGNORECASE)
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_log_time_cached(string):
+    match = LOG_TIME_PATTERN.match(string)
+    if match == None:
+        return None
+
+    hour = int(match.group(1)) % 12
+    if match.group(3).lower() == 'pm':
+        hour += 12
+
+    return datetime.datetime(1900, 1, 1, hour, int(match.group(2)))
+
+def parse_log_time(string):
+    # same as datetime.datetime.strptime(string, '%I:%M %p'), including the ValueError if the string can't be parsed
+    if type(string) != str:
+        raise TypeError('parse_log_time() argument must be str, not ' + type(string).__name__)
+
+    value = parse_log_time_cached(string)
+    if value == None:
+        raise ValueError('time data ' + repr(string) + ' does not match format \'%I:%M %p\'')
+    return value
+
+def parse_log_minutes(string):
+    # minutes since midnight, or None if the string can't be parsed
+    if type(string) != str:
+        return None
+
+    value = parse_log_time_cached(string)
+    if value == None:
+        return None
+    return value.hour * 60 + value.minute
+
+def set_log_minutes(instance, fields):
+    # fields are (time field, minutes field) pairs, like the MINUTES_FIELDS of Trip, Shift, and TemplateTrip
+    for time_field, minutes_field in fields:
+        setattr(instance, minutes_field, parse_log_minutes(getattr(instance, time_field)))
+
+def parse_odometer(string):
+    # same as float(string)
+    # odometer readings rarely repeat and float() is already faster than a cache lookup, so they aren't cached
+    return float(string)
@@ -0,0 +1,221 @@
+# Copyright © 2019-2023 Justin Jacobs
+#
+# This file is part of the Transit Log System.
+#
+# The Transit Log System is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+#
+# The Transit Log System is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# The Transit Log System.  If not, see http://www.gnu.org/licenses/
+
+import random, datetime
+
+from django.utils import timezone
+
+from transit.models import Driver, Vehicle, TripType, Client, ClientPayment, Destination, Trip, Shift, ReportRollup, ReportDataVersion
+from transit.common.util.parse import set_log_minutes
+from transit.common.util.odometer import set_shift_odometers, resolve_trip_odometers
+
+# Synthetic data for measuring performance, see the synthetic_data and report_benchmark management commands.
+# The data is shaped like a small transit service: vehicles run one or two shifts a day with continuous odometers,
+# trips are logged with the last few digits of the odometer like they are on the paper logs,
+# and some trips are canceled, no-shows, or missing log data.
+
+SYNTHETIC_TRIP_TYPES = ['Medical', 'Nutrition', 'Social/Recreation', 'Shopping', 'Employment', 'Other']
+SYNTHETIC_STREETS = ['Main', 'Maple', 'Oak', 'Elm', 'Church', 'High', 'Park', 'Water', 'Mill', 'School', 'River', 'Lake']
+SYNTHETIC_TAGS = ['', '', '', '', 'Wheelchair', 'Employment', 'Escort', 'Wheelchair, Escort']
+SYNTHETIC_BATCH_SIZE = 1000
+
+def synthetic_time_string(minutes):
+    return datetime.time((minutes // 60) % 24, minutes % 60).strftime('%I:%M %p')
+
+def synthetic_odometer_suffix(rng, miles):
+    # most trips are logged with the last few digits, some with the whole reading
+    miles_str = f'{miles:.1f}'
+    return miles_str[-rng.choice((5, 5, 5, 4, 7)):]
+
+def create_synthetic_data(date_start, days, driver_count=8, vehicle_count=6, client_count=400, destination_count=150, trips_per_day=60, seed=0, name_prefix='Synthetic'):
+    # creates the drivers, vehicles, clients, destinations, shifts, trips, and payments for a range of days
+    # returns the number of each object that was created
+    rng = random.Random(seed)
+
+    trip_types = list(TripType.objects.all())
+    if len(trip_types) == 0:
+        trip_types = [TripType(name=SYNTHETIC_TRIP_TYPES[i], sort_index=i, is_trip_counted=(SYNTHETIC_TRIP_TYPES[i] != 'Other')) for i in range(0, len(SYNTHETIC_TRIP_TYPES))]
+        TripType.objects.bulk_create(trip_types)
+
+    vehicles = [Vehicle(name=name_prefix + ' Vehicle ' + str(i + 1), sort_index=1000 + i) for i in range(0, vehicle_count)]
+    Vehicle.objects.bulk_create(vehicles)
+
+    drivers = [Driver(name=name_prefix + ' Driver ' + str(i + 1), sort_index=1000 + i) for i in range(0, driver_count)]
+    Driver.objects.bulk_create(drivers)
+
+    destinations = []
+    for i in range(0, destination_count):
+        destinations.append(Destination(address=str(10 + (i * 37) % 990) + ' ' + SYNTHETIC_STREETS[i % len(SYNTHETIC_STREETS)] + ' St ' + name_prefix))
+    Destination.objects.bulk_create(destinations)
+
+    clients = []
+    for i in range(0, client_count):
+        client = Client(name=name_prefix + ' Client ' + str(i + 1).zfill(4))
+        client.address = str(1 + (i * 13) % 400) + ' ' + SYNTHETIC_STREETS[(i * 7) % len(SYNTHETIC_STREETS)] + ' Ave'
+        client.phone_home = '555-' + str(1000 + i)[-4:]
+        client.elderly = rng.random() < 0.7
+        client.ambulatory = rng.random() < 0.8
+        client.staff = rng.random() < 0.02
+        clients.append(client)
+    Client.objects.bulk_create(clients)
+
+    # a few clients ride most days, the rest only now and then
+    client_weights = [1 / (i + 1) for i in range(0, len(clients))]
+
+    # each vehicle keeps its own odometer from day to day
+    vehicle_miles = [10000 + rng.random() * 90000 for i in vehicles]
+
+    shifts = []
+    trips = []
+    payments = []
+    counts = {'drivers': len(drivers), 'vehicles': len(vehicles), 'clients': len(clients), 'destinations': len(destinations), 'shifts': 0, 'trips': 0, 'payments': 0}
+
+    def Flush():
+        # bulk_create() doesn't send the signals that fill in the odometer and minutes columns
+        for i in shifts:
+            set_shift_odometers(i)
+            set_log_minutes(i, Shift.MINUTES_FIELDS)
+        for i in trips:
+            set_log_minutes(i, Trip.MINUTES_FIELDS)
+        resolve_trip_odometers(trips, [i for i in shifts if i.status == Shift.STATUS_NORMAL])
+        Shift.objects.bulk_create(shifts, batch_size=SYNTHETIC_BATCH_SIZE)
+        Trip.objects.bulk_create(trips, batch_size=SYNTHETIC_BATCH_SIZE)
+        ClientPayment.objects.bulk_create(payments, batch_size=SYNTHETIC_BATCH_SIZE)
+        counts['shifts'] += len(shifts)
+        counts['trips'] += len(trips)
+        counts['payments'] += len(payments)
+        shifts.clear()
+        trips.clear()
+        payments.clear()
+
+    for day in range(0, days):
+        day_date = date_start + datetime.timedelta(days=day)
+
+        # no service on most weekends
+        if day_date.weekday() >= 5 and rng.random() < 0.8:
+            continue
+
+        day_shifts = []
+        available_drivers = list(drivers)
+        rng.shuffle(available_drivers)
+        for vehicle_index in range(0, len(vehicles)):
+            if len(available_drivers) == 0 or rng.random() < 0.1:
+                continue
+
+            minutes = 7 * 60 + rng.randint(0, 90)
+            for shift_index in range(0, 2 if rng.random() < 0.25 and len(available_drivers) > 1 else 1):
+                shift = Shift(date=day_date, driver=available_drivers.pop(), vehicle=vehicles[vehicle_index], sort_index=len(day_shifts))
+                shift.start_miles = f'{vehicle_miles[vehicle_index]:.1f}'
+                shift.start_time = synthetic_time_string(minutes)
+                if rng.random() < 0.3:
+                    shift.fuel = str(rng.randint(5, 20))
+                day_shifts.append([shift, vehicle_index, minutes])
+                shifts.append(shift)
+                minutes += 5 * 60
+
+        # spread the day's trips over its shifts, in pick up order
+        trip_count = max(0, int(trips_per_day * rng.uniform(0.7, 1.3)))
+        shift_trips = [[] for i in day_shifts]
+        for i in range(0, trip_count):
+            client = rng.choices(clients, weights=client_weights)[0]
+            trip = Trip(date=day_date, sort_index=i, name=client.name, address=client.address, phone_home=client.phone_home)
+            trip.destination = rng.choice(destinations).address
+            trip.trip_type = rng.choice(trip_types) if rng.random() < 0.95 else None
+            trip.tags = rng.choice(SYNTHETIC_TAGS)
+            trip.elderly = client.elderly
+            trip.ambulatory = client.ambulatory
+            trip.passenger = rng.random() < 0.9
+            trip.fare = rng.choice((0, 0, 0, 200, 300, 500))
+            trip.pick_up_time = synthetic_time_string(8 * 60 + (i * 9 * 60) // max(trip_count, 1))
+
+            status_roll = rng.random()
+            if status_roll < 0.03:
+                trip.status = Trip.STATUS_NO_SHOW
+            elif status_roll < 0.1:
+                trip.status = Trip.STATUS_CANCELED
+                trip.cancel_date = timezone.make_aware(datetime.datetime.combine(day_date, datetime.time(8, 0))) - datetime.timedelta(hours=rng.choice((1, 6, 20, 30, 72)))
+
+            if len(day_shifts) > 0:
+                shift_trips[rng.randrange(0, len(day_shifts))].append(trip)
+            trips.append(trip)
+
+        # log each shift's trips with the vehicle's odometer and the time moving forward
+        for i in range(0, len(day_shifts)):
+            shift, vehicle_index, minutes = day_shifts[i]
+            miles = vehicle_miles[vehicle_index]
+
+            for trip in shift_trips[i]:
+                trip.driver = shift.driver
+                trip.vehicle = shift.vehicle
+
+                miles += rng.uniform(0.5, 4)
+                minutes += rng.randint(5, 15)
+                if trip.status != Trip.STATUS_NORMAL:
+                    continue
+
+                trip_miles = rng.uniform(1, 12)
+                trip_minutes = rng.randint(8, 35)
+
+                log_roll = rng.random()
+                if log_roll < 0.02:
+                    # not logged
+                    pass
+                elif log_roll < 0.04:
+                    # partially logged
+                    trip.start_miles = synthetic_odometer_suffix(rng, miles)
+                    trip.start_time = synthetic_time_string(minutes)
+                else:
+                    trip.start_miles = synthetic_odometer_suffix(rng, miles)
+                    trip.start_time = synthetic_time_string(minutes)
+                    trip.end_miles = synthetic_odometer_suffix(rng, miles + trip_miles)
+                    trip.end_time = synthetic_time_string(minutes + trip_minutes)
+
+                if trip.fare > 0 and rng.random() < 0.7:
+                    if rng.random() < 0.8:
+                        trip.collected_cash = trip.fare
+                    else:
+                        trip.collected_check = trip.fare
+
+                miles += trip_miles
+                minutes += trip_minutes
+
+            miles += rng.uniform(1, 8)
+            minutes += rng.randint(10, 30)
+            shift.end_miles = f'{miles:.1f}'
+            shift.end_time = synthetic_time_string(min(minutes, 23 * 60 + 59))
+            if rng.random() < 0.01:
+                # forgot to log the end of the shift
+                shift.end_miles = ''
+            vehicle_miles[vehicle_index] = miles + rng.uniform(0, 3)
+
+        # payments mailed in by clients
+        for i in range(0, rng.choice((0, 0, 1, 1, 2, 3))):
+            payment = ClientPayment(parent=rng.choices(clients, weights=client_weights)[0], date_paid=day_date)
+            if rng.random() < 0.5:
+                payment.money_cash = rng.choice((500, 1000, 2000))
+            else:
+                payment.money_check = rng.choice((1000, 2500, 5000))
+            payments.append(payment)
+
+        if len(trips) >= SYNTHETIC_BATCH_SIZE * 10:
+            Flush()
+
+    Flush()
+
+    # bulk_create() skips the signals that keep report rollups and cached reports up to date
+    ReportRollup.invalidate()
+    ReportDataVersion.bump()
+
+    return counts
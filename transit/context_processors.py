@@ -16,7 +16,7 @@
 import datetime
 import subprocess
 
-from transit.models import SiteSettings, VehicleIssue, Vehicle, Shift, PreTrip
+from transit.models import SiteSettings, VehicleIssue, Vehicle, Shift, PreTrip, LogProblem
 
 from transit.forms import YEARS
 
@@ -75,14 +75,10 @@ def globals(request):
                 vehicle_lift_inspections.append(v)
 
         if v.oil_change_miles != '':
-            latest_shift = Shift.objects.filter(vehicle=v.id, status=Shift.STATUS_NORMAL).order_by('date').exclude(end_miles='').last()
-            if latest_shift is not None and latest_shift.end_miles != '':
-                # NOTE considering that a bug with the string formatting can wreck the site here, we check exceptions
-                # TODO validate string before passing to float()?
-                try:
-                    shift_miles = float(latest_shift.end_miles);
-                except:
-                    shift_miles = 0
+            latest_shift = Shift.objects.filter(vehicle=v.id, status=Shift.STATUS_NORMAL).order_by('date').exclude(end_miles='').values('end_odometer').last()
+            if latest_shift is not None:
+                # end readings that can't be parsed have no odometer value
+                shift_miles = latest_shift['end_odometer'] if latest_shift['end_odometer'] != None else 0
                 try:
                     oil_change_miles = float(v.oil_change_miles);
                 except:
@@ -116,5 +112,7 @@ def globals(request):
         'version': VersionInfo.version_str,
         'report_months': report_months,
         'report_years': report_years,
+        # log problems are found again for changed dates by Report.updateLogProblems(), the count is cached between them
+        'log_problem_count': LogProblem.getCount(),
     }
 
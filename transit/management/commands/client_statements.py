@@ -0,0 +1,63 @@
+# Copyright © 2019-2023 Justin Jacobs
+#
+# This file is part of the Transit Log System.
+#
+# The Transit Log System is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+#
+# The Transit Log System is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# The Transit Log System.  If not, see http://www.gnu.org/licenses/
+
+import os
+import datetime
+
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from transit.views.client_statement import clientStatementsMonth, clientStatementsLoad, clientStatementsRenderHTML, clientStatementsWriteXLSX
+
+class Command(BaseCommand):
+    help = 'Writes the monthly statements for every client with fares or payments, as a printable HTML file and an Excel workbook'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', help='Month of the statements (YYYY-MM). Defaults to the previous month.')
+        parser.add_argument('--output-dir', default='.', help='Directory to write the files to. Defaults to the current directory.')
+        parser.add_argument('--workers', type=int, default=settings.REPORT_PARALLEL_WORKERS, help='Number of worker processes used to render the statements. Defaults to REPORT_PARALLEL_WORKERS.')
+
+    def handle(self, *args, **options):
+        if options['month'] != None:
+            try:
+                month = datetime.datetime.strptime(options['month'], '%Y-%m').date()
+            except ValueError:
+                raise CommandError('--month must be in the format YYYY-MM')
+        else:
+            month = datetime.date.today().replace(day=1) + datetime.timedelta(days=-1)
+
+        date_start, date_end = clientStatementsMonth(month.year, month.month)
+
+        perf_start = perf_counter()
+        statements = clientStatementsLoad(date_start, date_end)
+        perf_load = perf_counter() - perf_start
+
+        os.makedirs(options['output_dir'], exist_ok=True)
+        file_name = os.path.join(options['output_dir'], 'Client_Statements_' + date_start.strftime('%Y-%m'))
+
+        perf_start = perf_counter()
+        with open(file_name + '.html', 'w', encoding='utf-8') as html_file:
+            html_file.write(clientStatementsRenderHTML(statements, date_start, date_end, workers=options['workers']))
+        perf_html = perf_counter() - perf_start
+
+        perf_start = perf_counter()
+        with open(file_name + '.xlsx', 'wb') as xlsx_file:
+            clientStatementsWriteXLSX(statements, xlsx_file)
+        perf_xlsx = perf_counter() - perf_start
+
+        self.stdout.write(str(len(statements)) + f' statements for {date_start:%B %Y} (load {perf_load:.3f}s, html {perf_html:.3f}s, xlsx {perf_xlsx:.3f}s)')
+        self.stdout.write('Wrote ' + file_name + '.html and ' + file_name + '.xlsx')
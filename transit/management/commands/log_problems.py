@@ -0,0 +1,76 @@
+# Copyright © 2019-2023 Justin Jacobs
+#
+# This file is part of the Transit Log System.
+#
+# The Transit Log System is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+#
+# The Transit Log System is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# The Transit Log System.  If not, see http://www.gnu.org/licenses/
+
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+
+from transit.models import Trip, Shift, LogProblem
+from transit.views.report import Report
+
+class Command(BaseCommand):
+    help = 'Finds the log problems of the dates that have changed (update) or of every date (rebuild), or clears them. The changed dates are also updated by the Log problems page and by report_jobs, so rebuild is only needed once for existing data.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['update', 'rebuild', 'clear'])
+        parser.add_argument('--start', type=datetime.date.fromisoformat, help='First date (YYYY-MM-DD). Defaults to the earliest logged date.')
+        parser.add_argument('--end', type=datetime.date.fromisoformat, help='Last date (YYYY-MM-DD). Defaults to the latest logged date.')
+
+    def getDateExtent(self):
+        dates = []
+        for i in (Trip.objects.aggregate(Min('date'), Max('date')), Shift.objects.aggregate(Min('date'), Max('date'))):
+            dates += [j for j in i.values() if j != None]
+
+        if len(dates) == 0:
+            return (None, None)
+        return (min(dates), max(dates))
+
+    def handle(self, *args, **options):
+        if options['action'] == 'update':
+            count = Report.updateLogProblems()
+            self.stdout.write('Found the log problems of ' + str(count) + ' changed date(s)')
+            return
+
+        if options['action'] == 'clear' and options['start'] == None and options['end'] == None:
+            LogProblem.objects.all().delete()
+            LogProblem.clearCount()
+            self.stdout.write('Cleared all log problems')
+            return
+
+        date_start, date_end = self.getDateExtent()
+        if options['start'] != None:
+            date_start = options['start']
+        if options['end'] != None:
+            date_end = options['end']
+
+        if date_start == None or date_end == None:
+            self.stdout.write('No logged dates found')
+            return
+
+        if date_start > date_end:
+            raise CommandError('The start date must not be after the end date')
+
+        if options['action'] == 'clear':
+            LogProblem.objects.filter(date__gte=date_start, date__lte=date_end).delete()
+            LogProblem.clearCount()
+            self.stdout.write('Cleared log problems from ' + str(date_start) + ' to ' + str(date_end))
+        elif options['action'] == 'rebuild':
+            # a month at a time, so that large databases don't have to be held in memory at once
+            count = 0
+            for month_start, month_end in Report.getMonthRanges(date_start, date_end):
+                dates = [month_start + datetime.timedelta(days=i) for i in range(0, (month_end - month_start).days + 1)]
+                count += Report.saveLogProblems(dates)
+            self.stdout.write('Found ' + str(count) + ' log problems from ' + str(date_start) + ' to ' + str(date_end))
@@ -0,0 +1,101 @@
+# Copyright © 2019-2023 Justin Jacobs
+#
+# This file is part of the Transit Log System.
+#
+# The Transit Log System is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+#
+# The Transit Log System is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# The Transit Log System.  If not, see http://www.gnu.org/licenses/
+
+import datetime
+
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from transit.models import Trip, Shift
+from transit.common.util.parse import parse_log_time, parse_log_time_cached, parse_odometer
+
+class Command(BaseCommand):
+    help = 'Compares the log time and odometer parsers against datetime.strptime() and float()'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=10000, help='Maximum number of trips and shifts to read strings from. Defaults to 10000.')
+        parser.add_argument('--repeat', type=int, default=5, help='Number of passes over the strings. Defaults to 5.')
+
+    def handle(self, *args, **options):
+        if options['limit'] < 1 or options['repeat'] < 1:
+            raise CommandError('--limit and --repeat must be at least 1')
+
+        times = []
+        miles = []
+        for i in Trip.objects.values_list('start_time', 'end_time', 'start_miles', 'end_miles')[:options['limit']]:
+            times += [j for j in i[0:2] if j != '']
+            miles += [j for j in i[2:4] if j != '']
+        for i in Shift.objects.values_list('start_time', 'end_time', 'start_miles', 'end_miles')[:options['limit']]:
+            times += [j for j in i[0:2] if j != '']
+            miles += [j for j in i[2:4] if j != '']
+
+        if len(times) == 0 and len(miles) == 0:
+            self.stdout.write('No logged times or odometer readings found')
+            return
+
+        def ParseTimeStrptime(string):
+            try:
+                return datetime.datetime.strptime(string, '%I:%M %p')
+            except ValueError:
+                return None
+
+        def ParseTime(string):
+            try:
+                return parse_log_time(string)
+            except ValueError:
+                return None
+
+        def ParseMilesFloat(string):
+            try:
+                return float(string)
+            except ValueError:
+                return None
+
+        def ParseMiles(string):
+            try:
+                return parse_odometer(string)
+            except ValueError:
+                return None
+
+        # the parsers must agree before their speed means anything
+        for i in times:
+            if ParseTimeStrptime(i) != ParseTime(i):
+                raise CommandError('parse_log_time() does not match strptime() for ' + repr(i))
+        for i in miles:
+            if ParseMilesFloat(i) != ParseMiles(i):
+                raise CommandError('parse_odometer() does not match float() for ' + repr(i))
+
+        def Run(func, strings, clear=None):
+            if clear != None:
+                clear()
+            perf_start = perf_counter()
+            for i in range(0, options['repeat']):
+                for j in strings:
+                    func(j)
+            return perf_counter() - perf_start
+
+        self.stdout.write(f'{len(times)} times ({len(set(times))} unique), {len(miles)} odometer readings ({len(set(miles))} unique), {options["repeat"]} passes')
+
+        results = [
+            ('times: strptime()', Run(ParseTimeStrptime, times)),
+            ('times: parse_log_time(), cold cache', Run(ParseTime, times, parse_log_time_cached.cache_clear)),
+            ('times: parse_log_time(), warm cache', Run(ParseTime, times)),
+            ('odometer: float()', Run(ParseMilesFloat, miles)),
+            ('odometer: parse_odometer()', Run(ParseMiles, miles)),
+        ]
+
+        for name, seconds in results:
+            self.stdout.write(f'{name}: {seconds:.3f}s')
@@ -0,0 +1,190 @@
+# Copyright © 2019-2023 Justin Jacobs
+#
+# This file is part of the Transit Log System.
+#
+# The Transit Log System is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+#
+# The Transit Log System is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# The Transit Log System.  If not, see http://www.gnu.org/licenses/
+
+import json
+import datetime
+import platform
+import statistics
+
+from time import perf_counter
+
+import django
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+from django.test import Client as TestClient
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from transit.models import Trip, Shift
+from transit.common.util.synthetic import create_synthetic_data
+from transit.context_processors import VersionInfo
+from transit.views.report import Report
+
+class Command(BaseCommand):
+    help = 'Times reports, exports, and the schedule pages against synthetic data of several sizes, and writes the results as JSON. The data is created inside a transaction that is rolled back.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='30,365,730', help='Comma separated list of data sizes, in days')
+        parser.add_argument('--start', type=datetime.date.fromisoformat, default=datetime.date(2099, 1, 1), help='First day of the synthetic data (YYYY-MM-DD). The range must not have any trips or shifts.')
+        parser.add_argument('--drivers', type=int, default=8)
+        parser.add_argument('--vehicles', type=int, default=6)
+        parser.add_argument('--clients', type=int, default=400)
+        parser.add_argument('--destinations', type=int, default=150)
+        parser.add_argument('--trips-per-day', type=int, default=60)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--output', default='report_benchmark.json', help='File to write the results to')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(i) for i in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError('--sizes must be a comma separated list of numbers')
+
+        date_start = options['start']
+        date_end = date_start + datetime.timedelta(days=max(sizes)-1)
+        if Trip.objects.filter(date__gte=date_start, date__lte=date_end).exists() or Shift.objects.filter(date__gte=date_start, date__lte=date_end).exists():
+            raise CommandError('There are already trips or shifts between ' + str(date_start) + ' and ' + str(date_end))
+
+        results = {
+            'created': datetime.datetime.now().isoformat(timespec='seconds'),
+            'version': VersionInfo.version_str.strip(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': settings.DATABASES['default']['ENGINE'],
+            'settings': {
+                'REPORT_CACHE_SIZE': settings.REPORT_CACHE_SIZE,
+                # the data only exists inside a transaction, so reports are always loaded in a single process
+                'REPORT_PARALLEL_WORKERS': settings.REPORT_PARALLEL_WORKERS,
+            },
+            'options': {i: options[i] for i in ('drivers', 'vehicles', 'clients', 'destinations', 'trips_per_day', 'seed', 'repeat')},
+            'sizes': [],
+        }
+
+        with override_settings(ALLOWED_HOSTS=['*'], REPORT_JOB_MIN_DAYS=0):
+            for days in sizes:
+                self.stdout.write('Benchmarking ' + str(days) + ' days...')
+                results['sizes'].append(self.benchmarkSize(date_start, days, options))
+
+        with open(options['output'], 'w') as output_file:
+            json.dump(results, output_file, indent=4)
+
+        for size in results['sizes']:
+            self.stdout.write(str(size['days']) + ' days, ' + str(size['trips']) + ' trips, ' + str(size['shifts']) + ' shifts')
+            for name in size['targets']:
+                target = size['targets'][name]
+                self.stdout.write(f"    {name:<32} first {target['first']:.3f}s, best {target['best']:.3f}s, median {target['median']:.3f}s")
+        self.stdout.write('Wrote ' + options['output'])
+
+    def benchmarkSize(self, date_start, days, options):
+        date_end = date_start + datetime.timedelta(days=days-1)
+
+        with transaction.atomic():
+            counts = create_synthetic_data(date_start, days, driver_count=options['drivers'], vehicle_count=options['vehicles'], client_count=options['clients'], destination_count=options['destinations'], trips_per_day=options['trips_per_day'], seed=options['seed'])
+
+            user = User.objects.create_superuser('report_benchmark', password=None)
+            client = TestClient()
+            client.force_login(user)
+
+            # the schedule pages are timed for the busiest day
+            busiest = Trip.objects.filter(date__gte=date_start, date__lte=date_end).values('date').annotate(count=Count('id')).order_by('-count').first()
+            day_date = busiest['date'] if busiest != None else date_start
+            day_kwargs = {'year': day_date.year, 'month': day_date.month, 'day': day_date.day}
+            target_params = {'target_id': '', 'target_action': '', 'target_data': ''}
+            day_params = dict(target_params, year=day_date.year, month=day_date.month, day=day_date.day)
+            range_kwargs = {'start_year': date_start.year, 'start_month': date_start.month, 'start_day': date_start.day, 'end_year': date_end.year, 'end_month': date_end.month, 'end_day': date_end.day}
+
+            # sets up the print filters in the session
+            client.get(reverse('schedule-print', kwargs=day_kwargs))
+
+            def Get(url, params=None):
+                response = client.get(url, params)
+                if response.status_code != 200:
+                    raise CommandError('GET ' + url + ' returned ' + str(response.status_code))
+                # the test client closes the response once its content has been read
+                if response.streaming:
+                    for i in response.streaming_content:
+                        pass
+
+            def ReportLoad():
+                Report().load(date_start, date_end)
+
+            def ReportXLSX():
+                Get(reverse('report-xlsx', kwargs=range_kwargs))
+
+            def SearchXLSX():
+                Get(reverse('search-xlsx'), {
+                    'start_date_year': date_start.year, 'start_date_month': date_start.month, 'start_date_day': date_start.day,
+                    'end_date_year': date_end.year, 'end_date_month': date_end.month, 'end_date_day': date_end.day,
+                })
+
+            def TripDeltaTimeAverageRegen():
+                # this also covers any existing trips, not only the synthetic ones
+                response = client.post(reverse('trip-delta-time-avg-regen'), {'regen': 'regen'})
+                if response.status_code != 200:
+                    raise CommandError('POST trip-delta-time-avg-regen returned ' + str(response.status_code))
+
+            targets = [
+                ('Report.load', ReportLoad),
+                ('report-xlsx', ReportXLSX),
+                ('search-xlsx', SearchXLSX),
+                ('ajax-schedule-edit', lambda: Get(reverse('ajax-schedule-edit'), day_params)),
+                ('ajax-schedule-view', lambda: Get(reverse('ajax-schedule-view'), day_params)),
+                ('ajax-schedule-timeline', lambda: Get(reverse('ajax-schedule-timeline'), day_params)),
+                ('ajax-schedule-print', lambda: Get(reverse('ajax-schedule-print', kwargs=day_kwargs), target_params)),
+                ('ajax-schedule-print-daily-log', lambda: Get(reverse('ajax-schedule-print-daily-log', kwargs=day_kwargs), target_params)),
+                ('trip-delta-time-avg-regen', TripDeltaTimeAverageRegen),
+            ]
+
+            result = {
+                'days': days,
+                'date_start': str(date_start),
+                'date_end': str(date_end),
+                'busiest_day': str(day_date),
+                'targets': {},
+            }
+            result.update(counts)
+
+            for name, target in targets:
+                times = []
+                for i in range(0, max(1, options['repeat'])):
+                    # every run loads its report from the database, instead of the cache
+                    self.clearReportCaches()
+                    perf_start = perf_counter()
+                    target()
+                    times.append(perf_counter() - perf_start)
+
+                result['targets'][name] = {
+                    'times': times,
+                    'first': times[0],
+                    'best': min(times),
+                    'median': statistics.median(times),
+                }
+
+            transaction.set_rollback(True)
+
+        # the rolled back data versions will be reused by the next size
+        self.clearReportCaches()
+
+        return result
+
+    def clearReportCaches(self):
+        with Report.cache_lock:
+            Report.cache.clear()
+            Report.daily_log_cache.clear()
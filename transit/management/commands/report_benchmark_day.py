@@ -0,0 +1,113 @@
+# Copyright © 2019-2023 Justin Jacobs
+#
+# This file is part of the Transit Log System.
+#
+# The Transit Log System is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+#
+# The Transit Log System is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# The Transit Log System.  If not, see http://www.gnu.org/licenses/
+
+import datetime
+
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from transit.models import Driver, Vehicle, Trip, Shift
+from transit.views.report import Report
+
+class Command(BaseCommand):
+    help = 'Times Report.load for a single synthetic day with many shifts. The data is created inside a transaction that is rolled back.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', type=datetime.date.fromisoformat, default=datetime.date(2099, 1, 1), help='Date to use for the synthetic day (YYYY-MM-DD). It should not have any logged data.')
+        parser.add_argument('--vehicles', type=int, default=20)
+        parser.add_argument('--shifts', type=int, default=6, help='Shifts per vehicle')
+        parser.add_argument('--trips', type=int, default=10, help='Trips per shift')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        day_date = options['date']
+
+        with transaction.atomic():
+            shift_count, trip_count = self.createDay(day_date, options['vehicles'], options['shifts'], options['trips'])
+
+            times = []
+            for i in range(0, options['repeat']):
+                report = Report()
+                perf_start = perf_counter()
+                report.load(day_date, day_date)
+                times.append((perf_counter() - perf_start, report.perf_database, report.perf_processing))
+
+            transaction.set_rollback(True)
+
+        times.sort()
+        best = times[0]
+        self.stdout.write(str(shift_count) + ' shifts, ' + str(trip_count) + ' trips, ' + str(len(report.report_errors.errors)) + ' report errors')
+        self.stdout.write('best of ' + str(len(times)) + f": {best[0]:.4f}s (database {best[1]:.4f}s, processing {best[2]:.4f}s)")
+        self.stdout.write(f"processing per trip: {best[2] / max(trip_count, 1) * 1000000:.1f}us")
+
+    def createDay(self, day_date, vehicle_count, shifts_per_vehicle, trips_per_shift):
+        vehicles = []
+        for i in range(0, vehicle_count):
+            vehicles.append(Vehicle(name='Benchmark Vehicle ' + str(i), sort_index=1000 + i))
+        Vehicle.objects.bulk_create(vehicles)
+
+        # two drivers share each vehicle, so every (driver, vehicle) pair has several shifts to choose from by mileage
+        drivers = []
+        for i in range(0, vehicle_count * 2):
+            drivers.append(Driver(name='Benchmark Driver ' + str(i), sort_index=1000 + i))
+        Driver.objects.bulk_create(drivers)
+
+        # keep all of a vehicle's shifts within the same day
+        trip_minutes = max(1, (17 * 60) // (shifts_per_vehicle * (trips_per_shift + 1)))
+
+        shifts = []
+        trips = []
+        for vehicle_index in range(0, vehicle_count):
+            vehicle = vehicles[vehicle_index]
+            miles = 10000 + vehicle_index * 20000
+            minutes = 6 * 60
+
+            for shift_index in range(0, shifts_per_vehicle):
+                driver = drivers[vehicle_index * 2 + shift_index % 2]
+                shift_start_miles = miles
+                shift_start_minutes = minutes
+
+                for trip_index in range(0, trips_per_shift):
+                    trip_miles = 5 + trip_index % 4
+                    trip = Trip(date=day_date, sort_index=len(trips), driver=driver, vehicle=vehicle, name='Benchmark Rider ' + str(len(trips) % 200), address='Benchmark Address', destination='Benchmark Destination ' + str(trip_index % 20))
+                    # trips are logged with the last few digits of the odometer, like they are on the paper logs
+                    trip.start_miles = f"{miles + 1:.1f}"[-6:]
+                    trip.end_miles = f"{miles + trip_miles:.1f}"[-6:]
+                    trip.start_time = self.timeString(minutes)
+                    trip.end_time = self.timeString(minutes + trip_minutes)
+                    trips.append(trip)
+                    miles += trip_miles + 1
+                    minutes += trip_minutes
+
+                shift = Shift(date=day_date, driver=driver, vehicle=vehicle, sort_index=shift_index)
+                shift.start_miles = f"{shift_start_miles:.1f}"
+                shift.end_miles = f"{miles + 1:.1f}"
+                shift.start_time = self.timeString(shift_start_minutes)
+                shift.end_time = self.timeString(minutes)
+                shift.fuel = '0'
+                shifts.append(shift)
+
+                miles += 2
+                minutes += trip_minutes
+
+        Shift.objects.bulk_create(shifts)
+        Trip.objects.bulk_create(trips)
+
+        return (len(shifts), len(trips))
+
+    def timeString(self, minutes):
+        return datetime.time((minutes // 60) % 24, minutes % 60).strftime('%I:%M %p')
@@ -0,0 +1,66 @@
+# Copyright © 2019-2023 Justin Jacobs
+#
+# This file is part of the Transit Log System.
+#
+# The Transit Log System is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+#
+# The Transit Log System is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# The Transit Log System.  If not, see http://www.gnu.org/licenses/
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from transit.models import ReportJob
+from transit.views.report import Report
+from transit.views.report_job import reportJobRun
+
+class Command(BaseCommand):
+    help = 'Runs queued background reports, and finds the log problems of changed dates. Keeps checking for new reports unless --once is given.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run the queued reports and exit, instead of waiting for more. Useful with a scheduled task.')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds to wait between checks for new reports. Defaults to 5.')
+        parser.add_argument('--requeue-running', action='store_true', help='Queue reports that are marked as running again. Use this when a previous runner was stopped in the middle of a report.')
+
+    def handle(self, *args, **options):
+        if options['interval'] <= 0:
+            raise CommandError('--interval must be greater than 0')
+
+        if options['requeue_running']:
+            count = ReportJob.objects.filter(status=ReportJob.STATUS_RUNNING).update(status=ReportJob.STATUS_QUEUED, days_done=0)
+            self.stdout.write('Queued ' + str(count) + ' running report(s) again')
+
+        while True:
+            ReportJob.purge(settings.REPORT_JOB_KEEP_DAYS)
+
+            job = ReportJob.claimNext()
+            while job != None:
+                self.stdout.write('Running report ' + str(job.id) + ' (' + str(job.date_start) + ' - ' + str(job.date_end) + ')')
+                if reportJobRun(job):
+                    self.stdout.write('Finished report ' + str(job.id))
+                else:
+                    job.refresh_from_db()
+                    self.stderr.write('Report ' + str(job.id) + ' failed: ' + job.error)
+                job = ReportJob.claimNext()
+
+            # keeps the log problems (and the count shown in the menu) up to date without waiting for the Log problems page to be viewed
+            try:
+                Report.updateLogProblems()
+            except Exception as e:
+                self.stderr.write('Finding log problems failed: ' + str(e))
+
+            if options['once']:
+                break
+
+            # don't hold on to a connection while waiting
+            connections.close_all()
+            time.sleep(options['interval'])
@@ -0,0 +1,70 @@
+# Copyright © 2019-2023 Justin Jacobs
+#
+# This file is part of the Transit Log System.
+#
+# The Transit Log System is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+#
+# The Transit Log System is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# The Transit Log System.  If not, see http://www.gnu.org/licenses/
+
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+
+from transit.models import Trip, Shift, ClientPayment, ReportRollup
+from transit.views.report import Report
+
+class Command(BaseCommand):
+    help = 'Rebuilds or clears the stored daily report rollups'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['rebuild', 'clear'])
+        parser.add_argument('--start', type=datetime.date.fromisoformat, help='First date (YYYY-MM-DD). Defaults to the earliest logged date.')
+        parser.add_argument('--end', type=datetime.date.fromisoformat, help='Last date (YYYY-MM-DD). Defaults to the latest logged date.')
+
+    def getDateExtent(self):
+        dates = []
+        for i in (Trip.objects.aggregate(Min('date'), Max('date')), Shift.objects.aggregate(Min('date'), Max('date')), ClientPayment.objects.aggregate(Min('date_paid'), Max('date_paid'))):
+            dates += [j for j in i.values() if j != None]
+
+        if len(dates) == 0:
+            return (None, None)
+        return (min(dates), max(dates))
+
+    def handle(self, *args, **options):
+        if options['action'] == 'clear' and options['start'] == None and options['end'] == None:
+            ReportRollup.invalidate()
+            self.stdout.write('Cleared all report rollups')
+            return
+
+        date_start, date_end = self.getDateExtent()
+        if options['start'] != None:
+            date_start = options['start']
+        if options['end'] != None:
+            date_end = options['end']
+
+        if date_start == None or date_end == None:
+            self.stdout.write('No logged dates found')
+            return
+
+        if date_start > date_end:
+            raise CommandError('The start date must not be after the end date')
+
+        if options['action'] == 'clear':
+            dates = []
+            day_date = date_start
+            while day_date <= date_end:
+                dates.append(day_date)
+                day_date += datetime.timedelta(days=1)
+            ReportRollup.invalidate(dates)
+            self.stdout.write('Cleared report rollups from ' + str(date_start) + ' to ' + str(date_end))
+        elif options['action'] == 'rebuild':
+            count = Report.buildRollups(date_start, date_end)
+            self.stdout.write('Built ' + str(count) + ' report rollups from ' + str(date_start) + ' to ' + str(date_end))
@@ -0,0 +1,51 @@
+# Copyright © 2019-2023 Justin Jacobs
+#
+# This file is part of the Transit Log System.
+#
+# The Transit Log System is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+#
+# The Transit Log System is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# The Transit Log System.  If not, see http://www.gnu.org/licenses/
+
+import datetime
+
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from transit.models import Trip, Shift
+from transit.common.util.synthetic import create_synthetic_data
+
+class Command(BaseCommand):
+    help = 'Fills a range of days with synthetic drivers, vehicles, clients, shifts, trips, and payments for performance testing. Do not run this on a production database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=datetime.date.fromisoformat, default=datetime.date(2099, 1, 1), help='First day of the synthetic data (YYYY-MM-DD). The range must not have any trips or shifts.')
+        parser.add_argument('--years', type=float, default=1, help='Length of the range in years')
+        parser.add_argument('--drivers', type=int, default=8)
+        parser.add_argument('--vehicles', type=int, default=6)
+        parser.add_argument('--clients', type=int, default=400)
+        parser.add_argument('--destinations', type=int, default=150)
+        parser.add_argument('--trips-per-day', type=int, default=60)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        date_start = options['start']
+        days = max(1, int(options['years'] * 365))
+        date_end = date_start + datetime.timedelta(days=days-1)
+
+        if Trip.objects.filter(date__gte=date_start, date__lte=date_end).exists() or Shift.objects.filter(date__gte=date_start, date__lte=date_end).exists():
+            raise CommandError('There are already trips or shifts between ' + str(date_start) + ' and ' + str(date_end))
+
+        perf_start = perf_counter()
+        with transaction.atomic():
+            counts = create_synthetic_data(date_start, days, driver_count=options['drivers'], vehicle_count=options['vehicles'], client_count=options['clients'], destination_count=options['destinations'], trips_per_day=options['trips_per_day'], seed=options['seed'])
+
+        self.stdout.write('Created ' + ', '.join(str(counts[i]) + ' ' + i for i in counts) + ' from ' + str(date_start) + ' to ' + str(date_end) + f' in {perf_counter() - perf_start:.1f}s')
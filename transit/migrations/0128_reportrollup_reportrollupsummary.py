@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:33
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transit', '0127_vehicle_wheelchair_lift_inspection_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportRollup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('date', models.DateField(unique=True)),
+                ('version', models.IntegerField(default=0, editable=False)),
+                ('data_version', models.IntegerField(default=0, editable=False)),
+                ('has_data', models.BooleanField(default=False)),
+                ('collected_cash', models.IntegerField(default=0)),
+                ('collected_check', models.IntegerField(default=0)),
+                ('paid_cash', models.IntegerField(default=0)),
+                ('paid_check', models.IntegerField(default=0)),
+                ('total_payments', models.IntegerField(default=0)),
+                ('total_fares', models.IntegerField(default=0)),
+                ('details', models.JSONField(default=dict)),
+            ],
+            options={
+                'ordering': ['date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ReportRollupSummary',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('rollup_type', models.IntegerField(choices=[(0, 'Vehicle'), (1, 'Driver')], default=0)),
+                ('summary_type', models.IntegerField(default=0)),
+                ('service_miles', models.FloatField(default=0)),
+                ('service_hours', models.FloatField(default=0)),
+                ('deadhead_miles', models.FloatField(default=0)),
+                ('deadhead_hours', models.FloatField(default=0)),
+                ('total_miles', models.FloatField(default=0)),
+                ('total_hours', models.FloatField(default=0)),
+                ('pmt', models.FloatField(default=0)),
+                ('fuel', models.FloatField(default=0)),
+                ('collected_cash', models.IntegerField(default=0)),
+                ('collected_check', models.IntegerField(default=0)),
+                ('total_collected_money', models.IntegerField(default=0)),
+                ('days_of_low_rider_count', models.IntegerField(default=0)),
+                ('trip_counts', models.JSONField(default=dict)),
+                ('unique_riders', models.JSONField(default=list)),
+                ('driver', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='transit.driver')),
+                ('parent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='transit.reportrollup')),
+                ('vehicle', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='transit.vehicle')),
+            ],
+        ),
+    ]
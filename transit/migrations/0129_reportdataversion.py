@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:04
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transit', '0128_reportrollup_reportrollupsummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportDataVersion',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('date', models.DateField(unique=True)),
+                ('version', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['date'],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:16
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transit', '0129_reportdataversion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('started', models.DateTimeField(blank=True, null=True)),
+                ('finished', models.DateTimeField(blank=True, null=True)),
+                ('date_start', models.DateField()),
+                ('date_end', models.DateField()),
+                ('driver_id', models.UUIDField(blank=True, null=True)),
+                ('client_names', models.JSONField(default=list)),
+                ('clients_filtered', models.BooleanField(default=False)),
+                ('show_daily_data', models.BooleanField(default=False)),
+                ('query_string', models.TextField(blank=True)),
+                ('status', models.IntegerField(choices=[(0, 'Queued'), (1, 'Running'), (2, 'Done'), (3, 'Failed')], default=0)),
+                ('days_done', models.IntegerField(default=0)),
+                ('days_total', models.IntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_by', models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created'],
+            },
+        ),
+    ]
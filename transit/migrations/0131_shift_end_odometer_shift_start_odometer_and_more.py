@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transit', '0130_reportjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shift',
+            name='end_odometer',
+            field=models.FloatField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='shift',
+            name='start_odometer',
+            field=models.FloatField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='trip',
+            name='end_odometer',
+            field=models.FloatField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='trip',
+            name='start_odometer',
+            field=models.FloatField(blank=True, db_index=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations
+
+from transit.common.util.odometer import set_shift_odometers, set_trip_odometers
+
+BATCH_SIZE = 1000
+DAYS_PER_BATCH = 31
+
+def set_odometers(apps, schema_editor):
+    Shift = apps.get_model('transit', 'Shift')
+    Trip = apps.get_model('transit', 'Trip')
+
+    shifts = list(Shift.objects.only('id', 'date', 'sort_index', 'driver_id', 'vehicle_id', 'start_miles', 'end_miles', 'status').order_by('date', 'sort_index'))
+    for i in shifts:
+        set_shift_odometers(i)
+    Shift.objects.bulk_update(shifts, ['start_odometer', 'end_odometer'], batch_size=BATCH_SIZE)
+
+    # trips are completed from the normal (status 0) shifts of the same day
+    shifts_by_date = {}
+    for i in shifts:
+        if i.status == 0 and i.start_odometer != None and i.vehicle_id != None:
+            shifts_by_date.setdefault(i.date, []).append(i)
+
+    # the trips are loaded a month at a time, so that large databases don't have to be held in memory at once
+    logged_trips = Trip.objects.exclude(start_miles='', end_miles='')
+    dates = sorted(set(logged_trips.values_list('date', flat=True)))
+    for i in range(0, len(dates), DAYS_PER_BATCH):
+        trips = list(logged_trips.filter(date__in=dates[i:i+DAYS_PER_BATCH]).only('id', 'date', 'driver_id', 'vehicle_id', 'start_miles', 'end_miles'))
+        for trip in trips:
+            set_trip_odometers(trip, shifts_by_date.get(trip.date, []))
+        Trip.objects.bulk_update(trips, ['start_odometer', 'end_odometer'], batch_size=BATCH_SIZE)
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('transit', '0131_shift_end_odometer_shift_start_odometer_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(set_odometers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transit', '0132_data_odometers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shift',
+            name='end_minutes',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='shift',
+            name='start_minutes',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='templatetrip',
+            name='appointment_minutes',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='templatetrip',
+            name='pick_up_minutes',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='trip',
+            name='appointment_minutes',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='trip',
+            name='end_minutes',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='trip',
+            name='pick_up_minutes',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='trip',
+            name='start_minutes',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,38 @@
+from django.db import migrations
+
+from transit.common.util.parse import set_log_minutes
+
+BATCH_SIZE = 1000
+
+# the historical models don't have the MINUTES_FIELDS of the current ones
+MINUTES_FIELDS = {
+    'Trip': (('pick_up_time', 'pick_up_minutes'), ('appointment_time', 'appointment_minutes'), ('start_time', 'start_minutes'), ('end_time', 'end_minutes')),
+    'Shift': (('start_time', 'start_minutes'), ('end_time', 'end_minutes')),
+    'TemplateTrip': (('pick_up_time', 'pick_up_minutes'), ('appointment_time', 'appointment_minutes')),
+}
+
+def set_minutes(apps, schema_editor):
+    for model_name in MINUTES_FIELDS:
+        model = apps.get_model('transit', model_name)
+        fields = MINUTES_FIELDS[model_name]
+
+        # rows without any times don't need to be updated
+        query = model.objects.exclude(**{i[0]: '' for i in fields}).only('id', *[i[0] for i in fields]).order_by('pk')
+
+        objects = []
+        for i in query.iterator(chunk_size=BATCH_SIZE):
+            set_log_minutes(i, fields)
+            objects.append(i)
+            if len(objects) >= BATCH_SIZE:
+                model.objects.bulk_update(objects, [j[1] for j in fields])
+                objects = []
+        model.objects.bulk_update(objects, [j[1] for j in fields])
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('transit', '0133_shift_end_minutes_shift_start_minutes_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(set_minutes, migrations.RunPython.noop),
+    ]
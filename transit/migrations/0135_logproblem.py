@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:34
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transit', '0134_data_log_minutes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LogProblem',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('sort_index', models.IntegerField(default=0)),
+                ('error_code', models.IntegerField(default=0)),
+                ('message', models.TextField(blank=True)),
+                ('shift', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='transit.shift')),
+                ('trip', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='transit.trip')),
+            ],
+            options={
+                'ordering': ['-date', 'sort_index'],
+                'indexes': [models.Index(fields=['-date', 'sort_index'], name='transit_log_date_bfba67_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='LogProblemDay',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('date', models.DateField(unique=True)),
+                ('data_version', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['date'],
+            },
+        ),
+    ]
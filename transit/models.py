@@ -13,12 +13,15 @@
 # You should have received a copy of the GNU General Public License along with
 # The Transit Log System.  If not, see http://www.gnu.org/licenses/
 
-import uuid, re, datetime
+import uuid, re, datetime, os
+from django.conf import settings
+from django.core.cache import cache
 from django.db import models
 from django.urls import reverse
 from django.utils import timezone
 
 from transit.common.util import *
+from transit.common.util.parse import parse_log_time
 
 class SingletonModel(models.Model):
     class Meta:
@@ -172,6 +175,18 @@ class Trip(models.Model):
     PHONE_ADDRESS = 3
     PHONE_DESTINATION = 4
 
+    # the time string fields, and the minutes fields that are kept in sync with them
+    MINUTES_FIELDS = (
+        ('pick_up_time', 'pick_up_minutes'),
+        ('appointment_time', 'appointment_minutes'),
+        ('start_time', 'start_minutes'),
+        ('end_time', 'end_minutes'),
+    )
+
+    # queryset expressions in minutes, which are null if either time is missing or can't be parsed
+    DURATION = models.F('end_minutes') - models.F('start_minutes')
+    APPOINTMENT_DIFF = models.F('end_minutes') - models.F('appointment_minutes')
+
     # NOTE Trips that are of the format FORMAT_ACTIVITY and have a driver use the 'passenger' field to store the driver availability flag
     # This field isn't used otherwise in this context, and I felt it was unneccessary to create a new field for this purpose
     # The same behavior applies to the TemplateTrip class
@@ -201,6 +216,14 @@ class Trip(models.Model):
     start_time = models.CharField(max_length=FieldSizes.TIME, blank=True)
     end_miles = models.CharField(max_length=FieldSizes.MILES, blank=True)
     end_time = models.CharField(max_length=FieldSizes.TIME, blank=True)
+    # the times as minutes since midnight, set when the trip is saved (see MINUTES_FIELDS)
+    pick_up_minutes = models.IntegerField(null=True, blank=True, editable=False)
+    appointment_minutes = models.IntegerField(null=True, blank=True, editable=False)
+    start_minutes = models.IntegerField(null=True, blank=True, editable=False)
+    end_minutes = models.IntegerField(null=True, blank=True, editable=False)
+    # the full odometer readings as numbers, completed from the trip's shift when the trip is saved (see transit.common.util.odometer)
+    start_odometer = models.FloatField(null=True, blank=True, editable=False, db_index=True)
+    end_odometer = models.FloatField(null=True, blank=True, editable=False, db_index=True)
     status = models.IntegerField(choices=STATUS_LEVELS, default=STATUS_NORMAL)
     collected_cash = models.IntegerField(default=0)
     collected_check = models.IntegerField(default=0)
@@ -401,11 +424,13 @@ class Trip(models.Model):
         else:
             return 'id_phone_home'
 
-    def check_cancel_date(self):
+    def check_cancel_date(self, site_settings=None):
         if self.cancel_date == None:
             return 0
 
-        site_settings = SiteSettings.load()
+        # site_settings can be passed in when checking many trips, so that it's only loaded once
+        if site_settings == None:
+            site_settings = SiteSettings.load()
 
         aware_date = timezone.make_aware(datetime.datetime.combine(self.date, datetime.datetime.min.time())).astimezone(datetime.timezone.utc)
 
@@ -421,15 +446,17 @@ class Trip(models.Model):
         return 1
 
     def get_appt_dropoff_diff(self):
-        if self.appointment_time == '' or self.end_time == '':
-            return None
+        # minutes late, or negative if early; querysets can annotate it as appointment_diff with APPOINTMENT_DIFF
+        if hasattr(self, 'appointment_diff'):
+            diff = self.appointment_diff
+        elif self.appointment_minutes == None or self.end_minutes == None:
+            diff = None
+        else:
+            diff = self.end_minutes - self.appointment_minutes
 
-        try:
-            parsed_appointment = datetime.datetime.strptime(self.appointment_time, '%I:%M %p')
-            parsed_dropoff = datetime.datetime.strptime(self.end_time, '%I:%M %p')
-            return (parsed_dropoff - parsed_appointment).total_seconds() / 60
-        except:
+        if diff == None:
             return None
+        return float(diff)
 
     def get_appt_dropoff_diff_html(self):
         diff_time = self.get_appt_dropoff_diff()
@@ -464,7 +491,7 @@ class Trip(models.Model):
             return ''
 
         try:
-            parsed_pickup = datetime.datetime.strptime(pick_up_time, '%I:%M %p')
+            parsed_pickup = parse_log_time(pick_up_time)
         except:
             return ''
 
@@ -490,7 +517,7 @@ class Trip(models.Model):
             return ''
 
         try:
-            parsed_appointment = datetime.datetime.strptime(self.appointment_time, '%I:%M %p')
+            parsed_appointment = parse_log_time(self.appointment_time)
         except:
             return ''
 
@@ -515,42 +542,29 @@ class Trip(models.Model):
         pixels_per_min = 3
         min_width = pixels_per_min * 5
 
-        start_time = None
-        end_time = None
-        pick_up_time = None
+        # times are in minutes since midnight, and times that wrap past midnight are measured forward, like timedelta.seconds
+        start_time = self.start_minutes
+        end_time = self.end_minutes
 
         # timeline starts at 8 AM
-        timeline_start = datetime.datetime(1900,1,1,7)
-
-        if self.start_time:
-            try:
-                start_time = datetime.datetime.strptime(self.start_time, '%I:%M %p')
-            except:
-                pass
-
-        if self.end_time:
-            try:
-                end_time = datetime.datetime.strptime(self.end_time, '%I:%M %p')
-            except:
-                pass
+        timeline_start = 7 * 60
 
-        if start_time and end_time:
+        if start_time != None and end_time != None:
             # log data complete, no need for ETA
-            pos_start = ((start_time - timeline_start).seconds / 60) * pixels_per_min
-            pos_width = ((end_time - start_time).seconds / 60) * pixels_per_min
+            pos_start = float((start_time - timeline_start) % 1440) * pixels_per_min
+            pos_width = float((end_time - start_time) % 1440) * pixels_per_min
             if pos_width < min_width:
                 pos_width = min_width
 
             return (pos_start, pos_width)
         else:
-            if start_time:
+            if start_time != None:
                 eta_start = start_time
+            elif self.pick_up_minutes != None:
+                eta_start = self.pick_up_minutes
             else:
-                try:
-                    eta_start = datetime.datetime.strptime(self.pick_up_time, '%I:%M %p')
-                except:
-                    # unable to determine a start time for this trip
-                    return (0, 0)
+                # unable to determine a start time for this trip
+                return (0, 0)
 
             address_concat = ''
             if self.address <= self.destination:
@@ -560,19 +574,13 @@ class Trip(models.Model):
 
             address_uuid = uuid.uuid5(uuid.NAMESPACE_URL, address_concat)
 
-            eta_end = eta_start
-
             query = TripDeltaTimeAverage.objects.filter(id=address_uuid)
             if len(query) > 0:
-                eta_end += datetime.timedelta(seconds=query[0].avg_time)
                 settings = SiteSettings.load()
-                eta_end += datetime.timedelta(seconds=(settings.trip_eta_buffer * 60))
+                eta_seconds = query[0].avg_time + settings.trip_eta_buffer * 60
 
-                if eta_start < timeline_start:
-                    pos_start = (((timeline_start-eta_start).seconds / 60) * pixels_per_min) * -1
-                else:
-                    pos_start = ((eta_start - timeline_start).seconds / 60) * pixels_per_min
-                pos_width = ((eta_end - eta_start).seconds / 60) * pixels_per_min
+                pos_start = float(eta_start - timeline_start) * pixels_per_min
+                pos_width = ((eta_seconds % 86400) / 60) * pixels_per_min
                 if pos_width < min_width:
                     pos_width = min_width
 
@@ -670,6 +678,11 @@ class Shift(models.Model):
         (STATUS_CANCELED, 'Canceled'),
     ]
 
+    MINUTES_FIELDS = (
+        ('start_time', 'start_minutes'),
+        ('end_time', 'end_minutes'),
+    )
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     sort_index = models.IntegerField(default=0, editable=False)
     date = models.DateField()
@@ -679,6 +692,12 @@ class Shift(models.Model):
     start_time = models.CharField(max_length=FieldSizes.TIME, blank=True)
     end_miles = models.CharField(max_length=FieldSizes.MILES, blank=True)
     end_time = models.CharField(max_length=FieldSizes.TIME, blank=True)
+    # the times as minutes since midnight, set when the shift is saved (see MINUTES_FIELDS)
+    start_minutes = models.IntegerField(null=True, blank=True, editable=False)
+    end_minutes = models.IntegerField(null=True, blank=True, editable=False)
+    # the odometer readings as numbers, set when the shift is saved (see transit.common.util.odometer)
+    start_odometer = models.FloatField(null=True, blank=True, editable=False, db_index=True)
+    end_odometer = models.FloatField(null=True, blank=True, editable=False, db_index=True)
     fuel = models.CharField('Fuel (gallons)', max_length=FieldSizes.FUEL, blank=True)
     note = models.TextField(max_length=FieldSizes.LG, blank=True)
     status = models.IntegerField(choices=STATUS_LEVELS, default=STATUS_NORMAL)
@@ -976,6 +995,12 @@ class TemplateTrip(models.Model):
         (STATUS_NORMAL, '---------'),
         (STATUS_CANCELED, 'Canceled'),
     ]
+
+    MINUTES_FIELDS = (
+        ('pick_up_time', 'pick_up_minutes'),
+        ('appointment_time', 'appointment_minutes'),
+    )
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     parent = models.ForeignKey('Template', on_delete=models.CASCADE)
     sort_index = models.IntegerField(default=0, editable=False)
@@ -992,6 +1017,9 @@ class TemplateTrip(models.Model):
     destination = models.CharField(max_length=FieldSizes.MD, blank=True)
     pick_up_time = models.CharField(max_length=FieldSizes.TIME, blank=True)
     appointment_time = models.CharField(max_length=FieldSizes.TIME, blank=True)
+    # the times as minutes since midnight, set when the trip is saved (see MINUTES_FIELDS)
+    pick_up_minutes = models.IntegerField(null=True, blank=True, editable=False)
+    appointment_minutes = models.IntegerField(null=True, blank=True, editable=False)
     trip_type = models.ForeignKey('TripType', on_delete=models.SET_NULL, null=True, blank=True)
     tags = models.CharField(max_length=FieldSizes.XL, blank=True)
     elderly = models.BooleanField(verbose_name='Elderly?', null=True, blank=True)
@@ -1404,3 +1432,258 @@ class SiteSettings(SingletonModel):
 class TripDeltaTimeAverage(models.Model):
     id = models.UUIDField(primary_key=True, editable=False)
     avg_time = models.IntegerField(default=0, editable=False)
+
+class ReportRollup(models.Model):
+    # bump this when the stored report data changes, so that old rollups are rebuilt
+    VERSION = 2
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    date = models.DateField(unique=True)
+    version = models.IntegerField(default=0, editable=False)
+    # the ReportDataVersion of the date (including the one for every date) that the rollup was built from
+    # a rollup is only used while this still matches, so one built from data that changed while it was being saved is never used
+    data_version = models.IntegerField(default=0, editable=False)
+    has_data = models.BooleanField(default=False)
+    collected_cash = models.IntegerField(default=0)
+    collected_check = models.IntegerField(default=0)
+    paid_cash = models.IntegerField(default=0)
+    paid_check = models.IntegerField(default=0)
+    total_payments = models.IntegerField(default=0)
+    total_fares = models.IntegerField(default=0)
+    details = models.JSONField(default=dict)
+
+    class Meta:
+        ordering = ['date']
+
+    def __str__(self):
+        return '[' + str(self.date) + '] Report Rollup'
+
+    def get_class_name(self):
+        return 'Report Rollup'
+
+    @classmethod
+    def invalidate(cls, dates=None):
+        rollups = cls.objects.all()
+        if dates != None:
+            rollups = rollups.filter(date__in=dates)
+        rollups.delete()
+
+class ReportRollupSummary(models.Model):
+    TYPE_VEHICLE = 0
+    TYPE_DRIVER = 1
+
+    ROLLUP_TYPES = [
+        (TYPE_VEHICLE, 'Vehicle'),
+        (TYPE_DRIVER, 'Driver'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    parent = models.ForeignKey('ReportRollup', on_delete=models.CASCADE)
+    rollup_type = models.IntegerField(choices=ROLLUP_TYPES, default=TYPE_VEHICLE)
+    vehicle = models.ForeignKey('Vehicle', on_delete=models.CASCADE, null=True, blank=True)
+    driver = models.ForeignKey('Driver', on_delete=models.CASCADE, null=True, blank=True)
+    summary_type = models.IntegerField(default=0)
+    service_miles = models.FloatField(default=0)
+    service_hours = models.FloatField(default=0)
+    deadhead_miles = models.FloatField(default=0)
+    deadhead_hours = models.FloatField(default=0)
+    total_miles = models.FloatField(default=0)
+    total_hours = models.FloatField(default=0)
+    pmt = models.FloatField(default=0)
+    fuel = models.FloatField(default=0)
+    collected_cash = models.IntegerField(default=0)
+    collected_check = models.IntegerField(default=0)
+    total_collected_money = models.IntegerField(default=0)
+    days_of_low_rider_count = models.IntegerField(default=0)
+    trip_counts = models.JSONField(default=dict)
+    unique_riders = models.JSONField(default=list)
+
+    def __str__(self):
+        if self.rollup_type == ReportRollupSummary.TYPE_DRIVER:
+            return str(self.parent) + ' - ' + str(self.driver)
+        else:
+            return str(self.parent) + ' - ' + str(self.vehicle)
+
+class ReportDataVersion(models.Model):
+    # a counter for each date that is bumped whenever the report data for that date changes
+    # the row dated ALL_DATES is bumped for changes that affect every date, and like the other rows it is created by the first bump
+    ALL_DATES = datetime.date(1, 1, 1)
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    date = models.DateField(unique=True)
+    version = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['date']
+
+    def __str__(self):
+        if self.date == ReportDataVersion.ALL_DATES:
+            return '[All Dates] Report Data Version ' + str(self.version)
+        return '[' + str(self.date) + '] Report Data Version ' + str(self.version)
+
+    def get_class_name(self):
+        return 'Report Data Version'
+
+    @classmethod
+    def bump(cls, dates=None):
+        if dates == None:
+            dates = [cls.ALL_DATES]
+        dates = list(set(dates))
+
+        # a date's row is created by the first bump, and the unique date means that two bumps at once can't both create it
+        for i in range(0, len(dates), 500):
+            batch = dates[i:i+500]
+            cls.objects.bulk_create([cls(date=date) for date in batch], ignore_conflicts=True)
+            cls.objects.filter(date__in=batch).update(version=models.F('version') + 1)
+
+    @classmethod
+    def getVersion(cls, date_start, date_end):
+        # the counters only ever go up, so their sum changes whenever one of them is bumped
+        data_versions = cls.objects.filter(models.Q(date__gte=date_start, date__lte=date_end) | models.Q(date=cls.ALL_DATES))
+        return data_versions.aggregate(models.Sum('version'))['version__sum'] or 0
+
+    @classmethod
+    def getVersions(cls, date_start, date_end):
+        # the counters that getVersion() adds up, by date, with the counter for every date under None
+        # dates without a counter have never changed, so they are left out
+        data_versions = cls.objects.filter(models.Q(date__gte=date_start, date__lte=date_end) | models.Q(date=cls.ALL_DATES))
+        return {(None if date == cls.ALL_DATES else date): version for date, version in data_versions.values_list('date', 'version')}
+
+    @classmethod
+    def getDateVersion(cls, data_versions, date):
+        # the version of one date from the result of getVersions(), the same as getVersion(date, date)
+        return data_versions.get(date, 0) + data_versions.get(None, 0)
+
+class LogProblem(models.Model):
+    # an error that the report finds in the logged trips and shifts of a date, see Report.saveLogProblems()
+    # the problems of a date are found again after its trips or shifts change, see Report.updateLogProblems(), so only the open problems are kept
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    date = models.DateField()
+    sort_index = models.IntegerField(default=0)
+    error_code = models.IntegerField(default=0)
+    shift = models.ForeignKey('Shift', on_delete=models.CASCADE, null=True, blank=True)
+    trip = models.ForeignKey('Trip', on_delete=models.CASCADE, null=True, blank=True)
+    message = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['-date', 'sort_index']
+        indexes = [
+            models.Index(fields=['-date', 'sort_index']),
+        ]
+
+    def __str__(self):
+        return '[' + str(self.date) + '] ' + self.message
+
+    def get_class_name(self):
+        return 'Log Problem'
+
+    # the count is shown in the menu of every page, so it is cached rather than counted on every request
+    # the process that changes the problems clears it, and other processes see the new count once it times out
+    COUNT_CACHE_KEY = 'transit_log_problem_count'
+    COUNT_CACHE_TIMEOUT = 60
+
+    @classmethod
+    def getCount(cls):
+        return cache.get_or_set(cls.COUNT_CACHE_KEY, cls.objects.count, cls.COUNT_CACHE_TIMEOUT)
+
+    @classmethod
+    def clearCount(cls):
+        cache.delete(cls.COUNT_CACHE_KEY)
+
+class LogProblemDay(models.Model):
+    # the ReportDataVersion of a date when its LogProblems were last found
+    # dates whose version has moved on since then have changed, and their problems are found again by Report.updateLogProblems()
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    date = models.DateField(unique=True)
+    data_version = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['date']
+
+    def __str__(self):
+        return '[' + str(self.date) + '] Log Problems Checked at Version ' + str(self.data_version)
+
+    def get_class_name(self):
+        return 'Log Problem Day'
+
+    @classmethod
+    def getChangedDates(cls):
+        checked_versions = cls.objects.filter(date=models.OuterRef('date')).values('data_version')
+        data_versions = ReportDataVersion.objects.exclude(date=ReportDataVersion.ALL_DATES).annotate(checked_version=models.Subquery(checked_versions))
+        data_versions = data_versions.filter(models.Q(checked_version=None) | ~models.Q(checked_version=models.F('version')))
+        return list(data_versions.order_by('date').values_list('date', flat=True))
+
+class ReportJob(models.Model):
+    # a report that is loaded in the background by the report_jobs management command, for ranges too large to load during a request
+    STATUS_QUEUED = 0
+    STATUS_RUNNING = 1
+    STATUS_DONE = 2
+    STATUS_FAILED = 3
+
+    STATUS_LEVELS = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, editable=False)
+    created = models.DateTimeField(auto_now_add=True)
+    started = models.DateTimeField(null=True, blank=True)
+    finished = models.DateTimeField(null=True, blank=True)
+    date_start = models.DateField()
+    date_end = models.DateField()
+    driver_id = models.UUIDField(null=True, blank=True)
+    client_names = models.JSONField(default=list)
+    clients_filtered = models.BooleanField(default=False)
+    show_daily_data = models.BooleanField(default=False)
+    query_string = models.TextField(blank=True)
+    status = models.IntegerField(choices=STATUS_LEVELS, default=STATUS_QUEUED)
+    days_done = models.IntegerField(default=0)
+    days_total = models.IntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['-created']
+
+    def __str__(self):
+        return '[' + str(self.date_start) + ' - ' + str(self.date_end) + '] Report Job (' + self.get_status_display() + ')'
+
+    def get_class_name(self):
+        return 'Report Job'
+
+    def getProgress(self):
+        if self.status == ReportJob.STATUS_DONE:
+            return 100
+        if self.days_total <= 0:
+            return 0
+        return int(self.days_done * 100 / self.days_total)
+
+    def getFilePath(self, extension):
+        return os.path.join(settings.REPORT_JOB_DIR, str(self.id) + '.' + extension)
+
+    def deleteFiles(self):
+        for extension in ('html', 'xlsx'):
+            try:
+                os.remove(self.getFilePath(extension))
+            except FileNotFoundError:
+                pass
+
+    @classmethod
+    def claimNext(cls):
+        # marks the oldest queued job as running and returns it, or returns None if there are no queued jobs
+        # the status is checked in the update, so two runners can't claim the same job
+        for job in cls.objects.filter(status=cls.STATUS_QUEUED).order_by('created'):
+            if cls.objects.filter(id=job.id, status=cls.STATUS_QUEUED).update(status=cls.STATUS_RUNNING, started=timezone.now()) == 1:
+                job.refresh_from_db()
+                return job
+        return None
+
+    @classmethod
+    def purge(cls, days):
+        # removes finished jobs (and their files) that are older than the given number of days
+        old_jobs = cls.objects.filter(status__in=[cls.STATUS_DONE, cls.STATUS_FAILED], created__lt=timezone.now() - datetime.timedelta(days=days))
+        for job in old_jobs:
+            job.deleteFiles()
+        old_jobs.delete()
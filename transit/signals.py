@@ -0,0 +1,203 @@
+# Copyright © 2019-2023 Justin Jacobs
+#
+# This file is part of the Transit Log System.
+#
+# The Transit Log System is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+#
+# The Transit Log System is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# The Transit Log System.  If not, see http://www.gnu.org/licenses/
+
+from django.db.models import Q
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from transit.models import Trip, Shift, TemplateTrip, ClientPayment, Driver, Vehicle, TripType, Tag, Client, Destination, SiteSettings, ReportRollup, ReportDataVersion
+from transit.common.util.parse import set_log_minutes
+from transit.common.util.odometer import set_shift_odometers, set_trip_odometers, resolve_trip_odometers
+
+# the date field for models that are rolled up by date
+ROLLUP_DATE_FIELDS = {
+    Trip: 'date',
+    Shift: 'date',
+    ClientPayment: 'date_paid',
+}
+
+# fields that change how every day is rolled up
+ROLLUP_CONFIG_FIELDS = {
+    Driver: ['is_logged'],
+    Vehicle: ['is_logged'],
+    TripType: ['is_trip_counted'],
+    SiteSettings: ['trip_cancel_late_threshold'],
+}
+
+# fields that reports show or use on every date, so changing them bumps the data version of every date
+REPORT_GLOBAL_FIELDS = {
+    Driver: ['sort_index', 'name', 'color', 'is_logged'],
+    Vehicle: ['sort_index', 'name', 'description', 'is_logged'],
+    TripType: ['sort_index', 'name', 'is_trip_counted'],
+    Tag: ['sort_index', 'name'],
+    SiteSettings: ['trip_cancel_late_threshold'],
+}
+
+# fields that reports match trips and payments to, so changing them only bumps the data version of the dates with those trips and payments
+REPORT_MATCHED_FIELDS = {
+    Client: ['name', 'elderly', 'ambulatory', 'staff'],
+    Destination: ['address'],
+}
+
+def getPreviousValues(sender, instance, fields):
+    if instance._state.adding:
+        return None
+    return sender.objects.filter(pk=instance.pk).values(*fields).first()
+
+def hasChangedValues(instance, previous_values, fields):
+    # new instances have no previous values, and count as changed
+    if previous_values == None:
+        return True
+    for field in fields:
+        if previous_values[field] != getattr(instance, field):
+            return True
+    return False
+
+def getMatchedDates(sender, instance, previous_values=None):
+    # the dates of the trips that are matched to a Client by name or to a Destination by address, and of the Client's payments
+    if sender == Client:
+        names = [instance.name]
+        if previous_values:
+            names.append(previous_values['name'])
+        trips = Trip.objects.filter(name__in=names)
+        payments = ClientPayment.objects.filter(parent_id=instance.id)
+    else:
+        addresses = [instance.address]
+        if previous_values:
+            addresses.append(previous_values['address'])
+        trips = Trip.objects.filter(Q(address__in=addresses) | Q(destination__in=addresses))
+        payments = ClientPayment.objects.none()
+
+    dates = set(trips.order_by().values_list('date', flat=True).distinct())
+    dates.update(payments.order_by().values_list('date_paid', flat=True).distinct())
+    return dates
+
+@receiver(pre_save)
+def reportRollupPreSave(sender, instance, **kwargs):
+    if sender in ROLLUP_DATE_FIELDS:
+        instance.rollup_previous_values = getPreviousValues(sender, instance, [ROLLUP_DATE_FIELDS[sender]])
+    elif sender in ROLLUP_CONFIG_FIELDS:
+        instance.rollup_previous_values = getPreviousValues(sender, instance, ROLLUP_CONFIG_FIELDS[sender])
+
+    if sender in REPORT_GLOBAL_FIELDS:
+        instance.report_previous_values = getPreviousValues(sender, instance, REPORT_GLOBAL_FIELDS[sender])
+    elif sender in REPORT_MATCHED_FIELDS:
+        instance.report_previous_values = getPreviousValues(sender, instance, REPORT_MATCHED_FIELDS[sender])
+
+@receiver(post_save)
+def reportRollupPostSave(sender, instance, **kwargs):
+    previous_values = getattr(instance, 'rollup_previous_values', None)
+
+    if sender in ROLLUP_DATE_FIELDS:
+        date_field = ROLLUP_DATE_FIELDS[sender]
+        dates = [getattr(instance, date_field)]
+        if previous_values and previous_values[date_field] != dates[0]:
+            dates.append(previous_values[date_field])
+        ReportRollup.invalidate(dates)
+        ReportDataVersion.bump(dates)
+    elif sender in ROLLUP_CONFIG_FIELDS and previous_values:
+        for field in ROLLUP_CONFIG_FIELDS[sender]:
+            if previous_values[field] != getattr(instance, field):
+                ReportRollup.invalidate()
+                break
+
+    # saves that don't change anything reports use (like a Client's phone number) leave the cached reports alone
+    report_previous_values = getattr(instance, 'report_previous_values', None)
+    if sender in REPORT_GLOBAL_FIELDS:
+        if hasChangedValues(instance, report_previous_values, REPORT_GLOBAL_FIELDS[sender]):
+            ReportDataVersion.bump()
+    elif sender in REPORT_MATCHED_FIELDS:
+        if hasChangedValues(instance, report_previous_values, REPORT_MATCHED_FIELDS[sender]):
+            ReportDataVersion.bump(getMatchedDates(sender, instance, report_previous_values))
+
+@receiver(post_delete)
+def reportRollupPostDelete(sender, instance, **kwargs):
+    if sender in ROLLUP_DATE_FIELDS:
+        ReportRollup.invalidate([getattr(instance, ROLLUP_DATE_FIELDS[sender])])
+        ReportDataVersion.bump([getattr(instance, ROLLUP_DATE_FIELDS[sender])])
+    elif sender in ROLLUP_CONFIG_FIELDS:
+        ReportRollup.invalidate()
+
+    if sender in REPORT_GLOBAL_FIELDS:
+        ReportDataVersion.bump()
+    elif sender in REPORT_MATCHED_FIELDS:
+        ReportDataVersion.bump(getMatchedDates(sender, instance))
+
+def getOdometerShifts(dates):
+    # the shifts that trip odometer readings are completed from
+    return Shift.objects.filter(date__in=dates, status=Shift.STATUS_NORMAL, start_odometer__isnull=False).order_by('date', 'sort_index')
+
+def resolveDayOdometers(dates):
+    # trips are completed from the shifts of their day, so they are updated whenever one of those shifts changes
+    trips = Trip.objects.filter(date__in=dates).exclude(start_miles='', end_miles='').only('id', 'date', 'driver_id', 'vehicle_id', 'start_miles', 'end_miles', 'start_odometer', 'end_odometer')
+    Trip.objects.bulk_update(resolve_trip_odometers(trips, getOdometerShifts(dates)), ['start_odometer', 'end_odometer'])
+
+@receiver(pre_save, sender=Shift)
+def odometerShiftPreSave(sender, instance, **kwargs):
+    set_shift_odometers(instance)
+
+@receiver(pre_save, sender=Trip)
+def odometerTripPreSave(sender, instance, **kwargs):
+    shifts = []
+    if instance.vehicle_id != None and (instance.start_miles != '' or instance.end_miles != ''):
+        shifts = list(getOdometerShifts([instance.date]).filter(vehicle_id=instance.vehicle_id))
+    set_trip_odometers(instance, shifts)
+
+@receiver(post_save, sender=Shift)
+def odometerShiftPostSave(sender, instance, **kwargs):
+    # the previous date is loaded by reportRollupPreSave()
+    dates = [instance.date]
+    previous_values = getattr(instance, 'rollup_previous_values', None)
+    if previous_values and previous_values['date'] != instance.date:
+        dates.append(previous_values['date'])
+    resolveDayOdometers(dates)
+
+@receiver(post_delete, sender=Shift)
+def odometerShiftPostDelete(sender, instance, **kwargs):
+    resolveDayOdometers([instance.date])
+
+@receiver(pre_save, sender=Trip)
+@receiver(pre_save, sender=Shift)
+@receiver(pre_save, sender=TemplateTrip)
+def logMinutesPreSave(sender, instance, **kwargs):
+    set_log_minutes(instance, sender.MINUTES_FIELDS)
+
+def getLogDates(sender, instance):
+    # the dates that a driver or vehicle has trips or shifts on
+    field = 'driver' if sender == Driver else 'vehicle'
+    dates = set(Trip.objects.filter(**{field: instance}).values_list('date', flat=True))
+    dates.update(Shift.objects.filter(**{field: instance}).values_list('date', flat=True))
+    return dates
+
+# trips and shifts bump the data versions of their dates when they are saved, which is what marks those dates for Report.updateLogProblems()
+# only the logs of logged drivers and vehicles are checked, so their dates are bumped as well when that changes
+
+@receiver(post_save, sender=Driver)
+@receiver(post_save, sender=Vehicle)
+def logProblemsConfigPostSave(sender, instance, **kwargs):
+    previous_values = getattr(instance, 'rollup_previous_values', None)
+    if previous_values and previous_values['is_logged'] != instance.is_logged:
+        ReportDataVersion.bump(getLogDates(sender, instance))
+
+@receiver(pre_delete, sender=Driver)
+@receiver(pre_delete, sender=Vehicle)
+def logProblemsConfigPreDelete(sender, instance, **kwargs):
+    # the trips and shifts lose their driver or vehicle once it is deleted, so their dates are found first
+    instance.log_problem_dates = getLogDates(sender, instance)
+
+@receiver(post_delete, sender=Driver)
+@receiver(post_delete, sender=Vehicle)
+def logProblemsConfigPostDelete(sender, instance, **kwargs):
+    ReportDataVersion.bump(getattr(instance, 'log_problem_dates', []))
@@ -1,3 +1,177 @@
-from django.test import TestCase
+# Copyright © 2019-2023 Justin Jacobs
+#
+# This file is part of the Transit Log System.
+#
+# The Transit Log System is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+#
+# The Transit Log System is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# The Transit Log System.  If not, see http://www.gnu.org/licenses/
 
-# Create your tests here.
+import datetime
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+from transit.models import Driver, Trip, SiteSettings, ReportRollup, LogProblem, LogProblemDay
+from transit.views.report import Report
+from transit.common.util.parse import parse_log_time, parse_log_minutes
+from transit.common.util.synthetic import create_synthetic_data
+
+class ParseTestCase(SimpleTestCase):
+    def test_log_time_matches_strptime(self):
+        strings = ['12:00 AM', '12:00 PM', '1:05 pm', '01:05 PM', '9:5 AM', '11:59 pm', '10:30  AM', '10:30\tam', '10:30AM', '13:00 PM', '0:30 AM', '10:60 AM', ' 10:30 AM', '10:30 AM ', '', 'noon']
+        for i in strings:
+            with self.subTest(string=i):
+                try:
+                    expected = datetime.datetime.strptime(i, '%I:%M %p')
+                except ValueError:
+                    self.assertRaises(ValueError, parse_log_time, i)
+                    self.assertEqual(parse_log_minutes(i), None)
+                    continue
+                self.assertEqual(parse_log_time(i), expected)
+                self.assertEqual(parse_log_minutes(i), expected.hour * 60 + expected.minute)
+
+class ReportTestMixin():
+    # a few months of synthetic data, starting partway through a month so that the ranges have partial months at both ends
+    date_start = datetime.date(2023, 1, 16)
+    date_end = datetime.date(2023, 3, 20)
+
+    @classmethod
+    def createData(cls):
+        # creating the settings bumps the report data version, which would stop the first report from saving its rollups
+        SiteSettings.load()
+        create_synthetic_data(cls.date_start, (cls.date_end - cls.date_start).days + 1, driver_count=4, vehicle_count=3, client_count=40, destination_count=20, trips_per_day=15)
+
+    def getRanges(self):
+        # each month is also loaded on its own, since the odometer readings depend on where the range starts and ends
+        return [(self.date_start, self.date_end)] + Report.getMonthRanges(self.date_start, self.date_end)
+
+    def getFilters(self):
+        filters = [{}, {'filter_by_money': True}]
+        for i in Driver.objects.all():
+            filters.append({'driver_id': i.id})
+        return filters
+
+    def loadReport(self, date_start, date_end, **kwargs):
+        report = Report()
+        report.load(date_start, date_end, **kwargs)
+        return report
+
+# the reports are loaded in the test process, so that they don't fork worker processes
+@override_settings(REPORT_PARALLEL_WORKERS=0)
+class ReportTestCase(ReportTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.createData()
+
+class ReportMileageTestCase(ReportTestCase):
+    def test_mileage_matches_full_report(self):
+        for date_start, date_end in self.getRanges():
+            with self.subTest(date_start=date_start, date_end=date_end):
+                report_mileage = Report()
+                report_mileage.loadMileage(date_start, date_end)
+                self.assertEqual(self.loadReport(date_start, date_end).getMileageDifferences(report_mileage), [])
+
+class ReportStreamTestCase(ReportTestCase):
+    def test_stream_matches_full_report(self):
+        filters = self.getFilters() + [{'client_names': ['Synthetic Client 0001', 'Synthetic Client 0002', 'Synthetic Client 0010']}]
+        for kwargs in filters:
+            with self.subTest(filter=kwargs):
+                report = self.loadReport(self.date_start, self.date_end, **kwargs)
+                report_stream = self.loadReport(self.date_start, self.date_end, stream=True, **kwargs)
+                self.assertEqual(report.getDifferences(report_stream), [])
+
+class ReportRollupsTestCase(ReportTestCase):
+    def assertRollupsMatch(self):
+        for date_start, date_end in self.getRanges():
+            for kwargs in [{}] + [{'driver_id': i.id} for i in Driver.objects.all()]:
+                with self.subTest(date_start=date_start, date_end=date_end, filter=kwargs):
+                    report_rollups = Report()
+                    report_rollups.loadFromRollups(date_start, date_end, **kwargs)
+                    self.assertEqual(self.loadReport(date_start, date_end, **kwargs).getDifferences(report_rollups), [])
+
+    def test_rollups_match_full_report(self):
+        Report.buildRollups(self.date_start, self.date_end)
+        self.assertEqual(ReportRollup.objects.count(), (self.date_end - self.date_start).days + 1)
+        self.assertRollupsMatch()
+
+    def test_rollups_match_after_edit(self):
+        # the rollups of the edited days are out of date, so those days are loaded from the logged data
+        Report.buildRollups(self.date_start, self.date_end)
+        trip = Trip.objects.filter(status=Trip.STATUS_NORMAL, driver__isnull=False).order_by('date').first()
+        trip.status = Trip.STATUS_NO_SHOW
+        trip.fare += 500
+        trip.collected_cash += 500
+        trip.save()
+        self.assertRollupsMatch()
+
+class LogProblemsTestCase(ReportTestCase):
+    def getProblems(self, date):
+        return [(i.error_code, i.message) for i in LogProblem.objects.filter(date=date).order_by('sort_index')]
+
+    def getErrors(self, date):
+        return [(i['error_code'], i['error_msg']) for i in self.loadReport(date, date).report_errors.errors]
+
+    def test_changed_dates_are_updated(self):
+        trip = Trip.objects.exclude(end_miles='').order_by('date').first()
+        Report.saveLogProblems([trip.date])
+
+        # saving a trip only marks its date as changed, the problems are found again by updateLogProblems()
+        problems = self.getProblems(trip.date)
+        self.assertEqual(problems, self.getErrors(trip.date))
+        trip.end_miles = ''
+        trip.save()
+        self.assertEqual(LogProblemDay.getChangedDates(), [trip.date])
+        self.assertEqual(self.getProblems(trip.date), problems)
+
+        self.assertEqual(Report.updateLogProblems(), 1)
+        self.assertEqual(LogProblemDay.getChangedDates(), [])
+        self.assertEqual(self.getProblems(trip.date), self.getErrors(trip.date))
+        self.assertNotEqual(self.getProblems(trip.date), problems)
+
+# the data is committed rather than kept in a test transaction, so that the connections of the other threads can read it
+@override_settings(REPORT_PARALLEL_WORKERS=0)
+class ReportThreadsTestCase(ReportTestMixin, TransactionTestCase):
+    def setUp(self):
+        self.createData()
+
+    def test_threads_match_serial_reports(self):
+        filters = self.getFilters()
+        expected = [self.loadReport(self.date_start, self.date_end, **i) for i in filters]
+
+        def Load(kwargs):
+            try:
+                return self.loadReport(self.date_start, self.date_end, **kwargs)
+            finally:
+                # each thread has its own database connection
+                connections.close_all()
+
+        # every report is loaded twice, so that reports with different filters overlap
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            jobs = [(i, executor.submit(Load, filters[i])) for j in range(0, 2) for i in range(0, len(filters))]
+            for i, job in jobs:
+                with self.subTest(filter=filters[i]):
+                    self.assertEqual(expected[i].getDifferences(job.result()), [])
+
+    @override_settings(REPORT_PARALLEL_WORKERS=4)
+    def test_parallel_only_in_a_single_thread(self):
+        self.assertTrue(Report.canLoadParallel(3))
+
+        # forked workers would copy the database connections that the other thread has open
+        stop = threading.Event()
+        thread = threading.Thread(target=stop.wait)
+        thread.start()
+        try:
+            self.assertFalse(Report.canLoadParallel(3))
+        finally:
+            stop.set()
+            thread.join()
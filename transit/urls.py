@@ -96,6 +96,11 @@ urlpatterns = [
     path('clients/<uuid:parent>/report/by-driver/<uuid:driver_id>/<int:year>/<int:month>/', views.clientReportByDriverMonth, name='client-report-by-driver-month'),
     path('clients/<uuid:parent>/report/by-driver/<uuid:driver_id>/this-month/', views.clientReportByDriverThisMonth, name='client-report-by-driver-this-month'),
 
+    path('clients/statements/<int:year>/<int:month>/', views.clientStatements, name='client-statements'),
+    path('clients/statements/this-month/', views.clientStatementsThisMonth, name='client-statements-this-month'),
+    path('clients/statements/<int:year>/<int:month>/print/', views.clientStatementsPrint, name='client-statements-print'),
+    path('clients/statements/<int:year>/<int:month>/xlsx/', views.clientStatementsXLSX, name='client-statements-xlsx'),
+
     path('destinations/', views.destinationList, name='destinations'),
     path('destinations/create', views.destinationCreate, name='destination-create'),
     path('destinations/<uuid:id>/edit', views.destinationEdit, name='destination-edit'),
@@ -165,6 +170,13 @@ urlpatterns = [
     path('report/xlsx/<int:start_year>/<int:start_month>/<int:start_day>/to/<int:end_year>/<int:end_month>/<int:end_day>', views.reportXLSX, name='report-xlsx'),
     path('report/print/<int:start_year>/<int:start_month>/<int:start_day>/to/<int:end_year>/<int:end_month>/<int:end_day>', views.reportPrint, name='report-print'),
     path('report/print-mileage-summary/<int:start_year>/<int:start_month>/<int:start_day>/to/<int:end_year>/<int:end_month>/<int:end_day>', views.reportPrintMileageSummary, name='report-print-mileage-summary'),
+    path('report/json/<int:start_year>/<int:start_month>/<int:start_day>/to/<int:end_year>/<int:end_month>/<int:end_day>', views.reportJSON, name='report-json'),
+    path('report/json/<int:year>/<int:month>', views.reportJSONMonth, name='report-json-month'),
+    path('report/job/<int:start_year>/<int:start_month>/<int:start_day>/to/<int:end_year>/<int:end_month>/<int:end_day>', views.reportJobCreate, name='report-job-create'),
+    path('report/job/<uuid:id>', views.reportJobView, name='report-job'),
+    path('report/job/<uuid:id>/status', views.reportJobStatus, name='report-job-status'),
+    path('report/job/<uuid:id>/<str:file_type>', views.reportJobDownload, name='report-job-download'),
+    path('report/log-problems', views.logProblems, name='report-log-problems'),
 
     path('report/<int:start_year>/<int:start_month>/<int:start_day>/to/<int:end_year>/<int:end_month>/<int:end_day>/edit-trip/<uuid:id>', views.tripEditFromReport, name='report-trip-edit'),
     path('report/<int:start_year>/<int:start_month>/<int:start_day>/to/<int:end_year>/<int:end_month>/<int:end_day>/edit-shift/<uuid:id>', views.shiftEditFromReport, name='report-shift-edit'),
@@ -22,6 +22,8 @@ from .driver import *
 from .vehicle import *
 from .triptype import *
 from .report import *
+from .report_job import *
+from .log_problem import *
 from .excel_import import *
 from .vehicle_status import *
 from .vehicle_issue import *
@@ -34,6 +36,7 @@ from .destination import *
 from .user_account import *
 from .client_payment import *
 from .client_report import *
+from .client_statement import *
 from .fare import *
 from .tag import *
 from .activity_color import *
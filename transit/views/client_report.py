@@ -5,9 +5,6 @@ from django.shortcuts import render, get_object_or_404
 from django.http import HttpResponseRedirect
 from django.urls import reverse
 
-from django.db.models import Q
-from django.db.models import F
-
 from transit.models import Client, Trip, ClientPayment, Driver, SiteSettings
 from transit.forms import DatePickerForm, DateRangePickerForm
 from transit.views.report import Report
@@ -16,6 +13,59 @@ from django.contrib.auth.decorators import permission_required
 
 from transit.common.util import *
 
+def clientReportLists(client, trips, payments, site_settings, include_blank_logs=False):
+    # sorts a client's trips in to each of the lists on the client report, along with the fare and payment totals
+    # trips and payments are only iterated once, so they can be querysets or lists that were already fetched
+    rider = Report.UniqueRiderSummary.Rider(client.name)
+    trips_normal = []
+    trips_canceled = []
+    trips_no_show = []
+    trips_canceled_late = []
+    trips_canceled_very_late = []
+    trips_money = []
+    for trip in trips:
+        if trip.status == Trip.STATUS_NORMAL:
+            log_fields = (trip.start_miles, trip.end_miles, trip.start_time, trip.end_time)
+            filled_log = '' not in log_fields
+            blank_log = log_fields == ('', '', '', '')
+            if not (filled_log or (include_blank_logs and blank_log)):
+                continue
+
+            trips_normal.append(trip)
+            if trip.fare > 0 or trip.collected_cash > 0 or trip.collected_check > 0:
+                trips_money.append(trip)
+                rider.total_fares.value += trip.fare
+                rider.collected_cash.value += trip.collected_cash
+                rider.collected_check.value += trip.collected_check
+        elif trip.status == Trip.STATUS_CANCELED:
+            trips_canceled.append(trip)
+            trip.cancel_severity = trip.check_cancel_date(site_settings)
+            if trip.cancel_severity >= 2:
+                trips_canceled_late.append(trip)
+            if trip.cancel_severity == 3:
+                trips_canceled_very_late.append(trip)
+        elif trip.status == Trip.STATUS_NO_SHOW:
+            trips_no_show.append(trip)
+
+    payments = list(payments)
+    for payment in payments:
+        rider.paid_cash.value += payment.money_cash
+        rider.paid_check.value += payment.money_check
+
+    rider.calculateTotalOwed()
+
+    return {
+        'trips_normal': trips_normal,
+        'trips_canceled': trips_canceled,
+        'trips_no_show': trips_no_show,
+        'trips_canceled_late': trips_canceled_late,
+        'trips_canceled_very_late': trips_canceled_very_late,
+        'trips_money': trips_money,
+        'payments': payments,
+        'total_fares_and_payments': len(trips_money) + len(payments),
+        'rider': rider,
+    }
+
 @permission_required(['transit.view_trip'])
 def clientReportBase(request, parent, driver_id, start_year, start_month, start_day, end_year, end_month, end_day):
     date_start = datetime.date(start_year, start_month, start_day)
@@ -80,42 +130,16 @@ def clientReportBase(request, parent, driver_id, start_year, start_month, start_
 
     client = Client.objects.get(id=parent)
 
+    site_settings = SiteSettings.load()
+
     all_trips = Trip.objects.filter(date__gte=date_start, date__lt=date_end_plus_one, name=client.name, format=Trip.FORMAT_NORMAL)
     if selected_driver:
         all_trips = all_trips.filter(driver=selected_driver)
 
-    blank_log = Q(start_miles='') & Q(end_miles='') & Q(start_time='') & Q(end_time='')
-    filled_log = ~Q(start_miles='') & ~Q(end_miles='') & ~Q(start_time='') & ~Q(end_time='')
-
-    trips_normal = all_trips.filter(status=Trip.STATUS_NORMAL)
-    if not selected_driver:
-        trips_normal = trips_normal.filter(filled_log)
-    else:
-        trips_normal = trips_normal.filter(blank_log | filled_log)
-    trips_canceled = all_trips.filter(status=Trip.STATUS_CANCELED)
-    trips_no_show = all_trips.filter(status=Trip.STATUS_NO_SHOW)
-    trips_canceled_late = []
-    trips_canceled_very_late = []
-    for canceled_trip in trips_canceled:
-        cancel_severity = canceled_trip.check_cancel_date()
-        if cancel_severity >= 2:
-            trips_canceled_late.append(canceled_trip)
-        if cancel_severity == 3:
-            trips_canceled_very_late.append(canceled_trip)
-    trips_money = trips_normal.filter(Q(fare__gt=0) | Q(collected_cash__gt=0) | Q(collected_check__gt=0))
-
     payments = ClientPayment.objects.filter(parent=client.id, date_paid__gte=date_start, date_paid__lt=date_end_plus_one)
 
-    total_fares_and_payments = trips_money.count() + payments.count()
+    client_lists = clientReportLists(client, all_trips, payments, site_settings, include_blank_logs=(selected_driver != None))
 
-    # run report to get all fares/payments
-    report = Report()
-    if selected_driver:
-        report.load(date_start, date_end, client_names=[client.name], filter_by_money=True, driver_id=selected_driver.id)
-    else:
-        report.load(date_start, date_end, client_names=[client.name], filter_by_money=True)
-
-    site_settings = SiteSettings.load()
     late_threshold = site_settings.trip_cancel_late_threshold
     late_threshold_date = datetime.datetime.combine(datetime.datetime.now(), datetime.datetime.min.time()) - datetime.timedelta(seconds=late_threshold)
 
@@ -128,21 +152,13 @@ def clientReportBase(request, parent, driver_id, start_year, start_month, start_
         'url_month_next': url_month_next,
         'url_this_month': url_this_month,
         'client': client,
-        'trips_normal': trips_normal,
-        'trips_canceled': trips_canceled,
-        'trips_no_show': trips_no_show,
-        'trips_canceled_late': trips_canceled_late,
-        'trips_canceled_very_late': trips_canceled_very_late,
-        'trips_money': trips_money,
-        'payments': payments,
-        'total_fares_and_payments': total_fares_and_payments,
-        'report': report,
         'selected_driver': selected_driver,
         'drivers': Driver.objects.filter(is_active=True),
         'show_fares': show_fares,
         'late_threshold': late_threshold,
         'late_threshold_date': late_threshold_date,
     }
+    context.update(client_lists)
     return render(request, 'client/report/view.html', context=context)
 
 def clientReportMonthBase(request, parent, driver_id, year, month):
@@ -0,0 +1,268 @@
+# Copyright © 2019-2023 Justin Jacobs
+#
+# This file is part of the Transit Log System.
+#
+# The Transit Log System is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+#
+# The Transit Log System is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# The Transit Log System.  If not, see http://www.gnu.org/licenses/
+
+import datetime
+import tempfile
+import multiprocessing
+import threading
+
+from concurrent.futures import ProcessPoolExecutor
+
+from django.http import HttpResponse, HttpResponseRedirect, FileResponse
+from django.shortcuts import render
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.conf import settings
+from django.db import connections
+
+from transit.models import Client, Trip, ClientPayment, SiteSettings
+from transit.forms import DatePickerForm
+from transit.views.client_report import clientReportLists
+
+from django.contrib.auth.decorators import permission_required
+
+from openpyxl.styles import Font, Alignment, PatternFill, Border, Side, NamedStyle
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.workbook import Workbook
+from openpyxl.utils import get_column_letter
+
+def clientStatementsMonth(year, month):
+    date_start = datetime.date(year, month, 1)
+    if month == 12:
+        date_end = date_start.replace(day=31)
+    else:
+        date_end = datetime.date(year, month+1, 1) + datetime.timedelta(days=-1)
+    return (date_start, date_end)
+
+def clientStatementsLoad(date_start, date_end):
+    # the statements for every client with fares or payments in the date range
+    # the trips and payments are each loaded with a single query and split up by client, instead of running the client report for each client
+    date_end_plus_one = date_end + datetime.timedelta(days=1)
+    site_settings = SiteSettings.load()
+
+    trips_by_name = {}
+    all_trips = Trip.objects.filter(date__gte=date_start, date__lt=date_end_plus_one, format=Trip.FORMAT_NORMAL, name__in=Client.objects.values('name'))
+    for trip in all_trips:
+        trips_by_name.setdefault(trip.name, []).append(trip)
+
+    payments_by_client = {}
+    for payment in ClientPayment.objects.filter(date_paid__gte=date_start, date_paid__lt=date_end_plus_one):
+        payments_by_client.setdefault(payment.parent_id, []).append(payment)
+
+    statements = []
+    for client in Client.objects.all():
+        trips = trips_by_name.get(client.name, [])
+        payments = payments_by_client.get(client.id, [])
+        if len(trips) == 0 and len(payments) == 0:
+            continue
+
+        # same as the "Fares & Payments" section of the client report
+        statement = clientReportLists(client, trips, payments, site_settings)
+        if len(statement['trips_money']) == 0 and len(statement['payments']) == 0:
+            continue
+
+        statement['client'] = client
+        statement['date_start'] = date_start
+        statement['date_end'] = date_end
+        statements.append(statement)
+
+    return statements
+
+def clientStatementRender(statement):
+    # may run in a worker process, so it only uses the statement itself
+    return render_to_string('client/statements/statement.html', statement)
+
+def clientStatementsIsParallel(statements, workers):
+    if workers < 2 or len(statements) < 2:
+        return False
+
+    # worker processes are forked so that they can reuse the loaded Django setup
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        return False
+
+    # the database connections are closed before forking, which isn't possible in the middle of a transaction
+    for i in connections.all():
+        if i.in_atomic_block:
+            return False
+
+    # close_all() only closes this thread's connections, and the fork would copy the ones that other threads have open
+    # so threaded servers render the statements in a single process
+    if threading.active_count() > 1:
+        return False
+
+    return True
+
+def clientStatementsRenderHTML(statements, date_start, date_end, workers=0):
+    # a single printable page with each client's statement on its own page
+    if clientStatementsIsParallel(statements, workers):
+        # forked processes can't share database connections with their parent
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=min(workers, len(statements)), mp_context=multiprocessing.get_context('fork')) as executor:
+            sections = list(executor.map(clientStatementRender, statements, chunksize=16))
+    else:
+        sections = [clientStatementRender(i) for i in statements]
+
+    context = {
+        'date_start': date_start,
+        'date_end': date_end,
+        'sections': sections,
+    }
+    return render_to_string('client/statements/print.html', context)
+
+def clientStatementsWriteXLSX(statements, output):
+    # writes the statements as a single Excel workbook to a file (or file-like object)
+    wb = Workbook(write_only=True)
+
+    style_font_normal = Font(name='Arial', size=10)
+    style_border_normal_side = Side(border_style='thin', color='FF000000')
+    style_border_normal = Border(left=style_border_normal_side, right=style_border_normal_side, top=style_border_normal_side, bottom=style_border_normal_side)
+    style_colwidth_normal = 13
+
+    style_font_header = Font(name='Arial', size=9, bold=True)
+    style_alignment_header = Alignment(horizontal='center', vertical='center', wrap_text=True)
+    style_fill_header = PatternFill(fill_type='solid', fgColor='DFE0E1')
+    style_rowheight_header = 25
+
+    style_font_total = Font(name='Arial', size=10, bold=True, color='FFFFFFFF')
+    style_fill_total = PatternFill(fill_type='solid', fgColor='27A343')
+
+    wb.add_named_style(NamedStyle(name='statement_header', font=style_font_header, border=style_border_normal, fill=style_fill_header, alignment=style_alignment_header))
+    for name, font, fill in (('statement_normal', style_font_normal, None), ('statement_total', style_font_total, style_fill_total)):
+        for style_name, number_format in ((name, 'General'), (name + '_date', 'mmm dd, yyyy'), (name + '_money', '$0.00')):
+            named_style = NamedStyle(name=style_name, font=font, border=style_border_normal, number_format=number_format)
+            if fill != None:
+                named_style.fill = fill
+            wb.add_named_style(named_style)
+
+    def Cell(ws, value, style):
+        cell = WriteOnlyCell(ws, value)
+        cell.style = style
+        return cell
+
+    def Money(ws, value, style='statement_normal'):
+        return Cell(ws, float(value) / 100, style + '_money')
+
+    def HeaderRow(ws, values):
+        ws.row_dimensions[1].height = style_rowheight_header
+        ws.append([Cell(ws, i, 'statement_header') for i in values])
+
+    def SetColumnWidths(ws, widths):
+        for i in range(0, len(widths)):
+            ws.column_dimensions[get_column_letter(i+1)].width = widths[i]
+
+    #####
+    #### Summary
+    #####
+    ws = wb.create_sheet('Statements')
+    SetColumnWidths(ws, [style_colwidth_normal * 2] + [style_colwidth_normal] * 9)
+    HeaderRow(ws, ['Name', 'Trips with fares', 'Payments', 'Total Fares', 'Cash (driver collected)', 'Check (driver collected)', 'Cash (not driver collected)', 'Check (not driver collected)', 'Total Payments', 'Total Owed'])
+
+    totals = [0] * 7
+    for statement in statements:
+        rider = statement['rider']
+        values = [rider.total_fares, rider.collected_cash, rider.collected_check, rider.paid_cash, rider.paid_check, rider.total_payments, rider.total_owed]
+        for i in range(0, len(values)):
+            totals[i] += values[i].value
+        ws.append([
+            Cell(ws, statement['client'].name, 'statement_normal'),
+            Cell(ws, len(statement['trips_money']), 'statement_normal'),
+            Cell(ws, len(statement['payments']), 'statement_normal'),
+        ] + [Money(ws, i.value) for i in values])
+    ws.append([Cell(ws, 'TOTAL', 'statement_total'), Cell(ws, sum(len(i['trips_money']) for i in statements), 'statement_total'), Cell(ws, sum(len(i['payments']) for i in statements), 'statement_total')] + [Money(ws, i, 'statement_total') for i in totals])
+
+    #####
+    #### Trips with a fare and/or payments
+    #####
+    ws = wb.create_sheet('Trips')
+    SetColumnWidths(ws, [style_colwidth_normal * 2, style_colwidth_normal, style_colwidth_normal * 2, style_colwidth_normal * 2] + [style_colwidth_normal] * 3)
+    HeaderRow(ws, ['Name', 'Date', 'Address', 'Destination', 'Fare', 'Cash', 'Check'])
+    for statement in statements:
+        for trip in statement['trips_money']:
+            ws.append([
+                Cell(ws, statement['client'].name, 'statement_normal'),
+                Cell(ws, trip.date, 'statement_normal_date'),
+                Cell(ws, trip.address, 'statement_normal'),
+                Cell(ws, trip.destination, 'statement_normal'),
+                Money(ws, trip.fare),
+                Money(ws, trip.collected_cash),
+                Money(ws, trip.collected_check),
+            ])
+
+    #####
+    #### Payments not collected by drivers
+    #####
+    ws = wb.create_sheet('Payments')
+    SetColumnWidths(ws, [style_colwidth_normal * 2, style_colwidth_normal, style_colwidth_normal * 3] + [style_colwidth_normal] * 2)
+    HeaderRow(ws, ['Name', 'Date paid', 'Notes', 'Cash', 'Check'])
+    for statement in statements:
+        for payment in statement['payments']:
+            ws.append([
+                Cell(ws, statement['client'].name, 'statement_normal'),
+                Cell(ws, payment.date_paid, 'statement_normal_date'),
+                Cell(ws, payment.notes, 'statement_normal'),
+                Money(ws, payment.money_cash),
+                Money(ws, payment.money_check),
+            ])
+
+    wb.save(output)
+
+@permission_required(['transit.view_client', 'transit.view_trip'])
+def clientStatements(request, year, month):
+    date_start, date_end = clientStatementsMonth(year, month)
+
+    if request.method == 'POST':
+        date_picker = DatePickerForm(request.POST)
+        if date_picker.is_valid():
+            date_picker_date = date_picker.cleaned_data['date']
+            return HttpResponseRedirect(reverse('client-statements', kwargs={'year': date_picker_date.year, 'month': date_picker_date.month}))
+    else:
+        date_picker = DatePickerForm(initial={'date': date_start})
+
+    month_prev = date_start + datetime.timedelta(days=-1)
+    month_next = date_end + datetime.timedelta(days=1)
+
+    statements = clientStatementsLoad(date_start, date_end)
+
+    context = {
+        'date_start': date_start,
+        'date_end': date_end,
+        'date_picker': date_picker,
+        'url_month_prev': reverse('client-statements', kwargs={'year': month_prev.year, 'month': month_prev.month}),
+        'url_month_next': reverse('client-statements', kwargs={'year': month_next.year, 'month': month_next.month}),
+        'url_this_month': reverse('client-statements-this-month'),
+        'statements': statements,
+    }
+    return render(request, 'client/statements/view.html', context=context)
+
+def clientStatementsThisMonth(request):
+    date = datetime.datetime.now().date()
+    return clientStatements(request, date.year, date.month)
+
+@permission_required(['transit.view_client', 'transit.view_trip'])
+def clientStatementsPrint(request, year, month):
+    date_start, date_end = clientStatementsMonth(year, month)
+    statements = clientStatementsLoad(date_start, date_end)
+    return HttpResponse(clientStatementsRenderHTML(statements, date_start, date_end, workers=settings.REPORT_PARALLEL_WORKERS))
+
+@permission_required(['transit.view_client', 'transit.view_trip'])
+def clientStatementsXLSX(request, year, month):
+    date_start, date_end = clientStatementsMonth(year, month)
+    statements = clientStatementsLoad(date_start, date_end)
+
+    temp_file = tempfile.NamedTemporaryFile()
+    clientStatementsWriteXLSX(statements, temp_file)
+    temp_file.seek(0)
+
+    return FileResponse(temp_file, filename='Client_Statements_' + date_start.strftime('%Y-%m') + '.xlsx', as_attachment=True)
@@ -0,0 +1,41 @@
+# Copyright © 2019-2023 Justin Jacobs
+#
+# This file is part of the Transit Log System.
+#
+# The Transit Log System is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+#
+# The Transit Log System is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# The Transit Log System.  If not, see http://www.gnu.org/licenses/
+
+from django.shortcuts import render
+from django.core.paginator import Paginator
+
+from transit.models import LogProblem
+from transit.views.report import Report
+
+from django.contrib.auth.decorators import permission_required
+
+from transit.common.util import *
+
+@permission_required(['transit.view_trip'])
+def logProblems(request):
+    # only the days that have changed since their problems were last found are loaded, the rest are read from the table
+    Report.updateLogProblems()
+    problems = LogProblem.objects.select_related('shift__driver', 'shift__vehicle', 'trip')
+
+    problems_per_page = 25
+    problem_pages = Paginator(problems, problems_per_page)
+    problems_paginated = problem_pages.get_page(request.GET.get('page'))
+    page_ranges = get_paginated_ranges(page=problems_paginated, page_range=5, items_per_page=problems_per_page)
+
+    context = {
+        'problems': problems_paginated,
+        'page_ranges': page_ranges,
+    }
+    return render(request, 'report/log_problems.html', context=context)
@@ -14,29 +14,60 @@
 # The Transit Log System.  If not, see http://www.gnu.org/licenses/
 
 import datetime
+import hashlib
+import heapq
+import json
+import logging
 import tempfile
+import multiprocessing
+import threading
+
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 
 from django.http import HttpResponseRedirect
 from django.http import FileResponse
+from django.http import JsonResponse
 from django.shortcuts import render
 from django.urls import reverse
+from django.conf import settings
+from django.db import connections, transaction
 from django.db.models import Q
+from django.views.decorators.http import condition
 from time import perf_counter
 
-from transit.models import Driver, Vehicle, Trip, Shift, TripType, Client, ClientPayment, Tag, Destination
+from transit.models import Driver, Vehicle, Trip, Shift, TripType, Client, ClientPayment, Tag, Destination, ReportRollup, ReportRollupSummary, ReportDataVersion, LogProblem, LogProblemDay
 from transit.forms import DatePickerForm, DateRangePickerForm, ReportFilterForm
+from transit.common.util.parse import parse_log_time, parse_log_minutes, parse_odometer
 
 from django.contrib.auth.decorators import permission_required
 
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+from openpyxl.styles import Font, Alignment, PatternFill, Border, Side, NamedStyle
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.workbook import Workbook
 from openpyxl.utils import get_column_letter
 
 from transit.common.util import *
 
+# one line per report request, with the time spent in each stage, see Report.Profile
+profile_logger = logging.getLogger('transit.report')
+
 class Report():
     service_mile_warning_threshold = 1000
 
+    # names per IN (...) list when filtering by client, see getClientQuery()
+    client_query_batch_size = 500
+
+    # loaded reports, see loadCached()
+    cache = OrderedDict()
+    cache_lock = threading.Lock()
+
+    # daily logs, see loadDailyLogs()
+    daily_log_cache = OrderedDict()
+
+    # bump this when the fields in getJSONData() change
+    JSON_VERSION = 2
+
     RIDER_ELDERLY_AMBULATORY = 0
     RIDER_ELDERLY_NONAMBULATORY = 1
     RIDER_NONELDERLY_AMBULATORY = 2
@@ -47,6 +78,8 @@ class Report():
     RIDER_TOTAL_WITH_STAFF = 7
 
     class Money():
+        __slots__ = ('value',)
+
         def __init__(self, default_value=0):
             self.value = default_value
         def __add__(self, other):
@@ -59,6 +92,8 @@ class Report():
             return float(self.value) / 100
 
     class ValueString():
+        __slots__ = ('value', 'string', 'is_string_valid')
+
         def __init__(self):
             self.value = 0
             self.string = ''
@@ -79,6 +114,8 @@ class Report():
             return self.string == ''
 
     class Mileage(ValueString):
+        __slots__ = ()
+
         def __add__(self, other):
             r = Report.Mileage()
             r.value = self.value + other.value
@@ -96,7 +133,7 @@ class Report():
             return self.string
         def setFromString(self, string):
             try:
-                self.value = float(string)
+                self.value = parse_odometer(string)
             except:
                 self.value = 0
                 self.string = ''
@@ -115,8 +152,18 @@ class Report():
                 return 1
             else:
                 return 0
+        def mergeValue(base, suffix):
+            # same as mergeStrings(), but only returns the value (0 if it can't be parsed)
+            if len(suffix) < len(base):
+                suffix = base[0:len(base) - len(suffix)] + suffix
+            try:
+                return parse_odometer(suffix)
+            except:
+                return 0
 
     class Time(ValueString):
+        __slots__ = ()
+
         # TODO is this an acceptable "fallback" value? Does it matter? This is a worst case anyway...
         fallback_value = datetime.datetime(year=1900, month=1, day=1, hour=8, minute=0)
         fallback_string = fallback_value.strftime('%I:%M %p')
@@ -129,7 +176,7 @@ class Report():
             return self.string
         def setFromString(self, string, use_fallback=True):
             try:
-                self.value = datetime.datetime.strptime(string, '%I:%M %p')
+                self.value = parse_log_time(string)
             except:
                 if use_fallback:
                     self.value = Report.Time.fallback_value
@@ -144,6 +191,8 @@ class Report():
             return 0
 
     class Fuel(ValueString):
+        __slots__ = ()
+
         def __str__(self):
             if not self.is_string_valid:
                 self.string = f"{self.value:.1f}"
@@ -165,6 +214,8 @@ class Report():
             return 0
 
     class TripCount():
+        __slots__ = ('passenger', 'no_passenger', 'total')
+
         def __init__(self):
             self.passenger = 0
             self.no_passenger = 0
@@ -223,23 +274,137 @@ class Report():
             self.collected_check = Report.Money(0)
             self.other_employment = False
 
-    class ReportDay():
-        query_vehicles = ()
-        query_drivers = ()
+    # The report only needs a few columns from each Shift, Trip, and ClientPayment, so they're fetched with values_list()
+    # into these records instead of full model instances. They provide the same attributes and methods that the report uses.
+    class ShiftRecord():
+        __slots__ = ('id', 'date', 'driver_id', 'vehicle_id', 'start_miles', 'start_time', 'end_miles', 'end_time', 'fuel', 'driver', 'vehicle')
+        query_fields = ('id', 'date', 'driver_id', 'vehicle_id', 'start_miles', 'start_time', 'end_miles', 'end_time', 'fuel')
+
+        def __init__(self, id=None, date=None, driver_id=None, vehicle_id=None, start_miles='', start_time='', end_miles='', end_time='', fuel=''):
+            self.id = id
+            self.date = date
+            self.driver_id = driver_id
+            self.vehicle_id = vehicle_id
+            self.start_miles = start_miles
+            self.start_time = start_time
+            self.end_miles = end_miles
+            self.end_time = end_time
+            self.fuel = fuel
+            self.driver = None
+            self.vehicle = None
+
+        def __str__(self):
+            return Shift.__str__(self)
+
+        def check_log(self):
+            return Shift.check_log(self)
+
+    class TripRecord():
+        __slots__ = ('id', 'date', 'driver_id', 'vehicle_id', 'status', 'cancel_date', 'name', 'address', 'destination', 'start_miles', 'start_time', 'end_miles', 'end_time', 'trip_type_id', 'tags', 'passenger', 'collected_cash', 'collected_check', 'fare', 'elderly', 'ambulatory', 'driver', 'vehicle', 'trip_type')
+        query_fields = ('id', 'date', 'driver_id', 'vehicle_id', 'status', 'cancel_date', 'name', 'address', 'destination', 'start_miles', 'start_time', 'end_miles', 'end_time', 'trip_type_id', 'tags', 'passenger', 'collected_cash', 'collected_check', 'fare', 'elderly', 'ambulatory')
+        # the columns used for matching trips to shifts and checking their mileage, see loadMileage()
+        query_fields_mileage = ('id', 'date', 'driver_id', 'vehicle_id', 'start_miles', 'start_time', 'end_miles', 'end_time')
+
+        # reports only load normal trips, see loadQuery()
+        format = Trip.FORMAT_NORMAL
+
+        def __init__(self, id=None, date=None, driver_id=None, vehicle_id=None, status=Trip.STATUS_NORMAL, cancel_date=None, name='', address='', destination='', start_miles='', start_time='', end_miles='', end_time='', trip_type_id=None, tags='', passenger=True, collected_cash=0, collected_check=0, fare=0, elderly=None, ambulatory=None):
+            self.id = id
+            self.date = date
+            self.driver_id = driver_id
+            self.vehicle_id = vehicle_id
+            self.status = status
+            self.cancel_date = cancel_date
+            self.name = name
+            self.address = address
+            self.destination = destination
+            self.start_miles = start_miles
+            self.start_time = start_time
+            self.end_miles = end_miles
+            self.end_time = end_time
+            self.trip_type_id = trip_type_id
+            self.tags = tags
+            self.passenger = passenger
+            self.collected_cash = collected_cash
+            self.collected_check = collected_check
+            self.fare = fare
+            self.elderly = elderly
+            self.ambulatory = ambulatory
+            self.driver = None
+            self.vehicle = None
+            self.trip_type = None
+
+        def __str__(self):
+            return Trip.__str__(self)
+
+        def check_log(self):
+            return Trip.check_log(self)
 
+        def check_cancel_date(self):
+            return Trip.check_cancel_date(self)
+
+        def check_tag(self, tag_str):
+            return Trip.check_tag(self, tag_str)
+
+        def get_tag_list(self):
+            return Trip.get_tag_list(self)
+
+    class PaymentRecord():
+        __slots__ = ('id', 'date_paid', 'parent_id', 'money_cash', 'money_check', 'parent')
+        query_fields = ('id', 'date_paid', 'parent_id', 'money_cash', 'money_check')
+
+        def __init__(self, id=None, date_paid=None, parent_id=None, money_cash=0, money_check=0):
+            self.id = id
+            self.date_paid = date_paid
+            self.parent_id = parent_id
+            self.money_cash = money_cash
+            self.money_check = money_check
+            self.parent = None
+
+    class ReportContext():
+        # the drivers, vehicles, trip types, and tags that a report's days and summaries are built for
+        # each report has its own, so that reports can be loaded at the same time by different threads
         def __init__(self):
+            self.triptypes = []
+            self.tags = []
+            self.vehicles = []
+            self.drivers = []
+
+    class ReportDay():
+        def __init__(self, context):
             self.date = None
             self.shifts = []
             self.trips = []
-            self.all = Report.ReportSummary()
+            self.all = Report.ReportSummary(context)
             self.collected_cash = Report.Money(0)
             self.collected_check = Report.Money(0)
             self.paid_cash = Report.Money(0)
             self.paid_check = Report.Money(0)
             self.total_payments = Report.Money(0)
             self.total_fares = Report.Money(0)
-            self.by_vehicle = [None] * len(self.query_vehicles)
-            self.by_driver = [None] * len(self.query_drivers)
+            self.by_vehicle = [None] * len(context.vehicles)
+            self.by_driver = [None] * len(context.drivers)
+
+            # per-day contributions to the report-wide data, merged by Report.addDay()
+            self.report_errors = Report.ReportErrors()
+            self.riders = {}
+            self.destinations = {}
+            self.money_trips = []
+            self.money_payments = []
+            self.weekday_trips = Report.TripCount()
+
+        def dropDetails(self):
+            # once a day has been added to a report, the report output only uses its summaries and shifts
+            # the rest has already been merged in to the report, so loadStream() drops it
+            self.trips = []
+            for i in self.shifts:
+                i.start_trip = None
+                i.end_trip = None
+            self.report_errors = Report.ReportErrors()
+            self.riders = {}
+            self.destinations = {}
+            self.money_trips = []
+            self.money_payments = []
 
         def hasVehicleInShift(self, vehicle = None):
             for i in self.shifts:
@@ -254,15 +419,12 @@ class Report():
             return False
 
     class ReportSummary():
-        query_triptypes = ()
-        query_tags = ()
-
         # summary types
         TYPE_NORMAL = 0
         TYPE_LOGGED = 1
         TYPE_NONLOGGED = 2
 
-        def __init__(self):
+        def __init__(self, context):
             self.service_miles = 0
             self.service_hours = 0
             self.deadhead_miles = 0
@@ -285,7 +447,7 @@ class Report():
             # flag to mark if this summary can be added to the grand total (i.e. "All Vehicles")
             self.type = Report.ReportSummary.TYPE_NORMAL
 
-            for i in self.query_triptypes:
+            for i in context.triptypes:
                 self.trip_types[i] = Report.TripCount()
 
         def __add__(self, other):
@@ -299,7 +461,8 @@ class Report():
                 r.total_hours += other.total_hours
                 r.pmt += other.pmt
                 r.fuel += other.fuel
-            for i in self.query_triptypes:
+            # both summaries are from the same report, so they have the same trip types
+            for i in r.trip_types:
                 r.trip_types[i] += other.trip_types[i]
             r.trip_types_unknown += other.trip_types_unknown
             r.trip_types_total += other.trip_types_total
@@ -316,19 +479,19 @@ class Report():
             return r
 
     class ReportOutputVehicles():
-        def __init__(self):
+        def __init__(self, context):
             self.vehicle = None
             self.start_miles = Report.Mileage()
             self.end_miles = Report.Mileage()
             self.total_miles = Report.Mileage()
             self.days = []
-            self.totals = Report.ReportSummary()
+            self.totals = Report.ReportSummary(context)
 
     class ReportOutputDrivers():
-        def __init__(self):
+        def __init__(self, context):
             self.driver = None
             self.days = []
-            self.totals = Report.ReportSummary()
+            self.totals = Report.ReportSummary(context)
 
     class ReportErrors():
         SHIFT_INCOMPLETE = 0
@@ -420,6 +583,8 @@ class Report():
             self.address = None
             self.trips = Report.TripCount()
             self.avg_mileage = 0
+            # more than 1 for the row that combines the destinations past REPORT_FREQUENT_DESTINATIONS_LIMIT
+            self.destination_count = 1
         def __lt__(self, other):
             return self.trips.total < other.trips.total
         def averageMiles(self, miles):
@@ -427,6 +592,18 @@ class Report():
                 self.avg_mileage = miles
             else:
                 self.avg_mileage = (self.avg_mileage + miles) / 2
+        def combine(destinations):
+            # a single destination with the total trips of the given destinations, and their average mileage weighted by trips
+            combined = Report.FrequentDestination()
+            combined.destination_count = 0
+            weighted_miles = 0
+            for i in destinations:
+                combined.trips.addTripsFromTripCount(i.trips)
+                combined.destination_count += 1
+                weighted_miles += i.avg_mileage * i.trips.total
+            if combined.trips.total > 0:
+                combined.avg_mileage = weighted_miles / combined.trips.total
+            return combined
 
     class UniqueRiderSummary():
         class Rider():
@@ -447,8 +624,47 @@ class Report():
                 self.trips_no_show = Report.TripCount()
                 self.trips_canceled_late = Report.TripCount()
                 self.trips_canceled_very_late = Report.TripCount()
+                # used to match the rider to a Client once all of the days have been added
+                self.has_trips = False
+                self.payment_client_id = None
             def __lt__(self, other):
                 return self.name < other.name
+            def calculateTotalOwed(self):
+                self.total_payments = self.collected_cash + self.collected_check + self.paid_cash + self.paid_check
+                if self.total_payments.value != 0 or self.total_fares.value != 0:
+                    self.total_owed = self.total_fares - self.total_payments
+                    if (self.total_owed.value < 0):
+                        self.total_owed.value = 0
+
+        class RiderDay():
+            def __init__(self, name):
+                self.name = name
+                # elderly/ambulatory are taken from the last trip of the day and resolved against Clients when merged
+                self.has_trips = False
+                self.elderly = None
+                self.ambulatory = None
+                # Client of the first payment, used if the rider has no trips
+                self.payment_client_id = None
+                self.trips = Report.TripCount()
+                self.trips_no_show = Report.TripCount()
+                self.trips_canceled_late = Report.TripCount()
+                self.trips_canceled_very_late = Report.TripCount()
+                self.total_fares = Report.Money(0)
+                self.collected_cash = Report.Money(0)
+                self.collected_check = Report.Money(0)
+                self.paid_cash = Report.Money(0)
+                self.paid_check = Report.Money(0)
+
+        def getRiderTypes(rider):
+            # the RIDER_* totals that a rider is counted in, besides RIDER_TOTAL_WITH_STAFF
+            if rider.staff:
+                return (Report.RIDER_STAFF,)
+            elif rider.elderly == None or rider.ambulatory == None:
+                return (Report.RIDER_TOTAL, Report.RIDER_UNKNOWN)
+            elif rider.elderly:
+                return (Report.RIDER_TOTAL, Report.RIDER_ELDERLY_AMBULATORY if rider.ambulatory else Report.RIDER_ELDERLY_NONAMBULATORY)
+            else:
+                return (Report.RIDER_TOTAL, Report.RIDER_NONELDERLY_AMBULATORY if rider.ambulatory else Report.RIDER_NONELDERLY_NONAMBULATORY)
 
         def __init__(self):
             self.names = {}
@@ -463,6 +679,39 @@ class Report():
             self.total_total_fares = Report.Money(0)
             self.total_total_owed = Report.Money(0)
 
+        def addRiders(self, day_riders):
+            # adds a day's RiderDay values to the riders of the whole report
+            unique_riders = self.names
+            for day_rider in day_riders.values():
+                rider = unique_riders.get(day_rider.name)
+                if rider == None:
+                    rider = unique_riders[day_rider.name] = Report.UniqueRiderSummary.Rider(day_rider.name)
+                    if not day_rider.has_trips:
+                        rider.payment_client_id = day_rider.payment_client_id
+
+                if day_rider.has_trips:
+                    rider.has_trips = True
+                    rider.elderly = day_rider.elderly
+                    rider.ambulatory = day_rider.ambulatory
+
+                rider.trips.addTripsFromTripCount(day_rider.trips)
+                rider.trips_no_show.addTripsFromTripCount(day_rider.trips_no_show)
+                rider.trips_canceled_late.addTripsFromTripCount(day_rider.trips_canceled_late)
+                rider.trips_canceled_very_late.addTripsFromTripCount(day_rider.trips_canceled_very_late)
+                rider.total_fares.value += day_rider.total_fares.value
+                rider.collected_cash.value += day_rider.collected_cash.value
+                rider.collected_check.value += day_rider.collected_check.value
+                rider.paid_cash.value += day_rider.paid_cash.value
+                rider.paid_check.value += day_rider.paid_check.value
+
+        def countRider(self, rider):
+            # adds a rider that has been matched to a Client to the elderly/ambulatory totals
+            if rider.trips.total > 0:
+                is_passenger = rider.trips.passenger > 0
+                for rider_type in (Report.RIDER_TOTAL_WITH_STAFF,) + Report.UniqueRiderSummary.getRiderTypes(rider):
+                    self.by_individuals[rider_type].addTrips(1, is_passenger)
+                    self.by_trips[rider_type].addTripsFromTripCount(rider.trips)
+
     class ReportPayment():
         def __init__(self):
             self.date = None
@@ -471,21 +720,122 @@ class Report():
             self.cash = Report.Money(0)
             self.check = Report.Money(0)
 
+    class DailyLog():
+        # the totals printed on the daily log for one day, for either all of the day's shifts or a single shift
+        def __init__(self):
+            self.report_errors = Report.ReportErrors()
+            self.unique_riders = Report.UniqueRiderSummary()
+            self.trips_medical = Report.TripCount()
+            self.trips_nutrition = Report.TripCount()
+            self.trips_social = Report.TripCount()
+            self.trips_shopping = Report.TripCount()
+            self.trips_other = Report.TripCount()
+            self.trips_employment = Report.TripCount()
+            self.trips_total = Report.TripCount()
+            self.money_cash = Report.Money(0)
+            self.money_check = Report.Money(0)
+            self.money_total = Report.Money(0)
+
+        def setSummary(self, summary, triptypes_by_name):
+            # triptypes_by_name maps the names of the counted trip types to their TripType
+            def TripTypeCount(name):
+                if name not in triptypes_by_name:
+                    return Report.TripCount()
+                return summary.trip_types[triptypes_by_name[name]]
+
+            self.trips_medical = TripTypeCount('Medical')
+            self.trips_nutrition = TripTypeCount('Nutrition')
+            self.trips_social = TripTypeCount('Social/Recreation')
+            self.trips_shopping = TripTypeCount('Shopping')
+            self.trips_employment = summary.other_employment
+
+            # don't include employment/education in Other total
+            self.trips_other = TripTypeCount('Other') - self.trips_employment
+
+            self.trips_total = self.trips_medical + self.trips_nutrition + self.trips_social + self.trips_shopping + self.trips_other + self.trips_employment
+            self.money_cash = summary.collected_cash
+            self.money_check = summary.collected_check
+            self.money_total = self.money_cash + self.money_check
+
+    class Profile():
+        # stage name, label
+        STAGES = [
+            ('query', 'Database query'),
+            ('grouping', 'Grouping rows by day'),
+            ('build_days', 'Building days'),
+            ('shift_matching', 'Matching trips to shifts'),
+            ('summaries', 'Summary totals'),
+            ('unique_riders', 'Unique rider totals and sorting'),
+            ('render', 'Template render'),
+            ('xlsx', 'XLSX build'),
+        ]
+
+        def __init__(self):
+            self.times = {}
+            for i in Report.Profile.STAGES:
+                self.times[i[0]] = 0
+            self.rows = 0
+            self.engine = 'objects'
+            self.cached = False
+
+        def add(self, stage, perf_start):
+            # adds the time since perf_start to the stage, and returns the current time so that the next stage can start from it
+            perf_end = perf_counter()
+            self.times[stage] += perf_end - perf_start
+            return perf_end
+
+        def merge(self, other):
+            for i in other.times:
+                self.times[i] += other.times[i]
+            self.rows += other.rows
+            self.engine = other.engine
+
+        def getTotal(self):
+            return sum(self.times.values())
+
+        def getStages(self):
+            stages = []
+            for i in Report.Profile.STAGES:
+                stages.append({'name': i[0], 'label': i[1], 'seconds': self.times[i[0]]})
+            return stages
+
+        def log(self, request, view_name, date_start, date_end, report):
+            data = {
+                'view': view_name,
+                'path': request.path,
+                'date_start': str(date_start),
+                'date_end': str(date_end),
+                'days': (date_end - date_start).days + 1,
+                'engine': self.engine,
+                'cached': self.cached,
+                'rows': self.rows,
+                'errors': len(report.report_errors.errors),
+            }
+            for i in self.times:
+                data[i] = round(self.times[i], 4)
+            data['total'] = round(self.getTotal(), 4)
+            profile_logger.info(json.dumps(data))
+
     def __init__(self):
-        Report.ReportSummary.query_triptypes = TripType.objects.filter(is_trip_counted=True)
-        Report.ReportSummary.query_tags = Tag.objects.all()
+        # the vehicles and drivers are filled in by loadSetup()
+        self.context = Report.ReportContext()
+        self.context.triptypes = list(TripType.objects.filter(is_trip_counted=True))
+        self.context.tags = Tag.objects.all()
 
         self.report_all = []
+        # every day that was added, by date, so that loadChanged() can reuse them
+        self.days = {}
         self.vehicle_reports = []
         self.driver_reports = []
-        self.driver_reports_total = Report.ReportOutputDrivers()
-        self.all_vehicles = Report.ReportSummary()
+        self.driver_reports_total = Report.ReportOutputDrivers(self.context)
+        self.all_vehicles = Report.ReportSummary(self.context)
         self.unique_riders = Report.UniqueRiderSummary()
         self.money_trips = []
-        self.money_trips_summary = Report.ReportSummary()
+        self.money_trips_summary = Report.ReportSummary(self.context)
         self.money_payments = []
         self.money_payments_summary = Report.ReportPayment()
         self.frequent_destinations = {}
+        self.frequent_destinations_other = None
         self.report_errors = Report.ReportErrors()
         self.filtered_vehicles = None
         self.filtered_drivers = None
@@ -494,21 +844,213 @@ class Report():
         self.total_money = Report.Money(0)
         self.total_odometer_miles = Report.Mileage()
 
+        self.client_names = []
+        self.client_dict = {}
+        self.client_id_dict = {}
+        self.destination_dict = {}
+        self.vehicle_index_dict = {}
+        self.driver_index_dict = {}
+        self.triptype_dict = {}
+
         self.perf_database = 0
         self.perf_processing = 0
+        self.profile = Report.Profile()
 
         self.weekday_totals = []
         for i in range(0, 7):
             self.weekday_totals.append(Report.TripCount())
 
-    def load(self, date_start, date_end, daily_log_shift=None, driver_id=None, client_names=[], filter_by_money=False):
+    def load(self, date_start, date_end, daily_log_shift=None, driver_id=None, client_names=[], filter_by_money=False, progress=None, stream=False):
+        # progress is an optional function that is called with the number of days loaded so far and the total number of days
+        # reports with progress are always loaded one day at a time in this process
+        # stream loads the report with loadStream(), for long ranges that don't need the trips of each day afterwards
         if date_start != date_end:
             daily_log_shift = None
 
-        # for filter() bounds
-        date_end_plus_one = date_end + datetime.timedelta(days=1)
+        if stream and daily_log_shift == None:
+            self.loadStream(date_start, date_end, driver_id, client_names, filter_by_money, progress)
+            return
+
+        month_ranges = Report.getMonthRanges(date_start, date_end)
+        if progress == None and Report.canLoadParallel(len(month_ranges)):
+            if self.loadParallel(month_ranges, driver_id, client_names, filter_by_money):
+                return
+            # something changed while the months were being loaded, so start over without the worker processes
+            self.__init__()
+
+        perf_start = perf_counter()
+        self.loadSetup(driver_id, client_names)
+        all_dates_dict = self.loadQuery(date_start, date_end, client_names, filter_by_money)
+        self.perf_database = perf_counter() - perf_start
+
+        perf_start = perf_counter()
+        days_done = 0
+        for day_date in all_dates_dict:
+            day_data = all_dates_dict[day_date]
+            self.addDay(self.loadDay(day_date, day_data[0], day_data[1], day_data[2], daily_log_shift, driver_id, client_names))
+
+            days_done += 1
+            if progress != None:
+                progress(days_done, len(all_dates_dict))
+
+        self.loadFinish()
+        self.perf_processing = perf_counter() - perf_start
+
+    def loadStream(self, date_start, date_end, driver_id=None, client_names=[], filter_by_money=False, progress=None):
+        # the same report as load(), but the range is queried a month at a time, and each day is folded in to the report as soon as it is built
+        # days are kept in their rollup form, which only has what the report output shows (the same as loadParallel()), so the trips of each month can be released
+        self.profile.engine = 'stream'
+
+        perf_start = perf_counter()
+        self.loadSetup(driver_id, client_names)
+        self.perf_database = perf_counter() - perf_start
+
+        days_total = (date_end - date_start).days + 1
+        for month_start, month_end in Report.getMonthRanges(date_start, date_end):
+            perf_start = perf_counter()
+            all_dates_dict = self.loadQuery(month_start, month_end, client_names, filter_by_money)
+            self.perf_database += perf_counter() - perf_start
+
+            perf_start = perf_counter()
+            for day_date in all_dates_dict:
+                day_data = all_dates_dict[day_date]
+                report_day = self.loadDay(day_date, day_data[0], day_data[1], day_data[2], None, driver_id, client_names)
+                perf_day = perf_counter()
+                rollup = self.dayToRollup(day_date, report_day)
+                rollup_day = self.dayFromRollup(rollup[0], rollup[1])
+                if rollup_day != None:
+                    report_day = rollup_day
+                self.profile.add('build_days', perf_day)
+                self.addDay(report_day)
+                report_day.dropDetails()
+
+            # the month's records are released before the next month is queried
+            all_dates_dict = None
+            self.perf_processing += perf_counter() - perf_start
+
+            if progress != None:
+                progress((month_end - date_start).days + 1, days_total)
 
         perf_start = perf_counter()
+        self.loadFinish()
+        self.perf_processing += perf_counter() - perf_start
+
+    def loadMileage(self, date_start, date_end):
+        # a lighter load() for the mileage summary, which only uses the odometer readings, service/deadhead miles and hours, and days of service
+        # these are the same as load(), but trip types, tags, unique riders, money, errors for canceled trips, and frequent destinations are left empty
+        self.profile.engine = 'mileage'
+
+        perf_start = perf_counter()
+        self.loadSetup(mileage_only=True)
+        all_dates_dict = self.loadQuery(date_start, date_end, mileage_only=True)
+        self.perf_database = perf_counter() - perf_start
+
+        perf_start = perf_counter()
+        for day_date in all_dates_dict:
+            day_data = all_dates_dict[day_date]
+            self.addDay(self.loadDay(day_date, day_data[0], day_data[1], day_data[2], mileage_only=True))
+
+        self.loadFinish()
+        self.perf_processing = perf_counter() - perf_start
+
+    def getMonthRanges(date_start, date_end):
+        month_ranges = []
+        range_start = date_start
+        while range_start <= date_end:
+            if range_start.month == 12:
+                next_month = datetime.date(range_start.year + 1, 1, 1)
+            else:
+                next_month = datetime.date(range_start.year, range_start.month + 1, 1)
+            range_end = min(next_month - datetime.timedelta(days=1), date_end)
+            month_ranges.append((range_start, range_end))
+            range_start = next_month
+        return month_ranges
+
+    def canLoadParallel(month_count):
+        if settings.REPORT_PARALLEL_WORKERS < 2 or month_count < 2:
+            return False
+
+        # worker processes are forked so that they can reuse the loaded Django setup
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            return False
+
+        # the database connections are closed before forking, which isn't possible in the middle of a transaction
+        for i in connections.all():
+            if i.in_atomic_block:
+                return False
+
+        # close_all() only closes this thread's connections, and the fork would copy the ones that other threads have open
+        # so threaded servers load reports in a single process
+        if threading.active_count() > 1:
+            return False
+
+        return True
+
+    def getClientQuery(client_names, field='name'):
+        # a chain of Q(name=...) for each client hits SQLite's expression tree depth limit with large selections
+        # so the names are matched with IN (...) lists instead, split up to keep each list a reasonable size
+        client_names = sorted(set(client_names))
+        client_query = Q()
+        for i in range(0, len(client_names), Report.client_query_batch_size):
+            client_query |= Q(**{field + '__in': client_names[i:i+Report.client_query_batch_size]})
+        return client_query
+
+    def loadParallel(self, month_ranges, driver_id, client_names, filter_by_money):
+        perf_start = perf_counter()
+        self.loadSetup(driver_id, client_names)
+
+        # forked processes can't share database connections with their parent
+        connections.close_all()
+
+        chunk_args = [(i[0], i[1], driver_id, client_names, filter_by_money) for i in month_ranges]
+        worker_count = min(settings.REPORT_PARALLEL_WORKERS, len(month_ranges))
+        with ProcessPoolExecutor(max_workers=worker_count, mp_context=multiprocessing.get_context('fork')) as executor:
+            chunks = list(executor.map(Report.loadChunk, chunk_args))
+        self.perf_database = perf_counter() - perf_start
+
+        # the worker stage times are added together, so they can add up to more than the time the workers took
+        for chunk in chunks:
+            self.profile.merge(chunk[1])
+        self.profile.engine = 'parallel'
+
+        # the days are merged in date order, the same as a serial load
+        perf_start = perf_counter()
+        all_days = []
+        for chunk in chunks:
+            for rollup in chunk[0]:
+                perf_day = perf_counter()
+                report_day = self.dayFromRollup(rollup[0], rollup[1])
+                self.profile.add('build_days', perf_day)
+                if report_day == None:
+                    return False
+                all_days.append(report_day)
+
+        for report_day in all_days:
+            self.addDay(report_day)
+
+        self.loadFinish()
+        self.perf_processing = perf_counter() - perf_start
+        return True
+
+    def loadChunk(args):
+        # runs in a worker process; the days are returned in their rollup form so that they can be sent back to the parent, along with the worker's profile
+        date_start, date_end, driver_id, client_names, filter_by_money = args
+
+        report = Report()
+        report.loadSetup(driver_id, client_names)
+        all_dates_dict = report.loadQuery(date_start, date_end, client_names, filter_by_money)
+
+        rollups = []
+        for day_date in all_dates_dict:
+            day_data = all_dates_dict[day_date]
+            rollups.append(report.dayToRollup(day_date, report.loadDay(day_date, day_data[0], day_data[1], day_data[2], None, driver_id, client_names)))
+
+        connections.close_all()
+        return (rollups, report.profile)
+
+    def loadSetup(self, driver_id=None, client_names=[], mileage_only=False):
+        perf_start = perf_counter()
+
         # refresh related fields
         # without this, select_related can fail if new entries are used
         all_drivers = Driver.objects.all()
@@ -523,560 +1065,676 @@ class Report():
             self.filtered_drivers = all_drivers.filter(id=driver_id)
 
         # also cache destinations
+        # destinations and clients are only used by the frequent destinations and unique riders, which loadMileage() skips
         all_destinations = Destination.objects.all()
-        destination_dict = {}
-        for i in all_destinations:
-            destination_dict[i.address] = i
-
         all_clients = Client.objects.all()
-        client_query = Q()
-        client_payment_query = Q()
-        for client_name in client_names:
-            client_query |= Q(name=client_name)
-            client_payment_query |= Q(parent__name=client_name)
+        if mileage_only:
+            all_destinations = all_destinations.none()
+            all_clients = all_clients.none()
 
-        all_clients = all_clients.filter(client_query)
+        self.destination_dict = {}
+        for i in all_destinations:
+            self.destination_dict[i.address] = i
+
+        all_clients = all_clients.filter(Report.getClientQuery(client_names))
 
-        client_dict = {}
+        self.client_names = client_names
+        self.client_dict = {}
+        self.client_id_dict = {}
         for i in all_clients:
-            client_dict[i.name] = i
+            self.client_dict[i.name] = i
+            self.client_id_dict[i.id] = i
+
+        self.context.drivers = list(self.filtered_drivers)
+        self.context.vehicles = list(all_vehicles)
+
+        # id lookups used when restoring rollups
+        self.vehicle_index_dict = {}
+        for i in range(0, len(self.context.vehicles)):
+            self.vehicle_index_dict[str(self.context.vehicles[i].id)] = i
+
+        self.driver_index_dict = {}
+        for i in range(0, len(self.context.drivers)):
+            self.driver_index_dict[str(self.context.drivers[i].id)] = i
+
+        self.triptype_dict = {}
+        for i in self.context.triptypes:
+            self.triptype_dict[str(i.id)] = i
+
+        self.all_vehicles = Report.ReportSummary(self.context)
+
+        # make sure our pre-defined tags get placed first in the final list
+        for i in self.context.tags:
+            self.all_vehicles.tags[i.name] = Report.TripCount()
+
+        self.vehicle_reports = []
+        for vehicle in self.filtered_vehicles:
+            vehicle_report = Report.ReportOutputVehicles(self.context)
+            vehicle_report.vehicle = vehicle
+            self.vehicle_reports.append(vehicle_report)
+
+        self.driver_reports = []
+        for driver in self.filtered_drivers:
+            driver_report = Report.ReportOutputDrivers(self.context)
+            driver_report.driver = driver
+            self.driver_reports.append(driver_report)
+
+        self.profile.add('query', perf_start)
+
+    def loadQuery(self, date_start, date_end, client_names=[], filter_by_money=False, mileage_only=False):
+        # mileage_only only queries the shift and trip log columns of completed trips, and no payments, see loadMileage()
+        # for filter() bounds
+        date_end_plus_one = date_end + datetime.timedelta(days=1)
+
+        client_query = Report.getClientQuery(client_names)
+        client_payment_query = Report.getClientQuery(client_names, 'parent__name')
+
+        perf_start = perf_counter()
 
         # store our database lookups
+        # related objects are shared from these lookups instead of being loaded with each row
+        all_drivers = {i.id: i for i in Driver.objects.all()}
+        all_vehicles = {i.id: i for i in self.context.vehicles}
+        all_triptypes = {i.id: i for i in TripType.objects.all()}
+
         all_shifts = Shift.objects.filter(date__gte=date_start, date__lt=date_end_plus_one, status=Shift.STATUS_NORMAL)
-        all_shifts = all_shifts.select_related('driver').select_related('vehicle')
+        all_shifts = all_shifts.values_list(*Report.ShiftRecord.query_fields)
 
         all_trips = Trip.objects.filter(date__gte=date_start, date__lt=date_end_plus_one, format=Trip.FORMAT_NORMAL)
         if filter_by_money:
             all_trips = all_trips.exclude(fare=0, collected_cash=0, collected_check=0)
         if len(client_names) > 0:
             all_trips = all_trips.filter(client_query)
-        all_trips = all_trips.select_related('driver').select_related('vehicle').select_related('trip_type')
+        if mileage_only:
+            all_trips = all_trips.filter(status=Trip.STATUS_NORMAL).values_list(*Report.TripRecord.query_fields_mileage)
+        else:
+            all_trips = all_trips.values_list(*Report.TripRecord.query_fields)
 
         all_client_payments = ClientPayment.objects.filter(date_paid__gte=date_start, date_paid__lt=date_end_plus_one)
-        all_client_payments = all_client_payments.select_related('parent')
         if len(client_names) > 0:
             all_client_payments = all_client_payments.filter(client_payment_query)
-        self.perf_database = perf_counter() - perf_start
+        if mileage_only:
+            all_client_payments = all_client_payments.none()
+        all_client_payments = all_client_payments.values_list(*Report.PaymentRecord.query_fields)
 
-        perf_start = perf_counter()
-        Report.ReportDay.query_drivers = list(self.filtered_drivers)
-        Report.ReportDay.query_vehicles = list(all_vehicles)
-
-        all_dates = []
+        all_shifts = list(all_shifts)
+        all_trips = list(all_trips)
+        all_client_payments = list(all_client_payments)
+        self.profile.rows += len(all_shifts) + len(all_trips) + len(all_client_payments)
+        perf_start = self.profile.add('query', perf_start)
 
         all_dates_dict = {}
-        for i in all_shifts:
+        for values in all_shifts:
+            i = Report.ShiftRecord(*values)
+            i.driver = all_drivers.get(i.driver_id)
+            i.vehicle = all_vehicles.get(i.vehicle_id)
             if i.date not in all_dates_dict:
                 all_dates_dict[i.date] = [[], [], []]
             all_dates_dict[i.date][0].append(i)
 
-        for i in all_trips:
+        for values in all_trips:
+            if mileage_only:
+                i = Report.TripRecord(**dict(zip(Report.TripRecord.query_fields_mileage, values)))
+            else:
+                i = Report.TripRecord(*values)
+            i.driver = all_drivers.get(i.driver_id)
+            i.vehicle = all_vehicles.get(i.vehicle_id)
+            i.trip_type = all_triptypes.get(i.trip_type_id)
             if i.date not in all_dates_dict:
                 all_dates_dict[i.date] = [[], [], []]
             all_dates_dict[i.date][1].append(i)
 
-        for i in all_client_payments:
+        # payments are already filtered to the same clients as client_id_dict
+        for values in all_client_payments:
+            i = Report.PaymentRecord(*values)
+            i.parent = self.client_id_dict[i.parent_id]
             if i.date_paid not in all_dates_dict:
                 all_dates_dict[i.date_paid] = [[], [], []]
             all_dates_dict[i.date_paid][2].append(i)
 
         all_dates_dict = {k: v for k, v in sorted(all_dates_dict.items(), key=lambda x: x[0])}
+        self.profile.add('grouping', perf_start)
+        return all_dates_dict
 
-        self.all_vehicles = Report.ReportSummary()
+    def loadDay(self, day_date, day_shifts, day_trips, day_payments, daily_log_shift=None, driver_id=None, client_names=[], mileage_only=False):
+        # mileage_only skips everything that the mileage summary doesn't use (trip types, tags, riders, money, and destinations), see loadMileage()
+        def UniqueRiderInit(trip):
+            if trip.name not in report_day.riders:
+                report_day.riders[trip.name] = Report.UniqueRiderSummary.RiderDay(trip.name)
 
-        # make sure our pre-defined tags get placed first in the final list
-        for i in Report.ReportSummary.query_tags:
-            self.all_vehicles.tags[i.name] = Report.TripCount()
+            rider = report_day.riders[trip.name]
+            rider.has_trips = True
+            rider.elderly = trip.elderly
+            rider.ambulatory = trip.ambulatory
 
-        self.vehicle_reports = []
-        for vehicle in self.filtered_vehicles:
-            vehicle_report = Report.ReportOutputVehicles()
-            vehicle_report.vehicle = vehicle
-            self.vehicle_reports.append(vehicle_report)
+            return rider
 
-        self.driver_reports = []
-        for driver in self.filtered_drivers:
-            driver_report = Report.ReportOutputDrivers()
-            driver_report.driver = driver
-            self.driver_reports.append(driver_report)
+        perf_start = perf_counter()
 
-        def UniqueRiderInit(trip):
-            if trip.name not in self.unique_riders.names:
-                self.unique_riders.names[trip.name] = Report.UniqueRiderSummary.Rider(trip.name)
+        report_day = Report.ReportDay(self.context)
+        report_day.all.type = Report.ReportSummary.TYPE_LOGGED
+        report_day.date = day_date
+        report_errors = report_day.report_errors
 
-            rider = self.unique_riders.names[trip.name]
-            rider.elderly = trip.elderly
-            rider.ambulatory = trip.ambulatory
+        for i in day_shifts:
+            if driver_id == None:
+                if i.driver and not i.driver.is_logged:
+                    # skip non-logged drivers
+                    continue
+            elif i.driver:
+                if i.driver.id != driver_id:
+                    continue
 
-            if trip.name in client_dict:
-                client = client_dict[trip.name]
+            empty_log = False
+            log_status = i.check_log()
+            if log_status != Shift.LOG_COMPLETE or i.driver == None or i.vehicle == None:
+                # skip incomplete shift
+                if log_status == Shift.LOG_INCOMPLETE:
+                    report_errors.add(day_date, daily_log_shift, report_errors.SHIFT_INCOMPLETE, error_shift=i)
+                # don't skip the shift if fuel is entered, but the rest of the log is empty
+                # (shifts whose driver or vehicle was deleted are still skipped, since they can't be totaled)
+                if not (i.fuel and log_status == Shift.LOG_EMPTY and i.driver != None and i.vehicle != None):
+                    continue
+                else:
+                    empty_log = True
 
-                rider.client_id = client.id
-                rider.staff = client.staff
+            report_shift = Report.ReportShift()
+            report_shift.shift = i
 
-                if trip.elderly == None or trip.ambulatory == None:
-                    # try to get info from Clients
-                    if rider.elderly == None:
-                        rider.elderly = client.elderly
-                    if rider.ambulatory == None:
-                        rider.ambulatory = client.ambulatory
+            if not empty_log:
+                if report_shift.start_miles.setFromString(i.start_miles) != 0:
+                    report_errors.add(day_date, daily_log_shift, report_errors.SHIFT_PARSE, error_shift=i)
 
-            return rider
+                if report_shift.start_time.setFromString(i.start_time) != 0:
+                    report_errors.add(day_date, daily_log_shift, report_errors.SHIFT_PARSE, error_shift=i)
 
-        for day_date in all_dates_dict:
-            report_day = Report.ReportDay()
-            report_day.all.type = Report.ReportSummary.TYPE_LOGGED
-            report_day.date = day_date
-
-            for i in all_dates_dict[day_date][0]:
-                if driver_id == None:
-                    if i.driver and not i.driver.is_logged:
-                        # skip non-logged drivers
-                        continue
-                elif i.driver:
-                    if i.driver.id != driver_id:
-                        continue
-
-                empty_log = False
-                log_status = i.check_log()
-                if log_status != Shift.LOG_COMPLETE or i.driver == None or i.vehicle == None:
-                    # skip incomplete shift
-                    if log_status == Shift.LOG_INCOMPLETE:
-                        self.report_errors.add(day_date, daily_log_shift, self.report_errors.SHIFT_INCOMPLETE, error_shift=i)
-                    # don't skip the shift if fuel is entered, but the rest of the log is empty
-                    if not (i.fuel and log_status == Shift.LOG_EMPTY):
-                        continue
-                    else:
-                        empty_log = True
+                if report_shift.end_miles.setFromString(i.end_miles) != 0:
+                    report_errors.add(day_date, daily_log_shift, report_errors.SHIFT_PARSE, error_shift=i)
 
-                report_shift = Report.ReportShift()
-                report_shift.shift = i
+                if report_shift.end_time.setFromString(i.end_time) != 0:
+                    report_errors.add(day_date, daily_log_shift, report_errors.SHIFT_PARSE, error_shift=i)
 
-                if not empty_log:
-                    if report_shift.start_miles.setFromString(i.start_miles) != 0:
-                        self.report_errors.add(day_date, daily_log_shift, self.report_errors.SHIFT_PARSE, error_shift=i)
+                if report_shift.start_miles > report_shift.end_miles:
+                    report_errors.add(day_date, daily_log_shift, report_errors.SHIFT_MILES_LESS, error_shift=i)
+                    report_shift.end_miles = report_shift.start_miles
 
-                    if report_shift.start_time.setFromString(i.start_time) != 0:
-                        self.report_errors.add(day_date, daily_log_shift, self.report_errors.SHIFT_PARSE, error_shift=i)
+                if report_shift.start_time > report_shift.end_time:
+                    report_errors.add(day_date, daily_log_shift, report_errors.SHIFT_TIME_LESS, error_shift=i)
+                    report_shift.end_time = report_shift.start_time
 
-                    if report_shift.end_miles.setFromString(i.end_miles) != 0:
-                        self.report_errors.add(day_date, daily_log_shift, self.report_errors.SHIFT_PARSE, error_shift=i)
+                if report_shift.end_miles.value - report_shift.start_miles.value > Report.service_mile_warning_threshold:
+                    report_errors.add(day_date, daily_log_shift, report_errors.SHIFT_SERVICE_MILE_THRESHOLD, error_shift=i)
 
-                    if report_shift.end_time.setFromString(i.end_time) != 0:
-                        self.report_errors.add(day_date, daily_log_shift, self.report_errors.SHIFT_PARSE, error_shift=i)
+            if report_shift.fuel.setFromString(i.fuel) != 0:
+                report_errors.add(day_date, daily_log_shift, report_errors.SHIFT_PARSE, error_shift=i)
 
-                    if report_shift.start_miles > report_shift.end_miles:
-                        self.report_errors.add(day_date, daily_log_shift, self.report_errors.SHIFT_MILES_LESS, error_shift=i)
-                        report_shift.end_miles = report_shift.start_miles
+            report_day.shifts.append(report_shift)
 
-                    if report_shift.start_time > report_shift.end_time:
-                        self.report_errors.add(day_date, daily_log_shift, self.report_errors.SHIFT_TIME_LESS, error_shift=i)
-                        report_shift.end_time = report_shift.start_time
+        # shifts are looked up by (driver, vehicle) and by vehicle, with their mileage strings and values parsed once
+        shift_index_by_driver = {}
+        shift_index_by_vehicle = {}
+        shift_miles = []
 
-                    if report_shift.end_miles.value - report_shift.start_miles.value > Report.service_mile_warning_threshold:
-                        self.report_errors.add(day_date, daily_log_shift, self.report_errors.SHIFT_SERVICE_MILE_THRESHOLD, error_shift=i)
+        def ShiftIndexAdd(shift_index):
+            report_shift = report_day.shifts[shift_index]
+            if not report_shift.shift:
+                shift_miles.append(None)
+                return
 
-                if report_shift.fuel.setFromString(i.fuel) != 0:
-                    self.report_errors.add(day_date, daily_log_shift, self.report_errors.SHIFT_PARSE, error_shift=i)
+            shift_index_by_driver.setdefault((report_shift.shift.driver_id, report_shift.shift.vehicle_id), []).append(shift_index)
+            shift_index_by_vehicle.setdefault(report_shift.shift.vehicle_id, []).append(shift_index)
+            shift_miles.append((str(report_shift.start_miles), str(report_shift.end_miles), report_shift.start_miles.value, report_shift.end_miles.value))
 
-                report_day.shifts.append(report_shift)
+        def ShiftMilesMatch(shift_index, trip_miles):
+            miles = shift_miles[shift_index]
+            for base in (miles[0], miles[1]):
+                value = Report.Mileage.mergeValue(base, trip_miles)
+                if not (value < miles[2] or value > miles[3]):
+                    return True
+            return False
+
+        for j in range(0, len(report_day.shifts)):
+            ShiftIndexAdd(j)
 
-            for i in all_dates_dict[day_date][1]:
-                if i.status == Trip.STATUS_NO_SHOW:
-                    rider = UniqueRiderInit(i)
-                    rider.trips_no_show.addTrips(1, i.passenger)
+        for i in day_trips:
+            if i.status == Trip.STATUS_NO_SHOW:
+                rider = UniqueRiderInit(i)
+                rider.trips_no_show.addTrips(1, i.passenger)
+                continue
+            elif i.status == Trip.STATUS_CANCELED:
+                rider = UniqueRiderInit(i)
+                cancel_status = i.check_cancel_date()
+                if cancel_status == 3:
+                    rider.trips_canceled_very_late.addTrips(1, i.passenger)
+                elif cancel_status == 2:
+                    rider.trips_canceled_late.addTrips(1, i.passenger)
+                continue
+
+            if not i.driver and not i.vehicle:
+                continue
+
+            log_status = i.check_log()
+
+            if driver_id == None:
+                if i.driver and not i.driver.is_logged:
+                    # skip non-logged drivers
                     continue
-                elif i.status == Trip.STATUS_CANCELED:
-                    rider = UniqueRiderInit(i)
-                    cancel_status = i.check_cancel_date()
-                    if cancel_status == 3:
-                        rider.trips_canceled_very_late.addTrips(1, i.passenger)
-                    elif cancel_status == 2:
-                        rider.trips_canceled_late.addTrips(1, i.passenger)
+            elif i.driver:
+                if i.driver.id != driver_id:
                     continue
 
-                if not i.driver and not i.vehicle:
-                    continue
+            # skip trip with no driver/vehicle
+            if (i.driver and not i.vehicle) or (not i.driver and i.vehicle):
+                report_errors.add(day_date, daily_log_shift, report_errors.TRIP_INCOMPLETE, error_trip=i)
+                continue
 
-                log_status = i.check_log()
+            report_trip = Report.ReportTrip()
+            report_trip.trip = i
 
-                if driver_id == None:
-                    if i.driver and not i.driver.is_logged:
-                        # skip non-logged drivers
-                        continue
-                elif i.driver:
-                    if i.driver.id != driver_id:
-                        continue
+            perf_start = self.profile.add('build_days', perf_start)
 
-                # skip trip with no driver/vehicle
-                if (i.driver and not i.vehicle) or (not i.driver and i.vehicle):
-                    self.report_errors.add(day_date, daily_log_shift, self.report_errors.TRIP_INCOMPLETE, error_trip=i)
-                    continue
+            # find shift attempt 1: match driver and vehicle
+            matched_shifts = shift_index_by_driver.get((i.driver_id, i.vehicle_id), [])
 
-                report_trip = Report.ReportTrip()
-                report_trip.trip = i
-
-                matched_shifts = []
-
-                # find shift attempt 1: match driver and vehicle
-                for j in range(0, len(report_day.shifts)):
-                    if report_day.shifts[j].shift and i.driver == report_day.shifts[j].shift.driver and i.vehicle == report_day.shifts[j].shift.vehicle:
-                        matched_shifts.append(j)
-
-                # find shift attempt 2: match vehicle
-                if len(matched_shifts) == 0:
-                    for j in range(0, len(report_day.shifts)):
-                        if report_day.shifts[j].shift and i.vehicle == report_day.shifts[j].shift.vehicle:
-                            matched_shifts.append(j)
-
-                # if there are multiple matching shifts, find the first one that the trip mileage fits in to
-                # TODO should time also be considered?
-                if len(matched_shifts) > 1 and log_status == Trip.LOG_COMPLETE:
-                    for match in matched_shifts:
-                        test_shift = report_day.shifts[match]
-
-                        start_miles = Report.Mileage()
-                        start_miles.mergeStrings(str(test_shift.start_miles), i.start_miles)
-                        if start_miles < test_shift.start_miles or start_miles > test_shift.end_miles:
-                            start_miles.mergeStrings(str(test_shift.end_miles), i.start_miles)
-                            if start_miles < test_shift.start_miles or start_miles > test_shift.end_miles:
-                                continue
-
-                        end_miles = Report.Mileage()
-                        end_miles.mergeStrings(str(test_shift.start_miles), i.end_miles)
-                        if end_miles < test_shift.start_miles or end_miles > test_shift.end_miles:
-                            end_miles.mergeStrings(str(test_shift.end_miles), i.end_miles)
-                            if end_miles < test_shift.start_miles or end_miles > test_shift.end_miles:
-                                continue
+            # find shift attempt 2: match vehicle
+            if len(matched_shifts) == 0:
+                matched_shifts = shift_index_by_vehicle.get(i.vehicle_id, [])
 
+            # if there are multiple matching shifts, find the first one that the trip mileage fits in to
+            # TODO should time also be considered?
+            if len(matched_shifts) > 1 and log_status == Trip.LOG_COMPLETE:
+                for match in matched_shifts:
+                    if ShiftMilesMatch(match, i.start_miles) and ShiftMilesMatch(match, i.end_miles):
                         report_trip.shift = match
                         break
-                elif len(matched_shifts) == 1:
-                    report_trip.shift = matched_shifts[0]
-
-                # find shift attempt 3: create a dummy shift (or skip the trip if the vehicle is logged)
-                if report_trip.shift == None:
-                    if i.vehicle.is_logged:
-                        if log_status != Trip.LOG_EMPTY:
-                            self.report_errors.add(day_date, daily_log_shift, self.report_errors.TRIP_NO_SHIFT, error_trip=i)
-                        continue
-                    else:
-                        dummy_shift = Report.ReportShift()
-                        dummy_shift.shift = Shift()
-                        dummy_shift.driver = dummy_shift.shift.driver = i.driver
-                        dummy_shift.vehicle = dummy_shift.shift.vehicle = i.vehicle
-                        report_day.shifts.append(dummy_shift)
-                        report_trip.shift = len(report_day.shifts)-1
-
-                # TODO could report_trip.shift be None here?
-                shift = report_day.shifts[report_trip.shift]
-
-                # skip incomplete trip (logged vehicles only)
-                if i.vehicle.is_logged and log_status == Trip.LOG_INCOMPLETE:
-                    self.report_errors.add(day_date, daily_log_shift, self.report_errors.TRIP_INCOMPLETE, error_shift=shift.shift, error_trip=i)
-                    continue
-                elif i.vehicle.is_logged and log_status == Trip.LOG_EMPTY and shift.shift.check_log() == Shift.LOG_COMPLETE:
-                    self.report_errors.add(day_date, daily_log_shift, self.report_errors.TRIP_EMPTY, error_shift=shift.shift, error_trip=i)
+            elif len(matched_shifts) == 1:
+                report_trip.shift = matched_shifts[0]
+
+            # find shift attempt 3: create a dummy shift (or skip the trip if the vehicle is logged)
+            if report_trip.shift == None:
+                if i.vehicle.is_logged:
+                    if log_status != Trip.LOG_EMPTY:
+                        report_errors.add(day_date, daily_log_shift, report_errors.TRIP_NO_SHIFT, error_trip=i)
                     continue
+                else:
+                    dummy_shift = Report.ReportShift()
+                    dummy_shift.shift = Report.ShiftRecord(driver_id=i.driver_id, vehicle_id=i.vehicle_id)
+                    dummy_shift.driver = dummy_shift.shift.driver = i.driver
+                    dummy_shift.vehicle = dummy_shift.shift.vehicle = i.vehicle
+                    report_day.shifts.append(dummy_shift)
+                    report_trip.shift = len(report_day.shifts)-1
+                    ShiftIndexAdd(report_trip.shift)
+
+            perf_start = self.profile.add('shift_matching', perf_start)
+
+            # TODO could report_trip.shift be None here?
+            shift = report_day.shifts[report_trip.shift]
+
+            # skip incomplete trip (logged vehicles only)
+            if i.vehicle.is_logged and log_status == Trip.LOG_INCOMPLETE:
+                report_errors.add(day_date, daily_log_shift, report_errors.TRIP_INCOMPLETE, error_shift=shift.shift, error_trip=i)
+                continue
+            elif i.vehicle.is_logged and log_status == Trip.LOG_EMPTY and shift.shift.check_log() == Shift.LOG_COMPLETE:
+                report_errors.add(day_date, daily_log_shift, report_errors.TRIP_EMPTY, error_shift=shift.shift, error_trip=i)
+                continue
 
-                if log_status == Trip.LOG_COMPLETE and report_day.shifts[report_trip.shift].shift.check_log() == Shift.LOG_COMPLETE:
-                    parse_error = False
+            if log_status == Trip.LOG_COMPLETE and report_day.shifts[report_trip.shift].shift.check_log() == Shift.LOG_COMPLETE:
+                parse_error = False
 
-                    if report_trip.start_miles.mergeStrings(str(shift.start_miles), i.start_miles) != 0:
-                        parse_error = True
+                if report_trip.start_miles.mergeStrings(str(shift.start_miles), i.start_miles) != 0:
+                    parse_error = True
 
-                    if report_trip.start_time.setFromString(i.start_time) != 0:
-                        parse_error = True
+                if report_trip.start_time.setFromString(i.start_time) != 0:
+                    parse_error = True
 
-                    if report_trip.end_miles.mergeStrings(str(shift.start_miles), i.end_miles) != 0:
-                        parse_error = True
+                if report_trip.end_miles.mergeStrings(str(shift.start_miles), i.end_miles) != 0:
+                    parse_error = True
 
-                    if report_trip.end_time.setFromString(i.end_time) != 0:
-                        parse_error = True
+                if report_trip.end_time.setFromString(i.end_time) != 0:
+                    parse_error = True
 
-                    if parse_error:
-                        self.report_errors.add(day_date, daily_log_shift, self.report_errors.TRIP_PARSE, error_shift=shift.shift, error_trip=i)
+                if parse_error:
+                    report_errors.add(day_date, daily_log_shift, report_errors.TRIP_PARSE, error_shift=shift.shift, error_trip=i)
 
-                    # check for trip errors
-                    # TODO the above execptions add errors to the report without adding the trip to the various trip counts
-                    # BUT, the below errors still count the trips where possible. Not sure which is preferable, but it's probably bad that both behaviors exist?
-                    # NOTE For mileage, we also check for validity by comparing against merges of shift *end* mileage and trip mileage.
+                # check for trip errors
+                # TODO the above execptions add errors to the report without adding the trip to the various trip counts
+                # BUT, the below errors still count the trips where possible. Not sure which is preferable, but it's probably bad that both behaviors exist?
+                # NOTE For mileage, we also check for validity by comparing against merges of shift *end* mileage and trip mileage.
 
-                    # mileage error checking
-                    if report_trip.start_miles < shift.start_miles or report_trip.start_miles > shift.end_miles or report_trip.end_miles < shift.start_miles or report_trip.end_miles > shift.end_miles:
-                        # out-of-bounds
-                        mile_error = False
+                # mileage error checking
+                if report_trip.start_miles < shift.start_miles or report_trip.start_miles > shift.end_miles or report_trip.end_miles < shift.start_miles or report_trip.end_miles > shift.end_miles:
+                    # out-of-bounds
+                    mile_error = False
 
-                        # start mileage
-                        if report_trip.start_miles < shift.start_miles or report_trip.start_miles > shift.end_miles:
-                            mile_error = False
-                            if report_trip.start_miles.mergeStrings(str(shift.end_miles), i.start_miles) == 0:
-                                if report_trip.start_miles < shift.start_miles or report_trip.start_miles > shift.end_miles:
-                                    mile_error = True
-                            else:
-                                mile_error = True
-                            if mile_error:
-                                report_trip.start_miles = shift.start_miles
-
-                        # end mileage
-                        if report_trip.end_miles < shift.start_miles or report_trip.end_miles > shift.end_miles:
-                            mile_error = False
-                            if report_trip.end_miles.mergeStrings(str(shift.end_miles), i.end_miles) == 0:
-                                if report_trip.end_miles < shift.start_miles or report_trip.end_miles > shift.end_miles:
-                                    mile_error = True
-                            else:
+                    # start mileage
+                    if report_trip.start_miles < shift.start_miles or report_trip.start_miles > shift.end_miles:
+                        mile_error = False
+                        if report_trip.start_miles.mergeStrings(str(shift.end_miles), i.start_miles) == 0:
+                            if report_trip.start_miles < shift.start_miles or report_trip.start_miles > shift.end_miles:
                                 mile_error = True
-                            if mile_error:
-                                report_trip.end_miles = shift.end_miles
-
+                        else:
+                            mile_error = True
                         if mile_error:
-                            self.report_errors.add(day_date, daily_log_shift, self.report_errors.TRIP_MILES_OOB, error_shift=shift.shift, error_trip=i)
-                    # end > start
-                    elif report_trip.start_miles > report_trip.end_miles:
+                            report_trip.start_miles = shift.start_miles
+
+                    # end mileage
+                    if report_trip.end_miles < shift.start_miles or report_trip.end_miles > shift.end_miles:
                         mile_error = False
                         if report_trip.end_miles.mergeStrings(str(shift.end_miles), i.end_miles) == 0:
-                            if report_trip.start_miles > report_trip.end_miles or report_trip.end_miles > shift.end_miles:
+                            if report_trip.end_miles < shift.start_miles or report_trip.end_miles > shift.end_miles:
                                 mile_error = True
                         else:
                             mile_error = True
                         if mile_error:
-                            report_trip.start_miles = shift.start_miles
-                            report_trip.end_miles = shift.start_miles
-                            self.report_errors.add(day_date, daily_log_shift, self.report_errors.TRIP_MILES_LESS, error_shift=shift.shift, error_trip=i)
-
-                    # time error checking
-                    if report_trip.start_time and shift.start_time and report_trip.end_time and shift.end_time:
-                        # out-of-bounds
-                        if report_trip.start_time < shift.start_time or report_trip.end_time > shift.end_time:
-                            self.report_errors.add(day_date, daily_log_shift, self.report_errors.TRIP_TIME_OOB, error_shift=shift.shift, error_trip=i)
-                            if report_trip.start_time < shift.start_time:
-                                report_trip.start_time = shift.start_time
-                            if report_trip.end_time > shift.end_time:
-                                report_trip.end_time = shift.end_time
-                        # end > start
-                        elif report_trip.start_time > report_trip.end_time:
-                            self.report_errors.add(day_date, daily_log_shift, self.report_errors.TRIP_TIME_LESS, error_shift=shift.shift, error_trip=i)
+                            report_trip.end_miles = shift.end_miles
+
+                    if mile_error:
+                        report_errors.add(day_date, daily_log_shift, report_errors.TRIP_MILES_OOB, error_shift=shift.shift, error_trip=i)
+                # end > start
+                elif report_trip.start_miles > report_trip.end_miles:
+                    mile_error = False
+                    if report_trip.end_miles.mergeStrings(str(shift.end_miles), i.end_miles) == 0:
+                        if report_trip.start_miles > report_trip.end_miles or report_trip.end_miles > shift.end_miles:
+                            mile_error = True
+                    else:
+                        mile_error = True
+                    if mile_error:
+                        report_trip.start_miles = shift.start_miles
+                        report_trip.end_miles = shift.start_miles
+                        report_errors.add(day_date, daily_log_shift, report_errors.TRIP_MILES_LESS, error_shift=shift.shift, error_trip=i)
+
+                # time error checking
+                if report_trip.start_time and shift.start_time and report_trip.end_time and shift.end_time:
+                    # out-of-bounds
+                    if report_trip.start_time < shift.start_time or report_trip.end_time > shift.end_time:
+                        report_errors.add(day_date, daily_log_shift, report_errors.TRIP_TIME_OOB, error_shift=shift.shift, error_trip=i)
+                        if report_trip.start_time < shift.start_time:
                             report_trip.start_time = shift.start_time
-                            report_trip.end_time = shift.start_time
+                        if report_trip.end_time > shift.end_time:
+                            report_trip.end_time = shift.end_time
+                    # end > start
+                    elif report_trip.start_time > report_trip.end_time:
+                        report_errors.add(day_date, daily_log_shift, report_errors.TRIP_TIME_LESS, error_shift=shift.shift, error_trip=i)
+                        report_trip.start_time = shift.start_time
+                        report_trip.end_time = shift.start_time
 
-                report_trip.trip_type = i.trip_type
-                report_trip.collected_cash = Report.Money(i.collected_cash)
-                report_trip.collected_check = Report.Money(i.collected_check)
+            report_day.trips.append(report_trip)
 
-                report_day.collected_cash += report_trip.collected_cash
-                report_day.collected_check += report_trip.collected_check
-                report_day.total_payments += report_trip.collected_cash + report_trip.collected_check
+            if log_status == Trip.LOG_COMPLETE:
+                if shift.start_trip == None or report_trip.start_miles < report_day.trips[shift.start_trip].start_miles:
+                    report_day.shifts[report_trip.shift].start_trip = len(report_day.trips) - 1;
 
-                report_day.total_fares += Report.Money(i.fare)
+                if shift.end_trip == None or report_trip.end_miles > report_day.trips[shift.end_trip].end_miles:
+                    report_day.shifts[report_trip.shift].end_trip = len(report_day.trips) - 1;
 
-                report_trip.other_employment = i.check_tag('Employment')
+            if mileage_only:
+                continue
 
-                report_day.trips.append(report_trip)
+            report_trip.trip_type = i.trip_type
+            report_trip.collected_cash = Report.Money(i.collected_cash)
+            report_trip.collected_check = Report.Money(i.collected_check)
 
-                if i.trip_type and i.trip_type.is_trip_counted:
-                    self.weekday_totals[day_date.weekday()].addTrips(1, i.passenger)
+            report_day.collected_cash += report_trip.collected_cash
+            report_day.collected_check += report_trip.collected_check
+            report_day.total_payments += report_trip.collected_cash + report_trip.collected_check
 
-                if log_status == Trip.LOG_COMPLETE:
-                    if shift.start_trip == None or report_trip.start_miles < report_day.trips[shift.start_trip].start_miles:
-                        report_day.shifts[report_trip.shift].start_trip = len(report_day.trips) - 1;
+            report_day.total_fares += Report.Money(i.fare)
 
-                    if shift.end_trip == None or report_trip.end_miles > report_day.trips[shift.end_trip].end_miles:
-                        report_day.shifts[report_trip.shift].end_trip = len(report_day.trips) - 1;
+            report_trip.other_employment = i.check_tag('Employment')
 
+            if i.trip_type and i.trip_type.is_trip_counted:
+                report_day.weekday_trips.addTrips(1, i.passenger)
 
-                if daily_log_shift == None or (daily_log_shift != None and daily_log_shift == shift.shift.id):
-                    # add money trip
-                    if i.collected_cash > 0 or i.collected_check > 0:
-                        self.money_trips.append(report_trip)
-                        self.money_trips_summary.collected_cash += report_trip.collected_cash
-                        self.money_trips_summary.collected_check += report_trip.collected_check
 
-                    # add unique rider
-                    rider = UniqueRiderInit(i)
+            if daily_log_shift == None or (daily_log_shift != None and daily_log_shift == shift.shift.id):
+                # add money trip
+                if i.collected_cash > 0 or i.collected_check > 0:
+                    report_day.money_trips.append(report_trip)
 
-                    rider.trips.addTrips(1, i.passenger)
-                    rider.total_fares += Report.Money(i.fare)
-                    rider.collected_cash += Report.Money(i.collected_cash)
-                    rider.collected_check += Report.Money(i.collected_check)
+                # add unique rider
+                rider = UniqueRiderInit(i)
 
-                if i.tags != "":
-                    report_trip.tags = i.get_tag_list()
+                rider.trips.addTrips(1, i.passenger)
+                rider.total_fares += Report.Money(i.fare)
+                rider.collected_cash += Report.Money(i.collected_cash)
+                rider.collected_check += Report.Money(i.collected_check)
 
-                # add destination to frequent destinations
-                if i.destination in destination_dict:
-                    if i.destination not in self.frequent_destinations:
-                        self.frequent_destinations[i.destination] = Report.FrequentDestination()
-                        self.frequent_destinations[i.destination].address = i.destination
-                    self.frequent_destinations[i.destination].trips.addTrips(1, i.passenger)
-                    if log_status == Trip.LOG_COMPLETE:
-                        self.frequent_destinations[i.destination].averageMiles(report_trip.end_miles.value - report_trip.start_miles.value)
+            if i.tags != "":
+                report_trip.tags = i.get_tag_list()
 
-            # handle payments from Clients that didn't ride (so far)
-            for i in all_dates_dict[day_date][2]:
-                report_day.paid_cash += Report.Money(i.money_cash)
-                report_day.paid_check += Report.Money(i.money_check)
+            # add destination to frequent destinations
+            # NOTE the average mileage is order-dependent, so we keep the list of trip mileage until the day is merged
+            if i.destination not in report_day.destinations:
+                report_day.destinations[i.destination] = {'trips': Report.TripCount(), 'miles': []}
+            report_day.destinations[i.destination]['trips'].addTrips(1, i.passenger)
+            if log_status == Trip.LOG_COMPLETE:
+                report_day.destinations[i.destination]['miles'].append(report_trip.end_miles.value - report_trip.start_miles.value)
 
-                if i.parent.name not in self.unique_riders.names:
-                    self.unique_riders.names[i.parent.name] = Report.UniqueRiderSummary.Rider(i.parent.name)
-                    rider = self.unique_riders.names[i.parent.name]
-                    rider.elderly = i.parent.elderly
-                    rider.ambulatory = i.parent.ambulatory
-                    rider.client_id = i.parent.id
-                else:
-                    rider = self.unique_riders.names[i.parent.name]
+        # handle payments from Clients that didn't ride (so far)
+        for i in day_payments:
+            report_day.paid_cash += Report.Money(i.money_cash)
+            report_day.paid_check += Report.Money(i.money_check)
 
-                rider.paid_cash += Report.Money(i.money_cash)
-                rider.paid_check += Report.Money(i.money_check)
+            if i.parent.name not in report_day.riders:
+                report_day.riders[i.parent.name] = Report.UniqueRiderSummary.RiderDay(i.parent.name)
+                report_day.riders[i.parent.name].payment_client_id = i.parent.id
 
-                # create a summary of only non-driver payments
-                payment = Report.ReportPayment()
-                payment.date = i.date_paid
-                payment.id = i.id
-                payment.client = i.parent
-                payment.cash = Report.Money(i.money_cash)
-                payment.check = Report.Money(i.money_check)
-                self.money_payments.append(payment)
-                self.money_payments_summary.cash += payment.cash
-                self.money_payments_summary.check += payment.check
-
-            report_day.total_payments += report_day.paid_cash + report_day.paid_check
-
-            for i in range(0, len(report_day.shifts)):
-                shift = report_day.shifts[i]
-
-                # create dummy trip when a shift has no trips
-                if shift.start_trip == None and shift.end_trip == None:
-                    if len(client_names) > 0:
-                        continue
-                    rt = Report.ReportTrip()
-                    rt.shift = i
-                    rt.start_miles = shift.start_miles
-                    rt.end_miles = shift.end_miles
-                    rt.start_time = shift.start_time
-                    rt.end_time = shift.end_time
-                    report_day.trips.append(rt)
-                    shift.start_trip = len(report_day.trips) - 1
-                    shift.end_trip = shift.start_trip
-                elif shift.start_trip == None or shift.end_trip == None:
-                    # TODO create partial dummy trips?
+            rider = report_day.riders[i.parent.name]
+            rider.paid_cash += Report.Money(i.money_cash)
+            rider.paid_check += Report.Money(i.money_check)
+
+            # create a summary of only non-driver payments
+            payment = Report.ReportPayment()
+            payment.date = i.date_paid
+            payment.id = i.id
+            payment.client = i.parent
+            payment.cash = Report.Money(i.money_cash)
+            payment.check = Report.Money(i.money_check)
+            report_day.money_payments.append(payment)
+
+        report_day.total_payments += report_day.paid_cash + report_day.paid_check
+
+        trips_by_shift = {}
+        for trip in report_day.trips:
+            trips_by_shift.setdefault(trip.shift, []).append(trip)
+
+        for i in range(0, len(report_day.shifts)):
+            shift = report_day.shifts[i]
+
+            # create dummy trip when a shift has no trips
+            if shift.start_trip == None and shift.end_trip == None:
+                if len(client_names) > 0:
                     continue
+                rt = Report.ReportTrip()
+                rt.shift = i
+                rt.start_miles = shift.start_miles
+                rt.end_miles = shift.end_miles
+                rt.start_time = shift.start_time
+                rt.end_time = shift.end_time
+                report_day.trips.append(rt)
+                trips_by_shift.setdefault(i, []).append(rt)
+                shift.start_trip = len(report_day.trips) - 1
+                shift.end_trip = shift.start_trip
+            elif shift.start_trip == None or shift.end_trip == None:
+                # TODO create partial dummy trips?
+                continue
 
-                if daily_log_shift != None and daily_log_shift != shift.shift.id:
+            if daily_log_shift != None and daily_log_shift != shift.shift.id:
+                continue
+
+            service_miles = 0
+            service_hours = 0
+            deadhead_miles = 0
+            deadhead_hours = 0
+            if shift.shift.check_log() == Shift.LOG_COMPLETE:
+                service_miles = shift.end_miles.value - shift.start_miles.value
+                service_hours = (shift.end_time.value - shift.start_time.value).seconds / 60 / 60
+                deadhead_miles = (report_day.trips[shift.start_trip].start_miles.value - shift.start_miles.value) + (shift.end_miles.value - report_day.trips[shift.end_trip].end_miles.value)
+                deadhead_hours = ((report_day.trips[shift.start_trip].start_time.value - shift.start_time.value).seconds + (shift.end_time.value - report_day.trips[shift.end_trip].end_time.value).seconds) / 60 / 60
+
+            # per-vehicle and per-driver logs
+            vehicle_index = self.getVehicleIndex(shift.shift.vehicle)
+            driver_index = self.getDriverIndex(shift.shift.driver)
+
+            if not report_day.by_vehicle[vehicle_index]:
+                report_day.by_vehicle[vehicle_index] = Report.ReportSummary(self.context)
+
+            if not report_day.by_driver[driver_index]:
+                report_day.by_driver[driver_index] = Report.ReportSummary(self.context)
+
+            if not shift.shift.vehicle.is_logged:
+                report_day.by_vehicle[vehicle_index].type = Report.ReportSummary.TYPE_NONLOGGED
+
+            report_day.by_vehicle[vehicle_index].service_miles += service_miles
+            report_day.by_vehicle[vehicle_index].service_hours += service_hours
+            report_day.by_vehicle[vehicle_index].deadhead_miles += deadhead_miles
+            report_day.by_vehicle[vehicle_index].deadhead_hours += deadhead_hours
+            report_day.by_vehicle[vehicle_index].total_miles += service_miles + deadhead_miles
+            report_day.by_vehicle[vehicle_index].total_hours += service_hours + deadhead_hours
+            report_day.by_vehicle[vehicle_index].fuel += shift.fuel.value
+
+            report_day.by_driver[driver_index].service_miles += service_miles
+            report_day.by_driver[driver_index].service_hours += service_hours
+            report_day.by_driver[driver_index].deadhead_miles += deadhead_miles
+            report_day.by_driver[driver_index].deadhead_hours += deadhead_hours
+            report_day.by_driver[driver_index].total_miles += service_miles + deadhead_miles
+            report_day.by_driver[driver_index].total_hours += service_hours + deadhead_hours
+            report_day.by_driver[driver_index].fuel += shift.fuel.value
+            for trip in trips_by_shift.get(i, []):
+                report_day.by_vehicle[vehicle_index].pmt += trip.end_miles.value - trip.start_miles.value
+                report_day.by_driver[driver_index].pmt += trip.end_miles.value - trip.start_miles.value
+                if mileage_only:
                     continue
-                
-                service_miles = 0
-                service_hours = 0
-                deadhead_miles = 0
-                deadhead_hours = 0
-                if shift.shift.check_log() == Shift.LOG_COMPLETE:
-                    service_miles = shift.end_miles.value - shift.start_miles.value
-                    service_hours = (shift.end_time.value - shift.start_time.value).seconds / 60 / 60
-                    deadhead_miles = (report_day.trips[shift.start_trip].start_miles.value - shift.start_miles.value) + (shift.end_miles.value - report_day.trips[shift.end_trip].end_miles.value)
-                    deadhead_hours = ((report_day.trips[shift.start_trip].start_time.value - shift.start_time.value).seconds + (shift.end_time.value - report_day.trips[shift.end_trip].end_time.value).seconds) / 60 / 60
-
-                # per-vehicle and per-driver logs
-                vehicle_index = Report.getVehicleIndex(shift.shift.vehicle)
-                driver_index = Report.getDriverIndex(shift.shift.driver)
-
-                if not report_day.by_vehicle[vehicle_index]:
-                    report_day.by_vehicle[vehicle_index] = Report.ReportSummary()
-
-                if not report_day.by_driver[driver_index]:
-                    report_day.by_driver[driver_index] = Report.ReportSummary()
-
-                if not shift.shift.vehicle.is_logged:
-                    report_day.by_vehicle[vehicle_index].type = Report.ReportSummary.TYPE_NONLOGGED
-
-                report_day.by_vehicle[vehicle_index].service_miles += service_miles
-                report_day.by_vehicle[vehicle_index].service_hours += service_hours
-                report_day.by_vehicle[vehicle_index].deadhead_miles += deadhead_miles
-                report_day.by_vehicle[vehicle_index].deadhead_hours += deadhead_hours
-                report_day.by_vehicle[vehicle_index].total_miles += service_miles + deadhead_miles
-                report_day.by_vehicle[vehicle_index].total_hours += service_hours + deadhead_hours
-                report_day.by_vehicle[vehicle_index].fuel += shift.fuel.value
-
-                report_day.by_driver[driver_index].service_miles += service_miles
-                report_day.by_driver[driver_index].service_hours += service_hours
-                report_day.by_driver[driver_index].deadhead_miles += deadhead_miles
-                report_day.by_driver[driver_index].deadhead_hours += deadhead_hours
-                report_day.by_driver[driver_index].total_miles += service_miles + deadhead_miles
-                report_day.by_driver[driver_index].total_hours += service_hours + deadhead_hours
-                report_day.by_driver[driver_index].fuel += shift.fuel.value
-                for trip in report_day.trips:
-                    if i != trip.shift:
-                        continue
-                    report_day.by_vehicle[vehicle_index].pmt += trip.end_miles.value - trip.start_miles.value
-                    report_day.by_vehicle[vehicle_index].collected_cash += trip.collected_cash
-                    report_day.by_vehicle[vehicle_index].collected_check += trip.collected_check
-                    report_day.by_vehicle[vehicle_index].total_collected_money += (trip.collected_cash + trip.collected_check)
-                    report_day.by_driver[driver_index].pmt += trip.end_miles.value - trip.start_miles.value
-                    report_day.by_driver[driver_index].collected_cash += trip.collected_cash
-                    report_day.by_driver[driver_index].collected_check += trip.collected_check
-                    report_day.by_driver[driver_index].total_collected_money += (trip.collected_cash + trip.collected_check)
-                    if trip.trip != None:
-                        if trip.trip_type != None and trip.trip_type.is_trip_counted:
-                            report_day.by_vehicle[vehicle_index].trip_types[trip.trip_type].addTrips(1, trip.trip.passenger)
-                            report_day.by_vehicle[vehicle_index].trip_types_total.addTrips(1, trip.trip.passenger)
-                            report_day.by_driver[driver_index].trip_types[trip.trip_type].addTrips(1, trip.trip.passenger)
-                            report_day.by_driver[driver_index].trip_types_total.addTrips(1, trip.trip.passenger)
-                        elif trip.trip_type == None:
-                            report_day.by_vehicle[vehicle_index].trip_types_unknown.addTrips(1, trip.trip.passenger)
-                            report_day.by_vehicle[vehicle_index].trip_types_total.addTrips(1, trip.trip.passenger)
-                            report_day.by_driver[driver_index].trip_types_unknown.addTrips(1, trip.trip.passenger)
-                            report_day.by_driver[driver_index].trip_types_total.addTrips(1, trip.trip.passenger)
-                        if trip.other_employment:
-                            report_day.by_vehicle[vehicle_index].other_employment.addTrips(1, trip.trip.passenger)
-                            report_day.by_driver[driver_index].other_employment.addTrips(1, trip.trip.passenger)
-                        for tag in trip.tags:
-                            if tag in report_day.by_vehicle[vehicle_index].tags:
-                                report_day.by_vehicle[vehicle_index].tags[tag].addTrips(1, trip.trip.passenger)
-                            elif tag != '':
-                                report_day.by_vehicle[vehicle_index].tags[tag] = Report.TripCount()
-                                report_day.by_vehicle[vehicle_index].tags[tag].setTrips(1, trip.trip.passenger)
-                            if tag in report_day.by_driver[driver_index].tags:
-                                report_day.by_driver[driver_index].tags[tag].addTrips(1, trip.trip.passenger)
-                            elif tag != '':
-                                report_day.by_driver[driver_index].tags[tag] = Report.TripCount()
-                                report_day.by_driver[driver_index].tags[tag].setTrips(1, trip.trip.passenger)
-
-                        if trip.trip.name not in report_day.by_vehicle[vehicle_index].unique_riders:
-                            report_day.by_vehicle[vehicle_index].unique_riders.append(trip.trip.name)
-
-                unique_rider_count = len(report_day.by_vehicle[vehicle_index].unique_riders)
-                if unique_rider_count > 0 and unique_rider_count <= 3:
-                    report_day.by_vehicle[vehicle_index].days_of_low_rider_count = 1
-
-            for shift_vehicle in report_day.by_vehicle:
-                if shift_vehicle:
-                    report_day.all += shift_vehicle
-
-            if len(client_names) == 0 or report_day.all.trip_types_total.total > 0:
-                self.report_all.append(report_day)
-
-            for vehicle_report in self.vehicle_reports:
-                if report_day.hasVehicleInShift(vehicle_report.vehicle):
-                    vehicle_index = Report.getVehicleIndex(vehicle_report.vehicle)
-                    if report_day.by_vehicle[vehicle_index] != None:
-                        vehicle_report.totals.type = report_day.by_vehicle[vehicle_index].type
-                        vehicle_report.days.append({'date':report_day.date, 'data': report_day.by_vehicle[vehicle_index]})
-                        vehicle_report.totals += report_day.by_vehicle[vehicle_index]
-                        for shift_iter in report_day.shifts:
-                            if shift_iter.shift and vehicle_report.vehicle.id == shift_iter.shift.vehicle.id:
-                                if vehicle_report.start_miles.empty() or (not vehicle_report.start_miles.empty() and vehicle_report.start_miles > shift_iter.start_miles and shift_iter.start_miles.value != 0):
-                                    vehicle_report.start_miles = shift_iter.start_miles
-                                if vehicle_report.end_miles.empty() or (not vehicle_report.end_miles.empty() and vehicle_report.end_miles < shift_iter.end_miles and shift_iter.end_miles.value != 0):
-                                    vehicle_report.end_miles = shift_iter.end_miles
-            for driver_report in self.driver_reports:
-                if report_day.hasDriverInShift(driver_report.driver):
-                    driver_index = Report.getDriverIndex(driver_report.driver)
-                    if report_day.by_driver[driver_index] != None:
-                        driver_report.days.append({'date':report_day.date, 'data': report_day.by_driver[driver_index]})
-                        driver_report.totals += report_day.by_driver[driver_index]
-
-            if len(client_names) == 0 or report_day.all.trip_types_total.total > 0:
-                if report_day.hasVehicleInShift():
-                    self.total_vehicle_days_of_service += 1
 
+                report_day.by_vehicle[vehicle_index].collected_cash += trip.collected_cash
+                report_day.by_vehicle[vehicle_index].collected_check += trip.collected_check
+                report_day.by_vehicle[vehicle_index].total_collected_money += (trip.collected_cash + trip.collected_check)
+                report_day.by_driver[driver_index].collected_cash += trip.collected_cash
+                report_day.by_driver[driver_index].collected_check += trip.collected_check
+                report_day.by_driver[driver_index].total_collected_money += (trip.collected_cash + trip.collected_check)
+                if trip.trip != None:
+                    if trip.trip_type != None and trip.trip_type.is_trip_counted:
+                        report_day.by_vehicle[vehicle_index].trip_types[trip.trip_type].addTrips(1, trip.trip.passenger)
+                        report_day.by_vehicle[vehicle_index].trip_types_total.addTrips(1, trip.trip.passenger)
+                        report_day.by_driver[driver_index].trip_types[trip.trip_type].addTrips(1, trip.trip.passenger)
+                        report_day.by_driver[driver_index].trip_types_total.addTrips(1, trip.trip.passenger)
+                    elif trip.trip_type == None:
+                        report_day.by_vehicle[vehicle_index].trip_types_unknown.addTrips(1, trip.trip.passenger)
+                        report_day.by_vehicle[vehicle_index].trip_types_total.addTrips(1, trip.trip.passenger)
+                        report_day.by_driver[driver_index].trip_types_unknown.addTrips(1, trip.trip.passenger)
+                        report_day.by_driver[driver_index].trip_types_total.addTrips(1, trip.trip.passenger)
+                    if trip.other_employment:
+                        report_day.by_vehicle[vehicle_index].other_employment.addTrips(1, trip.trip.passenger)
+                        report_day.by_driver[driver_index].other_employment.addTrips(1, trip.trip.passenger)
+                    for tag in trip.tags:
+                        if tag in report_day.by_vehicle[vehicle_index].tags:
+                            report_day.by_vehicle[vehicle_index].tags[tag].addTrips(1, trip.trip.passenger)
+                        elif tag != '':
+                            report_day.by_vehicle[vehicle_index].tags[tag] = Report.TripCount()
+                            report_day.by_vehicle[vehicle_index].tags[tag].setTrips(1, trip.trip.passenger)
+                        if tag in report_day.by_driver[driver_index].tags:
+                            report_day.by_driver[driver_index].tags[tag].addTrips(1, trip.trip.passenger)
+                        elif tag != '':
+                            report_day.by_driver[driver_index].tags[tag] = Report.TripCount()
+                            report_day.by_driver[driver_index].tags[tag].setTrips(1, trip.trip.passenger)
+
+                    if trip.trip.name not in report_day.by_vehicle[vehicle_index].unique_riders:
+                        report_day.by_vehicle[vehicle_index].unique_riders.append(trip.trip.name)
+
+            unique_rider_count = len(report_day.by_vehicle[vehicle_index].unique_riders)
+            if unique_rider_count > 0 and unique_rider_count <= 3:
+                report_day.by_vehicle[vehicle_index].days_of_low_rider_count = 1
+
+        for shift_vehicle in report_day.by_vehicle:
+            if shift_vehicle:
+                report_day.all += shift_vehicle
+
+        self.profile.add('build_days', perf_start)
+        return report_day
+
+    def addDay(self, report_day):
+        perf_start = perf_counter()
+
+        self.days[report_day.date] = report_day
+
+        self.report_errors.errors += report_day.report_errors.errors
+        self.weekday_totals[report_day.date.weekday()].addTripsFromTripCount(report_day.weekday_trips)
+
+        for money_trip in report_day.money_trips:
+            self.money_trips.append(money_trip)
+            self.money_trips_summary.collected_cash += money_trip.collected_cash
+            self.money_trips_summary.collected_check += money_trip.collected_check
+
+        # riders are only added up here, they're matched to Clients once in loadFinish()
+        self.unique_riders.addRiders(report_day.riders)
+
+        for address in report_day.destinations:
+            if address not in self.destination_dict:
+                continue
+            if address not in self.frequent_destinations:
+                self.frequent_destinations[address] = Report.FrequentDestination()
+                self.frequent_destinations[address].address = address
+            self.frequent_destinations[address].trips.addTripsFromTripCount(report_day.destinations[address]['trips'])
+            for miles in report_day.destinations[address]['miles']:
+                self.frequent_destinations[address].averageMiles(miles)
+
+        for payment in report_day.money_payments:
+            self.money_payments.append(payment)
+            self.money_payments_summary.cash += payment.cash
+            self.money_payments_summary.check += payment.check
+
+        if len(self.client_names) == 0 or report_day.all.trip_types_total.total > 0:
+            self.report_all.append(report_day)
+
+        for vehicle_report in self.vehicle_reports:
+            if report_day.hasVehicleInShift(vehicle_report.vehicle):
+                vehicle_index = self.getVehicleIndex(vehicle_report.vehicle)
+                if report_day.by_vehicle[vehicle_index] != None:
+                    vehicle_report.totals.type = report_day.by_vehicle[vehicle_index].type
+                    vehicle_report.days.append({'date':report_day.date, 'data': report_day.by_vehicle[vehicle_index]})
+                    vehicle_report.totals += report_day.by_vehicle[vehicle_index]
+                    for shift_iter in report_day.shifts:
+                        if shift_iter.shift and vehicle_report.vehicle.id == shift_iter.shift.vehicle.id:
+                            if vehicle_report.start_miles.empty() or (not vehicle_report.start_miles.empty() and vehicle_report.start_miles > shift_iter.start_miles and shift_iter.start_miles.value != 0):
+                                vehicle_report.start_miles = shift_iter.start_miles
+                            if vehicle_report.end_miles.empty() or (not vehicle_report.end_miles.empty() and vehicle_report.end_miles < shift_iter.end_miles and shift_iter.end_miles.value != 0):
+                                vehicle_report.end_miles = shift_iter.end_miles
+        for driver_report in self.driver_reports:
+            if report_day.hasDriverInShift(driver_report.driver):
+                driver_index = self.getDriverIndex(driver_report.driver)
+                if report_day.by_driver[driver_index] != None:
+                    driver_report.days.append({'date':report_day.date, 'data': report_day.by_driver[driver_index]})
+                    driver_report.totals += report_day.by_driver[driver_index]
+
+        if len(self.client_names) == 0 or report_day.all.trip_types_total.total > 0:
+            if report_day.hasVehicleInShift():
+                self.total_vehicle_days_of_service += 1
+
+        self.profile.add('summaries', perf_start)
+
+    def matchRiderClient(self, rider):
+        # riders with trips use the Client with the same name, and only fall back to its elderly/ambulatory if their last trips didn't have them
+        # riders with only payments use the Client that made the first payment
+        if rider.has_trips:
+            client = self.client_dict.get(rider.name)
+            if client != None:
+                rider.client_id = client.id
+                rider.staff = client.staff
+                if rider.elderly == None:
+                    rider.elderly = client.elderly
+                if rider.ambulatory == None:
+                    rider.ambulatory = client.ambulatory
+                return
+
+        client = self.client_id_dict.get(rider.payment_client_id)
+        if client != None:
+            rider.client_id = client.id
+            if not rider.has_trips:
+                rider.elderly = client.elderly
+                rider.ambulatory = client.ambulatory
+
+    def loadFinish(self):
+        perf_start = perf_counter()
 
         cleaned_driver_reports = []
         for driver_report in self.driver_reports:
@@ -1092,58 +1750,37 @@ class Report():
             self.total_vehicle_mileage += vehicle_report.total_miles
             self.all_vehicles += vehicle_report.totals
 
-        for rider_name in self.unique_riders.names:
-            rider = self.unique_riders.names[rider_name]
-            # total elderly/ambulatory counts
-            if rider.trips.total > 0:
-                is_passenger = rider.trips.passenger > 0
+        perf_start = self.profile.add('summaries', perf_start)
 
-                self.unique_riders.by_individuals[Report.RIDER_TOTAL_WITH_STAFF].addTrips(1, is_passenger)
-                self.unique_riders.by_trips[Report.RIDER_TOTAL_WITH_STAFF].addTripsFromTripCount(rider.trips)
+        for rider in self.unique_riders.names.values():
+            self.matchRiderClient(rider)
+            self.unique_riders.countRider(rider)
 
-                if rider.staff:
-                    self.unique_riders.by_individuals[Report.RIDER_STAFF].addTrips(1, is_passenger)
-                    self.unique_riders.by_trips[Report.RIDER_STAFF].addTripsFromTripCount(rider.trips)
-                else:
-                    self.unique_riders.by_individuals[Report.RIDER_TOTAL].addTrips(1, is_passenger)
-                    self.unique_riders.by_trips[Report.RIDER_TOTAL].addTripsFromTripCount(rider.trips)
-
-                    if rider.elderly == None or rider.ambulatory == None:
-                        self.unique_riders.by_individuals[Report.RIDER_UNKNOWN].addTrips(1, is_passenger)
-                        self.unique_riders.by_trips[Report.RIDER_UNKNOWN].addTripsFromTripCount(rider.trips)
-                    elif rider.elderly and rider.ambulatory:
-                        self.unique_riders.by_individuals[Report.RIDER_ELDERLY_AMBULATORY].addTrips(1, is_passenger)
-                        self.unique_riders.by_trips[Report.RIDER_ELDERLY_AMBULATORY].addTripsFromTripCount(rider.trips)
-                    elif rider.elderly and not rider.ambulatory:
-                        self.unique_riders.by_individuals[Report.RIDER_ELDERLY_NONAMBULATORY].addTrips(1, is_passenger)
-                        self.unique_riders.by_trips[Report.RIDER_ELDERLY_NONAMBULATORY].addTripsFromTripCount(rider.trips)
-                    elif not rider.elderly and rider.ambulatory:
-                        self.unique_riders.by_individuals[Report.RIDER_NONELDERLY_AMBULATORY].addTrips(1, is_passenger)
-                        self.unique_riders.by_trips[Report.RIDER_NONELDERLY_AMBULATORY].addTripsFromTripCount(rider.trips)
-                    elif not rider.elderly and not rider.ambulatory:
-                        self.unique_riders.by_individuals[Report.RIDER_NONELDERLY_NONAMBULATORY].addTrips(1, is_passenger)
-                        self.unique_riders.by_trips[Report.RIDER_NONELDERLY_NONAMBULATORY].addTripsFromTripCount(rider.trips)
-
-            # calculate total owed money
-            rider.total_payments = rider.collected_cash + rider.collected_check + rider.paid_cash + rider.paid_check
-            if rider.total_payments.value != 0 or rider.total_fares.value != 0:
-                rider.total_owed = rider.total_fares - rider.total_payments
-                if (rider.total_owed.value < 0):
-                    rider.total_owed.value = 0
-
-            self.unique_riders.total_collected_cash += rider.collected_cash
-            self.unique_riders.total_collected_check += rider.collected_check
-            self.unique_riders.total_paid_cash += rider.paid_cash
-            self.unique_riders.total_paid_check += rider.paid_check
-            self.unique_riders.total_total_payments += rider.total_payments
-            self.unique_riders.total_total_fares += rider.total_fares
-            self.unique_riders.total_total_owed += rider.total_owed
+            rider.calculateTotalOwed()
 
-        # sort frequent destinations by total trips
-        self.frequent_destinations = {k: v for k, v in sorted(self.frequent_destinations.items(), key=lambda x: x[1], reverse=True)}
+            self.unique_riders.total_collected_cash.value += rider.collected_cash.value
+            self.unique_riders.total_collected_check.value += rider.collected_check.value
+            self.unique_riders.total_paid_cash.value += rider.paid_cash.value
+            self.unique_riders.total_paid_check.value += rider.paid_check.value
+            self.unique_riders.total_total_payments.value += rider.total_payments.value
+            self.unique_riders.total_total_fares.value += rider.total_fares.value
+            self.unique_riders.total_total_owed.value += rider.total_owed.value
 
         # sort unique riders by name
         self.unique_riders.names = {k: v for k, v in sorted(self.unique_riders.names.items(), key=lambda x: x[0])}
+        perf_start = self.profile.add('unique_riders', perf_start)
+
+        # sort frequent destinations by total trips
+        # only the top REPORT_FREQUENT_DESTINATIONS_LIMIT are listed, the rest are combined in to frequent_destinations_other
+        destinations_limit = settings.REPORT_FREQUENT_DESTINATIONS_LIMIT
+        if destinations_limit > 0 and len(self.frequent_destinations) > destinations_limit:
+            top_destinations = heapq.nlargest(destinations_limit, self.frequent_destinations.items(), key=lambda x: x[1])
+            for k, v in top_destinations:
+                del self.frequent_destinations[k]
+            self.frequent_destinations_other = Report.FrequentDestination.combine(self.frequent_destinations.values())
+            self.frequent_destinations = dict(top_destinations)
+        else:
+            self.frequent_destinations = {k: v for k, v in sorted(self.frequent_destinations.items(), key=lambda x: x[1], reverse=True)}
 
         self.total_money = self.all_vehicles.total_collected_money + self.money_payments_summary.cash + self.money_payments_summary.check
 
@@ -1151,13 +1788,761 @@ class Report():
             if vehicle_report.totals.type == Report.ReportSummary.TYPE_NORMAL:
                 self.total_odometer_miles += vehicle_report.total_miles
 
+        self.profile.add('summaries', perf_start)
+
+    def loadFromRollups(self, date_start, date_end, driver_id=None, client_names=[]):
+        # rollups are only kept for the unfiltered report
+        if driver_id != None or len(client_names) > 0:
+            self.load(date_start, date_end, driver_id=driver_id, client_names=client_names)
+            return
+
+        perf_start = perf_counter()
+        # read before anything is queried, so that rollups built from data that changes during the load aren't saved, see saveRollups()
+        data_versions = ReportDataVersion.getVersions(date_start, date_end)
+        self.loadSetup()
+
+        all_dates = []
+        day_date = date_start
+        while day_date <= date_end:
+            all_dates.append(day_date)
+            day_date += datetime.timedelta(days=1)
+
+        self.profile.engine = 'rollups'
+        perf_stage = perf_counter()
+
+        rollups = list(ReportRollup.objects.filter(date__gte=date_start, date__lte=date_end, version=ReportRollup.VERSION))
+        rollup_summaries = list(ReportRollupSummary.objects.filter(parent__date__gte=date_start, parent__date__lte=date_end, parent__version=ReportRollup.VERSION))
+        self.profile.rows += len(rollups) + len(rollup_summaries)
+        perf_stage = self.profile.add('query', perf_stage)
+
+        rollup_summaries_dict = {}
+        for i in rollup_summaries:
+            if i.parent_id not in rollup_summaries_dict:
+                rollup_summaries_dict[i.parent_id] = []
+            rollup_summaries_dict[i.parent_id].append(i)
+
+        # rollups of dates that have changed since they were built are loaded again
+        rollups_dict = {}
+        for i in rollups:
+            if i.data_version == ReportDataVersion.getDateVersion(data_versions, i.date):
+                rollups_dict[i.date] = (i, rollup_summaries_dict.get(i.id, []))
+        self.profile.add('grouping', perf_stage)
+
+        self.perf_database = perf_counter() - perf_start
+
+        perf_start = perf_counter()
+        all_days = {}
+        missing_dates = []
+        for day_date in all_dates:
+            if day_date not in rollups_dict:
+                missing_dates.append(day_date)
+                continue
+
+            rollup = rollups_dict[day_date]
+            if not rollup[0].has_data:
+                all_days[day_date] = None
+                continue
+
+            perf_day = perf_counter()
+            report_day = self.dayFromRollup(rollup[0], rollup[1])
+            self.profile.add('build_days', perf_day)
+            if report_day == None:
+                # the rollup refers to something that no longer exists
+                missing_dates.append(day_date)
+            else:
+                all_days[day_date] = report_day
+
+        missing_days = self.loadDays(missing_dates)
+        all_days.update(missing_days)
+
+        if len(missing_dates) > 0:
+            perf_stage = perf_counter()
+            Report.saveRollups([self.dayToRollup(i, missing_days[i]) for i in missing_dates], data_versions)
+            self.profile.add('query', perf_stage)
+
+        for day_date in all_dates:
+            if all_days[day_date] != None:
+                self.addDay(all_days[day_date])
+
+        self.loadFinish()
+        self.perf_processing = perf_counter() - perf_start
+
+    def loadDays(self, dates, driver_id=None, client_names=[], filter_by_money=False):
+        # loads the given dates (in order) without adding them to the report, and returns the ReportDays by date, with None for days without any data
+        # the dates are queried in contiguous ranges, the same way as load()
+        all_days = {}
+        range_start = 0
+        for i in range(0, len(dates)):
+            if i + 1 < len(dates) and dates[i + 1] == dates[i] + datetime.timedelta(days=1):
+                continue
+
+            all_dates_dict = self.loadQuery(dates[range_start], dates[i], client_names, filter_by_money)
+            for day_date in dates[range_start:i + 1]:
+                if day_date in all_dates_dict:
+                    day_data = all_dates_dict[day_date]
+                    all_days[day_date] = self.loadDay(day_date, day_data[0], day_data[1], day_data[2], None, driver_id, client_names)
+                else:
+                    all_days[day_date] = None
+            range_start = i + 1
+
+        return all_days
+
+    def loadChanged(self, previous, changed_dates, driver_id=None, client_names=[], filter_by_money=False):
+        # loads the same report as previous, which must have the same range and filters, by reusing its days and only loading changed_dates again
+        # this is how the report page catches up after a trip or shift is edited from it, instead of loading the whole range again
+        # the reused days were built with the drivers, vehicles, and trip types of previous, so it must not be older than the last change that affects every date
+        self.profile.engine = 'changed'
+
+        perf_start = perf_counter()
+        changed_dates = sorted(changed_dates)
+        if len(changed_dates) > 0:
+            data_versions = ReportDataVersion.getVersions(changed_dates[0], changed_dates[-1])
+        self.loadSetup(driver_id, client_names)
+        changed_days = self.loadDays(changed_dates, driver_id, client_names, filter_by_money)
+
+        # the unfiltered report keeps its rollups up to date the same way as loadFromRollups()
+        if driver_id == None and len(client_names) == 0 and not filter_by_money and len(changed_dates) > 0:
+            perf_stage = perf_counter()
+            Report.saveRollups([self.dayToRollup(i, changed_days[i]) for i in changed_dates], data_versions)
+            self.profile.add('query', perf_stage)
+        self.perf_database = perf_counter() - perf_start
+
+        # addDay() only reads the days, so the previous report is left as it was
+        perf_start = perf_counter()
+        for day_date in sorted(set(previous.days).union(changed_days)):
+            report_day = changed_days[day_date] if day_date in changed_days else previous.days[day_date]
+            if report_day != None:
+                self.addDay(report_day)
+
+        self.loadFinish()
         self.perf_processing = perf_counter() - perf_start
 
-    def getVehicleIndex(vehicle):
-        return Report.ReportDay.query_vehicles.index(vehicle)
+    def loadCached(date_start, date_end, driver_id=None, client_names=[], filter_by_money=False, profile=None, mileage_only=False):
+        # returns a loaded Report, reusing a previous one if none of its data has changed since it was loaded
+        # the data version is read before loading, so a change made during the load is caught by the next request
+        # if a Profile is given, the load times are added to it (cached reports are shared, so their own profile is left alone)
+        # mileage_only returns an unfiltered report from loadMileage(), unless the full report is already cached
+        # if only some of the dates have changed since the same report was cached, only those days are loaded again, see loadChanged()
+        if driver_id != None or len(client_names) > 0 or filter_by_money:
+            mileage_only = False
 
-    def getDriverIndex(driver):
-        return Report.ReportDay.query_drivers.index(driver)
+        perf_start = perf_counter()
+        data_versions = ReportDataVersion.getVersions(date_start, date_end)
+        data_version = sum(data_versions.values())
+        cache_key = (date_start, date_end, driver_id, tuple(client_names), filter_by_money, mileage_only)
+        if profile != None:
+            profile.add('query', perf_start)
+
+        cache_keys = [cache_key]
+        if mileage_only:
+            cache_keys.insert(0, cache_key[:-1] + (False,))
+
+        with Report.cache_lock:
+            for i in cache_keys:
+                if i in Report.cache and Report.cache[i][0] == data_version:
+                    Report.cache.move_to_end(i)
+                    if profile != None:
+                        profile.cached = True
+                        profile.engine = Report.cache[i][1].profile.engine
+                    return Report.cache[i][1]
+
+            previous = None
+            if not mileage_only and cache_key in Report.cache and Report.cache[cache_key][2].get(None, 0) == data_versions.get(None, 0):
+                previous = Report.cache[cache_key]
+
+        report = Report()
+        if previous != None:
+            changed_dates = set()
+            for i in set(data_versions).union(previous[2]):
+                if i != None and data_versions.get(i, 0) != previous[2].get(i, 0):
+                    changed_dates.add(i)
+            report.loadChanged(previous[1], changed_dates, driver_id=driver_id, client_names=client_names, filter_by_money=filter_by_money)
+        elif mileage_only:
+            report.loadMileage(date_start, date_end)
+        elif filter_by_money:
+            report.load(date_start, date_end, driver_id=driver_id, client_names=client_names, filter_by_money=True)
+        else:
+            report.loadFromRollups(date_start, date_end, driver_id=driver_id, client_names=client_names)
+
+        if profile != None:
+            profile.merge(report.profile)
+
+        if settings.REPORT_CACHE_SIZE > 0:
+            with Report.cache_lock:
+                Report.cache[cache_key] = (data_version, report, data_versions)
+                Report.cache.move_to_end(cache_key)
+                while len(Report.cache) > settings.REPORT_CACHE_SIZE:
+                    Report.cache.popitem(last=False)
+
+        return report
+
+    def loadDailyLogs(day_date):
+        # returns the DailyLogs for one day, keyed by shift id, with the log for all of the day's shifts under None
+        # the day's records are queried once and every log is built from them
+        # like loadCached(), the logs are kept until the day's data changes
+        data_version = ReportDataVersion.getVersion(day_date, day_date)
+
+        with Report.cache_lock:
+            if day_date in Report.daily_log_cache and Report.daily_log_cache[day_date][0] == data_version:
+                Report.daily_log_cache.move_to_end(day_date)
+                return Report.daily_log_cache[day_date][1]
+
+        report = Report()
+        report.loadSetup()
+        day_data = report.loadQuery(day_date, day_date).get(day_date, [[], [], []])
+
+        triptypes_by_name = {}
+        for i in report.context.triptypes:
+            triptypes_by_name[i.name] = i
+
+        daily_logs = {}
+        for shift in [None] + day_data[0]:
+            daily_log_shift = shift.id if shift != None else None
+            report_day = report.loadDay(day_date, day_data[0], day_data[1], day_data[2], daily_log_shift)
+
+            daily_log = Report.DailyLog()
+            daily_log.report_errors = report_day.report_errors
+
+            daily_log.unique_riders.addRiders(report_day.riders)
+            for rider in daily_log.unique_riders.names.values():
+                report.matchRiderClient(rider)
+                daily_log.unique_riders.countRider(rider)
+
+            if shift == None:
+                daily_log.setSummary(report_day.all, triptypes_by_name)
+            elif shift.vehicle != None and report_day.by_vehicle[report.getVehicleIndex(shift.vehicle)] != None:
+                daily_log.setSummary(report_day.by_vehicle[report.getVehicleIndex(shift.vehicle)], triptypes_by_name)
+
+            daily_logs[daily_log_shift] = daily_log
+
+        if settings.REPORT_CACHE_SIZE > 0:
+            with Report.cache_lock:
+                Report.daily_log_cache[day_date] = (data_version, daily_logs)
+                Report.daily_log_cache.move_to_end(day_date)
+                while len(Report.daily_log_cache) > settings.REPORT_CACHE_SIZE:
+                    Report.daily_log_cache.popitem(last=False)
+
+        return daily_logs
+
+    def dayToRollup(self, day_date, report_day):
+        rollup = ReportRollup()
+        rollup.date = day_date
+        rollup.version = ReportRollup.VERSION
+        rollup_summaries = []
+
+        if report_day == None:
+            return (rollup, rollup_summaries)
+
+        rollup.has_data = True
+        rollup.collected_cash = report_day.collected_cash.value
+        rollup.collected_check = report_day.collected_check.value
+        rollup.paid_cash = report_day.paid_cash.value
+        rollup.paid_check = report_day.paid_check.value
+        rollup.total_payments = report_day.total_payments.value
+        rollup.total_fares = report_day.total_fares.value
+
+        def TripCountToRollup(trip_count):
+            return [trip_count.passenger, trip_count.no_passenger]
+
+        def ObjectIdToRollup(obj):
+            if obj == None or obj.id == None:
+                return None
+            return str(obj.id)
+
+        def ShiftToRollup(shift):
+            return [ObjectIdToRollup(shift), ObjectIdToRollup(shift.driver), ObjectIdToRollup(shift.vehicle)]
+
+        def TripToRollup(trip):
+            return [str(trip.id), trip.name, trip.address, trip.destination]
+
+        details = {}
+
+        details['shifts'] = []
+        for i in report_day.shifts:
+            details['shifts'].append(ShiftToRollup(i.shift) + [i.start_miles.value, str(i.start_miles), i.end_miles.value, str(i.end_miles)])
+
+        details['errors'] = []
+        for i in report_day.report_errors.errors:
+            error_shift = ShiftToRollup(i['error_shift']) if i['error_shift'] else None
+            error_trip = TripToRollup(i['error_trip']) if i['error_trip'] else None
+            details['errors'].append([i['error_code'], error_shift, error_trip, i['error_msg']])
+
+        details['riders'] = []
+        for i in report_day.riders.values():
+            details['riders'].append({
+                'name': i.name,
+                'has_trips': i.has_trips,
+                'elderly': i.elderly,
+                'ambulatory': i.ambulatory,
+                'payment_client_id': str(i.payment_client_id) if i.payment_client_id else None,
+                'trips': TripCountToRollup(i.trips),
+                'trips_no_show': TripCountToRollup(i.trips_no_show),
+                'trips_canceled_late': TripCountToRollup(i.trips_canceled_late),
+                'trips_canceled_very_late': TripCountToRollup(i.trips_canceled_very_late),
+                'total_fares': i.total_fares.value,
+                'collected_cash': i.collected_cash.value,
+                'collected_check': i.collected_check.value,
+                'paid_cash': i.paid_cash.value,
+                'paid_check': i.paid_check.value,
+            })
+
+        details['destinations'] = []
+        for i in report_day.destinations:
+            details['destinations'].append([i, TripCountToRollup(report_day.destinations[i]['trips']), report_day.destinations[i]['miles']])
+
+        details['money_trips'] = []
+        for i in report_day.money_trips:
+            details['money_trips'].append([str(i.trip.id), i.trip.name, i.collected_cash.value, i.collected_check.value])
+
+        details['money_payments'] = []
+        for i in report_day.money_payments:
+            details['money_payments'].append([str(i.id), str(i.client.id), i.cash.value, i.check.value])
+
+        details['weekday_trips'] = TripCountToRollup(report_day.weekday_trips)
+
+        rollup.details = details
+
+        for i in range(0, len(report_day.by_vehicle)):
+            if report_day.by_vehicle[i]:
+                rollup_summary = self.summaryToRollup(report_day.by_vehicle[i])
+                rollup_summary.parent = rollup
+                rollup_summary.rollup_type = ReportRollupSummary.TYPE_VEHICLE
+                rollup_summary.vehicle = self.context.vehicles[i]
+                rollup_summaries.append(rollup_summary)
+
+        for i in range(0, len(report_day.by_driver)):
+            if report_day.by_driver[i]:
+                rollup_summary = self.summaryToRollup(report_day.by_driver[i])
+                rollup_summary.parent = rollup
+                rollup_summary.rollup_type = ReportRollupSummary.TYPE_DRIVER
+                rollup_summary.driver = self.context.drivers[i]
+                rollup_summaries.append(rollup_summary)
+
+        return (rollup, rollup_summaries)
+
+    def summaryToRollup(self, summary):
+        def TripCountToRollup(trip_count):
+            return [trip_count.passenger, trip_count.no_passenger]
+
+        rollup_summary = ReportRollupSummary()
+        rollup_summary.summary_type = summary.type
+        rollup_summary.service_miles = summary.service_miles
+        rollup_summary.service_hours = summary.service_hours
+        rollup_summary.deadhead_miles = summary.deadhead_miles
+        rollup_summary.deadhead_hours = summary.deadhead_hours
+        rollup_summary.total_miles = summary.total_miles
+        rollup_summary.total_hours = summary.total_hours
+        rollup_summary.pmt = summary.pmt
+        rollup_summary.fuel = summary.fuel
+        rollup_summary.collected_cash = summary.collected_cash.value
+        rollup_summary.collected_check = summary.collected_check.value
+        rollup_summary.total_collected_money = summary.total_collected_money.value
+        rollup_summary.days_of_low_rider_count = summary.days_of_low_rider_count
+        rollup_summary.unique_riders = list(summary.unique_riders)
+
+        trip_types = []
+        for i in summary.trip_types:
+            if summary.trip_types[i].total > 0:
+                trip_types.append([str(i.id)] + TripCountToRollup(summary.trip_types[i]))
+
+        tags = []
+        for i in summary.tags:
+            tags.append([i] + TripCountToRollup(summary.tags[i]))
+
+        rollup_summary.trip_counts = {
+            'trip_types': trip_types,
+            'trip_types_unknown': TripCountToRollup(summary.trip_types_unknown),
+            'trip_types_total': TripCountToRollup(summary.trip_types_total),
+            'other_employment': TripCountToRollup(summary.other_employment),
+            'tags': tags,
+        }
+
+        return rollup_summary
+
+    def dayFromRollup(self, rollup, rollup_summaries):
+        def MileageFromRollup(value, string):
+            mileage = Report.Mileage()
+            mileage.value = value
+            mileage.string = string
+            return mileage
+
+        def TripCountFromRollup(values):
+            trip_count = Report.TripCount()
+            trip_count.setTrips(values[0], True)
+            trip_count.setTrips(values[1], False)
+            return trip_count
+
+        # only the fields used by the report output are restored for shifts and trips
+        def ShiftFromRollup(values):
+            shift = Report.ShiftRecord(date=rollup.date)
+            if values[0]:
+                shift.id = uuid.UUID(values[0])
+            if values[1]:
+                shift.driver = self.context.drivers[self.driver_index_dict[values[1]]]
+                shift.driver_id = shift.driver.id
+            if values[2]:
+                shift.vehicle = self.context.vehicles[self.vehicle_index_dict[values[2]]]
+                shift.vehicle_id = shift.vehicle.id
+            return shift
+
+        def TripFromRollup(values):
+            return Report.TripRecord(id=uuid.UUID(values[0]), date=rollup.date, name=values[1], address=values[2], destination=values[3])
+
+        report_day = Report.ReportDay(self.context)
+        report_day.all.type = Report.ReportSummary.TYPE_LOGGED
+        report_day.date = rollup.date
+        report_day.collected_cash = Report.Money(rollup.collected_cash)
+        report_day.collected_check = Report.Money(rollup.collected_check)
+        report_day.paid_cash = Report.Money(rollup.paid_cash)
+        report_day.paid_check = Report.Money(rollup.paid_check)
+        report_day.total_payments = Report.Money(rollup.total_payments)
+        report_day.total_fares = Report.Money(rollup.total_fares)
+
+        details = rollup.details
+
+        try:
+            for i in rollup_summaries:
+                if i.rollup_type == ReportRollupSummary.TYPE_VEHICLE:
+                    report_day.by_vehicle[self.vehicle_index_dict[str(i.vehicle_id)]] = self.summaryFromRollup(i)
+                elif i.rollup_type == ReportRollupSummary.TYPE_DRIVER:
+                    report_day.by_driver[self.driver_index_dict[str(i.driver_id)]] = self.summaryFromRollup(i)
+
+            for i in details['shifts']:
+                report_shift = Report.ReportShift()
+                report_shift.shift = ShiftFromRollup(i[0:3])
+                report_shift.start_miles = MileageFromRollup(i[3], i[4])
+                report_shift.end_miles = MileageFromRollup(i[5], i[6])
+                report_day.shifts.append(report_shift)
+
+            for i in details['errors']:
+                error_shift = ShiftFromRollup(i[1]) if i[1] else None
+                error_trip = TripFromRollup(i[2]) if i[2] else None
+                report_day.report_errors.errors.append({'date':report_day.date, 'error_code':i[0], 'error_shift': error_shift, 'error_trip': error_trip, 'error_msg': i[3]})
+
+            for i in details['money_payments']:
+                payment = Report.ReportPayment()
+                payment.date = report_day.date
+                payment.id = uuid.UUID(i[0])
+                payment.client = self.client_id_dict[uuid.UUID(i[1])]
+                payment.cash = Report.Money(i[2])
+                payment.check = Report.Money(i[3])
+                report_day.money_payments.append(payment)
+        except KeyError:
+            # the rollup refers to something that no longer exists
+            return None
+
+        for i in report_day.by_vehicle:
+            if i:
+                report_day.all += i
+
+        for i in details['riders']:
+            rider = Report.UniqueRiderSummary.RiderDay(i['name'])
+            rider.has_trips = i['has_trips']
+            rider.elderly = i['elderly']
+            rider.ambulatory = i['ambulatory']
+            if i['payment_client_id']:
+                rider.payment_client_id = uuid.UUID(i['payment_client_id'])
+            rider.trips = TripCountFromRollup(i['trips'])
+            rider.trips_no_show = TripCountFromRollup(i['trips_no_show'])
+            rider.trips_canceled_late = TripCountFromRollup(i['trips_canceled_late'])
+            rider.trips_canceled_very_late = TripCountFromRollup(i['trips_canceled_very_late'])
+            rider.total_fares = Report.Money(i['total_fares'])
+            rider.collected_cash = Report.Money(i['collected_cash'])
+            rider.collected_check = Report.Money(i['collected_check'])
+            rider.paid_cash = Report.Money(i['paid_cash'])
+            rider.paid_check = Report.Money(i['paid_check'])
+            report_day.riders[rider.name] = rider
+
+        for i in details['destinations']:
+            report_day.destinations[i[0]] = {'trips': TripCountFromRollup(i[1]), 'miles': i[2]}
+
+        # money trips only need enough of the Trip to be displayed and linked to
+        for i in details['money_trips']:
+            report_trip = Report.ReportTrip()
+            report_trip.trip = Report.TripRecord(id=uuid.UUID(i[0]), date=report_day.date, name=i[1])
+            report_trip.collected_cash = Report.Money(i[2])
+            report_trip.collected_check = Report.Money(i[3])
+            report_day.money_trips.append(report_trip)
+
+        report_day.weekday_trips = TripCountFromRollup(details['weekday_trips'])
+
+        return report_day
+
+    def summaryFromRollup(self, rollup_summary):
+        def TripCountFromRollup(values):
+            trip_count = Report.TripCount()
+            trip_count.setTrips(values[0], True)
+            trip_count.setTrips(values[1], False)
+            return trip_count
+
+        summary = Report.ReportSummary(self.context)
+        summary.type = rollup_summary.summary_type
+        summary.service_miles = rollup_summary.service_miles
+        summary.service_hours = rollup_summary.service_hours
+        summary.deadhead_miles = rollup_summary.deadhead_miles
+        summary.deadhead_hours = rollup_summary.deadhead_hours
+        summary.total_miles = rollup_summary.total_miles
+        summary.total_hours = rollup_summary.total_hours
+        summary.pmt = rollup_summary.pmt
+        summary.fuel = rollup_summary.fuel
+        summary.collected_cash = Report.Money(rollup_summary.collected_cash)
+        summary.collected_check = Report.Money(rollup_summary.collected_check)
+        summary.total_collected_money = Report.Money(rollup_summary.total_collected_money)
+        summary.days_of_low_rider_count = rollup_summary.days_of_low_rider_count
+        summary.unique_riders = list(rollup_summary.unique_riders)
+
+        trip_counts = rollup_summary.trip_counts
+        for i in trip_counts['trip_types']:
+            summary.trip_types[self.triptype_dict[i[0]]] = TripCountFromRollup(i[1:])
+        summary.trip_types_unknown = TripCountFromRollup(trip_counts['trip_types_unknown'])
+        summary.trip_types_total = TripCountFromRollup(trip_counts['trip_types_total'])
+        summary.other_employment = TripCountFromRollup(trip_counts['other_employment'])
+        for i in trip_counts['tags']:
+            summary.tags[i[0]] = TripCountFromRollup(i[1:])
+
+        return summary
+
+    def saveRollups(rollups, data_versions):
+        # data_versions is the result of ReportDataVersion.getVersions() from before the days of the rollups were queried
+        # a day that was changed since then could have been saved after the change invalidated its rollup, so it is left for the next load instead
+        if len(rollups) == 0:
+            return
+
+        with transaction.atomic():
+            dates = [i[0].date for i in rollups]
+            current_versions = ReportDataVersion.getVersions(min(dates), max(dates))
+
+            all_rollups = []
+            all_rollup_summaries = []
+            for i in rollups:
+                data_version = ReportDataVersion.getDateVersion(data_versions, i[0].date)
+                if data_version != ReportDataVersion.getDateVersion(current_versions, i[0].date):
+                    continue
+                i[0].data_version = data_version
+                all_rollups.append(i[0])
+                all_rollup_summaries += i[1]
+
+            ReportRollup.invalidate([i.date for i in all_rollups])
+            ReportRollup.objects.bulk_create(all_rollups, batch_size=500)
+            ReportRollupSummary.objects.bulk_create(all_rollup_summaries, batch_size=500)
+
+    def buildRollups(date_start, date_end):
+        data_versions = ReportDataVersion.getVersions(date_start, date_end)
+        report = Report()
+        report.loadSetup()
+
+        all_dates_dict = report.loadQuery(date_start, date_end)
+
+        rollups = []
+        day_date = date_start
+        while day_date <= date_end:
+            report_day = None
+            if day_date in all_dates_dict:
+                day_data = all_dates_dict[day_date]
+                report_day = report.loadDay(day_date, day_data[0], day_data[1], day_data[2])
+            rollups.append(report.dayToRollup(day_date, report_day))
+            day_date += datetime.timedelta(days=1)
+
+        Report.saveRollups(rollups, data_versions)
+        return len(rollups)
+
+    def saveLogProblems(dates):
+        # finds the errors of the unfiltered report on each of the dates, and replaces the stored LogProblems of those dates with them
+        # like saveRollups(), a date that changes while it is being checked is left as it was, so that updateLogProblems() checks it again
+        dates = sorted(set(dates))
+        if len(dates) == 0:
+            return 0
+
+        data_versions = ReportDataVersion.getVersions(dates[0], dates[-1])
+        report = Report()
+        report.loadSetup()
+        all_days = report.loadDays(dates)
+
+        problems = []
+        for day_date in dates:
+            if all_days[day_date] == None:
+                continue
+            errors = all_days[day_date].report_errors.errors
+            for i in range(0, len(errors)):
+                problem = LogProblem(date=day_date, sort_index=i, error_code=errors[i]['error_code'], message=errors[i]['error_msg'])
+                # trips without a matching shift can be given a placeholder shift, which isn't saved
+                if errors[i]['error_shift']:
+                    problem.shift_id = errors[i]['error_shift'].id
+                if errors[i]['error_trip']:
+                    problem.trip_id = errors[i]['error_trip'].id
+                problems.append(problem)
+
+        with transaction.atomic():
+            current_versions = ReportDataVersion.getVersions(dates[0], dates[-1])
+            dates = [i for i in dates if data_versions.get(i, 0) == current_versions.get(i, 0)]
+            problems = [i for i in problems if data_versions.get(i.date, 0) == current_versions.get(i.date, 0)]
+
+            LogProblem.objects.filter(date__in=dates).delete()
+            LogProblem.objects.bulk_create(problems, batch_size=500)
+            LogProblemDay.objects.filter(date__in=dates).delete()
+            LogProblemDay.objects.bulk_create([LogProblemDay(date=i, data_version=data_versions.get(i, 0)) for i in dates], batch_size=500)
+        LogProblem.clearCount()
+
+        return len(problems)
+
+    def updateLogProblems():
+        # finds the problems again for every date that has changed since it was last checked, and returns the number of dates
+        # this runs when the log problems page is viewed and from the report_jobs command, instead of while trips and shifts are being saved
+        dates = LogProblemDay.getChangedDates()
+        for i in range(0, len(dates), 31):
+            Report.saveLogProblems(dates[i:i+31])
+        return len(dates)
+
+    def getFingerprint(self):
+        # plain data version of the report output, for checking that the different ways of loading a report agree
+        def TripCountData(trip_count):
+            return [trip_count.passenger, trip_count.no_passenger, trip_count.total]
+
+        def SummaryData(summary):
+            return [
+                summary.type, summary.service_miles, summary.service_hours, summary.deadhead_miles, summary.deadhead_hours, summary.total_miles, summary.total_hours, summary.pmt, summary.fuel,
+                [[str(i.id)] + TripCountData(summary.trip_types[i]) for i in summary.trip_types], TripCountData(summary.trip_types_unknown), TripCountData(summary.trip_types_total),
+                [[i] + TripCountData(summary.tags[i]) for i in summary.tags],
+                summary.collected_cash.value, summary.collected_check.value, summary.total_collected_money.value, TripCountData(summary.other_employment),
+                list(summary.unique_riders), summary.days_of_low_rider_count,
+            ]
+
+        def DaysData(days):
+            return [[str(i['date']), SummaryData(i['data'])] for i in days]
+
+        def RiderData(rider):
+            return [
+                rider.name, str(rider.client_id), rider.elderly, rider.ambulatory, rider.staff,
+                TripCountData(rider.trips), TripCountData(rider.trips_no_show), TripCountData(rider.trips_canceled_late), TripCountData(rider.trips_canceled_very_late),
+                rider.collected_cash.value, rider.collected_check.value, rider.paid_cash.value, rider.paid_check.value, rider.total_payments.value, rider.total_fares.value, rider.total_owed.value,
+            ]
+
+        unique_riders = self.unique_riders
+
+        frequent_destinations_other = None
+        if self.frequent_destinations_other:
+            other = self.frequent_destinations_other
+            frequent_destinations_other = [other.destination_count] + TripCountData(other.trips) + [other.avg_mileage]
+
+        return {
+            'days': [[str(i.date), SummaryData(i.all), i.collected_cash.value, i.collected_check.value, i.paid_cash.value, i.paid_check.value, i.total_payments.value, i.total_fares.value, i.hasVehicleInShift()] for i in self.report_all],
+            'vehicles': [[str(i.vehicle.id), str(i.start_miles), str(i.end_miles), str(i.total_miles), DaysData(i.days), SummaryData(i.totals)] for i in self.vehicle_reports],
+            'drivers': [[str(i.driver.id), DaysData(i.days), SummaryData(i.totals)] for i in self.driver_reports],
+            'drivers_total': SummaryData(self.driver_reports_total.totals),
+            'all_vehicles': SummaryData(self.all_vehicles),
+            'unique_riders': [RiderData(i) for i in unique_riders.names.values()],
+            'unique_rider_totals': [
+                [TripCountData(i) for i in unique_riders.by_individuals], [TripCountData(i) for i in unique_riders.by_trips],
+                unique_riders.total_collected_cash.value, unique_riders.total_collected_check.value, unique_riders.total_paid_cash.value, unique_riders.total_paid_check.value,
+                unique_riders.total_total_payments.value, unique_riders.total_total_fares.value, unique_riders.total_total_owed.value,
+            ],
+            'money_trips': [[str(i.trip.id), str(i.trip.date), i.trip.name, i.collected_cash.value, i.collected_check.value] for i in self.money_trips],
+            'money_payments': [[str(i.id), str(i.date), str(i.client.id), i.cash.value, i.check.value] for i in self.money_payments],
+            'frequent_destinations': [[i.address] + TripCountData(i.trips) + [i.avg_mileage] for i in self.frequent_destinations.values()],
+            'frequent_destinations_other': frequent_destinations_other,
+            'errors': [[str(i['date']), i['error_code'], str(i['error_shift'].id) if i['error_shift'] else None, str(i['error_trip'].id) if i['error_trip'] else None, i['error_msg']] for i in self.report_errors.errors],
+            'weekday_totals': [TripCountData(i) for i in self.weekday_totals],
+            'totals': [self.total_vehicle_days_of_service, str(self.total_vehicle_mileage), self.total_money.value, str(self.total_odometer_miles)],
+        }
+
+    def getJSONData(self):
+        # the report output as plain data with named fields, for reportJSON()
+        def TripCountData(trip_count):
+            return {'passenger': trip_count.passenger, 'no_passenger': trip_count.no_passenger, 'total': trip_count.total}
+
+        def SummaryData(summary):
+            return {
+                'service_miles': summary.service_miles,
+                'service_hours': summary.service_hours,
+                'deadhead_miles': summary.deadhead_miles,
+                'deadhead_hours': summary.deadhead_hours,
+                'total_miles': summary.total_miles,
+                'total_hours': summary.total_hours,
+                'pmt': summary.pmt,
+                'fuel': summary.fuel,
+                'trip_types': [dict({'id': str(i.id), 'name': str(i)}, **TripCountData(summary.trip_types[i])) for i in summary.trip_types],
+                'trip_types_unknown': TripCountData(summary.trip_types_unknown),
+                'trip_types_total': TripCountData(summary.trip_types_total),
+                'other_employment': TripCountData(summary.other_employment),
+                'collected_cash': summary.collected_cash.to_float(),
+                'collected_check': summary.collected_check.to_float(),
+                'total_collected_money': summary.total_collected_money.to_float(),
+                'days_of_low_rider_count': summary.days_of_low_rider_count,
+            }
+
+        def ErrorData(error):
+            data = {
+                'date': str(error['date']),
+                'code': error['error_code'],
+                'message': error['error_msg'],
+                'shift_id': None,
+                'trip_id': None,
+                'description': '',
+            }
+            if error['error_shift']:
+                data['shift_id'] = str(error['error_shift'].id)
+                data['description'] = str(error['error_shift'])
+            if error['error_trip']:
+                data['trip_id'] = str(error['error_trip'].id)
+                data['description'] = str(error['error_trip'])
+            return data
+
+        weekdays = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+        frequent_destinations_other = None
+        if self.frequent_destinations_other:
+            other = self.frequent_destinations_other
+            frequent_destinations_other = dict({'destination_count': other.destination_count, 'average_miles': other.avg_mileage}, **TripCountData(other.trips))
+
+        return {
+            'all_vehicles': SummaryData(self.all_vehicles),
+            'vehicles': [{'id': str(i.vehicle.id), 'name': str(i.vehicle), 'start_miles': i.start_miles.value, 'end_miles': i.end_miles.value, 'total_miles': i.total_miles.value, 'totals': SummaryData(i.totals)} for i in self.vehicle_reports],
+            'drivers': [{'id': str(i.driver.id), 'name': str(i.driver), 'totals': SummaryData(i.totals)} for i in self.driver_reports],
+            'drivers_total': SummaryData(self.driver_reports_total.totals),
+            'weekday_totals': [dict({'weekday': weekdays[i]}, **TripCountData(self.weekday_totals[i])) for i in range(0, 7)],
+            'tags': [dict({'name': i}, **TripCountData(self.all_vehicles.tags[i])) for i in self.all_vehicles.tags],
+            'frequent_destinations': [dict({'address': i.address, 'average_miles': i.avg_mileage}, **TripCountData(i.trips)) for i in self.frequent_destinations.values()],
+            'frequent_destinations_other': frequent_destinations_other,
+            'errors': [ErrorData(i) for i in self.report_errors.errors],
+            'totals': {
+                'vehicle_days_of_service': self.total_vehicle_days_of_service,
+                'vehicle_mileage': self.total_vehicle_mileage.value,
+                'odometer_miles': self.total_odometer_miles.value,
+                'money': self.total_money.to_float(),
+            },
+        }
+
+    def getDifferences(self, other):
+        fingerprint = self.getFingerprint()
+        other_fingerprint = other.getFingerprint()
+        return [i for i in fingerprint if fingerprint[i] != other_fingerprint[i]]
+
+    def getMileageDifferences(self, other):
+        # like getDifferences(), but only for the mileage figures that loadMileage() fills in
+        def SummaryData(summary):
+            return [summary.type, summary.service_miles, summary.service_hours, summary.deadhead_miles, summary.deadhead_hours, summary.total_miles, summary.total_hours, summary.pmt, summary.fuel]
+
+        def DaysData(days):
+            return [[str(i['date']), SummaryData(i['data'])] for i in days]
+
+        def MileageData(report):
+            return {
+                'vehicles': [[str(i.vehicle.id), str(i.start_miles), str(i.end_miles), str(i.total_miles), DaysData(i.days), SummaryData(i.totals)] for i in report.vehicle_reports],
+                'drivers': [[str(i.driver.id), DaysData(i.days), SummaryData(i.totals)] for i in report.driver_reports],
+                'drivers_total': SummaryData(report.driver_reports_total.totals),
+                'all_vehicles': SummaryData(report.all_vehicles),
+                'totals': [report.total_vehicle_days_of_service, str(report.total_vehicle_mileage), str(report.total_odometer_miles)],
+            }
+
+        mileage_data = MileageData(self)
+        other_mileage_data = MileageData(other)
+        return [i for i in mileage_data if mileage_data[i] != other_mileage_data[i]]
+
+    def getVehicleIndex(self, vehicle):
+        return self.context.vehicles.index(vehicle)
+
+    def getDriverIndex(self, driver):
+        return self.context.drivers.index(driver)
 
 @permission_required(['transit.view_trip', 'transit.view_shift'])
 def reportFilter(request):
@@ -1194,6 +2579,13 @@ def reportFilter(request):
 
     return (client_names, driver_id, clients_filtered)
 
+def reportJobIsNeeded(date_start, date_end):
+    # True if the range is too large to load during a request, so it should be loaded as a ReportJob instead
+    return settings.REPORT_JOB_MIN_DAYS > 0 and (date_end - date_start).days + 1 > settings.REPORT_JOB_MIN_DAYS
+
+def reportJobRedirect(request, date_start, date_end):
+    return HttpResponseRedirect(reverse('report-job-create', kwargs={'start_year': date_start.year, 'start_month': date_start.month, 'start_day': date_start.day, 'end_year': date_end.year, 'end_month': date_end.month, 'end_day': date_end.day}) + '?' + request.GET.urlencode())
+
 @permission_required(['transit.view_trip', 'transit.view_shift'])
 def report(request, start_year, start_month, start_day, end_year, end_month, end_day):
     date_start = datetime.date(start_year, start_month, start_day)
@@ -1235,12 +2627,15 @@ def report(request, start_year, start_month, start_day, end_year, end_month, end
         date_picker = DatePickerForm(initial={'date':date_start})
         date_range_picker = DateRangePickerForm(initial={'date_start':date_start, 'date_end':date_end})
 
+    if reportJobIsNeeded(date_start, date_end):
+        return reportJobRedirect(request, date_start, date_end)
+
     month_prev = date_start + datetime.timedelta(days=-1)
     month_prev.replace(day=1)
     month_next = date_end + datetime.timedelta(days=1)
 
-    report = Report()
-    report.load(date_start, date_end, driver_id=driver_id, client_names=client_names)
+    profile = Report.Profile()
+    report = Report.loadCached(date_start, date_end, driver_id=driver_id, client_names=client_names, profile=profile)
 
     url_month_prev = reverse('report-month', kwargs={'year': month_prev.year, 'month': month_prev.month}) + '?' + request.GET.urlencode()
     url_month_next = reverse('report-month', kwargs={'year': month_next.year, 'month': month_next.month}) + '?' + request.GET.urlencode()
@@ -1248,6 +2643,7 @@ def report(request, start_year, start_month, start_day, end_year, end_month, end
     url_print = reverse('report-print', kwargs={'start_year': date_start.year, 'start_month': date_start.month, 'start_day': date_start.day, 'end_year': date_end.year, 'end_month': date_end.month, 'end_day': date_end.day}) + '?' + request.GET.urlencode()
     url_xlsx = reverse('report-xlsx', kwargs={'start_year': date_start.year, 'start_month': date_start.month, 'start_day': date_start.day, 'end_year': date_end.year, 'end_month': date_end.month, 'end_day': date_end.day}) + '?' + request.GET.urlencode()
     url_print_mile_summary = reverse('report-print-mileage-summary', kwargs={'start_year': date_start.year, 'start_month': date_start.month, 'start_day': date_start.day, 'end_year': date_end.year, 'end_month': date_end.month, 'end_day': date_end.day})
+    url_job = reverse('report-job-create', kwargs={'start_year': date_start.year, 'start_month': date_start.month, 'start_day': date_start.day, 'end_year': date_end.year, 'end_month': date_end.month, 'end_day': date_end.day}) + '?' + request.GET.urlencode()
 
     selected_driver = None
     if driver_id != None:
@@ -1266,17 +2662,24 @@ def report(request, start_year, start_month, start_day, end_year, end_month, end
         'url_print': url_print,
         'url_print_mile_summary': url_print_mile_summary,
         'url_xlsx': url_xlsx,
+        'url_job': url_job,
         'selected_driver': selected_driver,
         'selected_clients': client_names,
         'show_daily_data': show_daily_data,
         'is_short_report': len(report.report_all) <= 31,
-        'vehicle_table_colspan': 13 + (3 * len(Report.ReportSummary.query_triptypes)),
+        'vehicle_table_colspan': 13 + (3 * len(report.context.triptypes)),
         'drivers': Driver.objects.filter(is_active=True),
         'vehicles': Vehicle.objects.all(),
         'is_filtered': clients_filtered or selected_driver,
         'clients_filtered': clients_filtered,
+        'profile': profile,
     }
-    return render(request, 'report/view.html', context)
+
+    perf_start = perf_counter()
+    response = render(request, 'report/view.html', context)
+    profile.add('render', perf_start)
+    profile.log(request, 'report', date_start, date_end, report)
+    return response
 
 
 
@@ -1298,8 +2701,11 @@ def reportPrint(request, start_year, start_month, start_day, end_year, end_month
         date_start = date_end
         date_end = swap_date
 
-    report = Report()
-    report.load(date_start, date_end, driver_id=driver_id, client_names=client_names)
+    if reportJobIsNeeded(date_start, date_end):
+        return reportJobRedirect(request, date_start, date_end)
+
+    profile = Report.Profile()
+    report = Report.loadCached(date_start, date_end, driver_id=driver_id, client_names=client_names, profile=profile)
 
     selected_driver = None
     if driver_id != None:
@@ -1311,14 +2717,19 @@ def reportPrint(request, start_year, start_month, start_day, end_year, end_month
         'report': report,
         'show_daily_data': show_daily_data,
         'is_short_report': len(report.report_all) <= 31,
-        'vehicle_table_colspan': 13 + (3 * len(Report.ReportSummary.query_triptypes)),
+        'vehicle_table_colspan': 13 + (3 * len(report.context.triptypes)),
         'vehicles': Vehicle.objects.all(),
         'selected_driver': selected_driver,
         'selected_clients': client_names,
         'is_filtered': clients_filtered or selected_driver,
         'clients_filtered': clients_filtered,
     }
-    return render(request, 'report/print.html', context)
+
+    perf_start = perf_counter()
+    response = render(request, 'report/print.html', context)
+    profile.add('render', perf_start)
+    profile.log(request, 'report-print', date_start, date_end, report)
+    return response
 
 @permission_required(['transit.view_trip', 'transit.view_shift'])
 def reportPrintMileageSummary(request, start_year, start_month, start_day, end_year, end_month, end_day):
@@ -1330,17 +2741,85 @@ def reportPrintMileageSummary(request, start_year, start_month, start_day, end_y
         date_start = date_end
         date_end = swap_date
 
-    report = Report()
-    report.load(date_start, date_end, driver_id=None)
+    profile = Report.Profile()
+    report = Report.loadCached(date_start, date_end, profile=profile, mileage_only=True)
 
     context = {
         'date_start': date_start,
         'date_end': date_end,
         'report': report,
     }
-    return render(request, 'report/print_mileage_summary.html', context)
 
+    perf_start = perf_counter()
+    response = render(request, 'report/print_mileage_summary.html', context)
+    profile.add('render', perf_start)
+    profile.log(request, 'report-print-mileage-summary', date_start, date_end, report)
+    return response
+
+
+
+def reportJSONETag(request, start_year, start_month, start_day, end_year, end_month, end_day):
+    # changes whenever the report data or the filters change, so that clients can skip downloading an unchanged report
+    date_start = datetime.date(start_year, start_month, start_day)
+    date_end = datetime.date(end_year, end_month, end_day)
+    if date_start > date_end:
+        swap_date = date_start
+        date_start = date_end
+        date_end = swap_date
+
+    # ranges that need a background job get an error response, which shouldn't be cached or revalidated
+    if reportJobIsNeeded(date_start, date_end):
+        return None
+
+    filter_results = reportFilter(request)
+    etag_data = [Report.JSON_VERSION, settings.REPORT_FREQUENT_DESTINATIONS_LIMIT, str(date_start), str(date_end), str(filter_results[1]), filter_results[0], ReportDataVersion.getVersion(date_start, date_end)]
+    return hashlib.sha1(json.dumps(etag_data).encode('utf-8')).hexdigest()
+
+@permission_required(['transit.view_trip', 'transit.view_shift'])
+@condition(etag_func=reportJSONETag)
+def reportJSON(request, start_year, start_month, start_day, end_year, end_month, end_day):
+    date_start = datetime.date(start_year, start_month, start_day)
+    date_end = datetime.date(end_year, end_month, end_day)
+
+    if date_start > date_end:
+        swap_date = date_start
+        date_start = date_end
+        date_end = swap_date
+
+    if reportJobIsNeeded(date_start, date_end):
+        return JsonResponse({'error': 'The date range is longer than ' + str(settings.REPORT_JOB_MIN_DAYS) + ' days'}, status=400)
+
+    filter_results = reportFilter(request)
+    client_names = filter_results[0]
+    driver_id = filter_results[1]
+
+    profile = Report.Profile()
+    report = Report.loadCached(date_start, date_end, driver_id=driver_id, client_names=client_names, profile=profile)
+
+    perf_start = perf_counter()
+    data = {
+        'version': Report.JSON_VERSION,
+        'date_start': str(date_start),
+        'date_end': str(date_end),
+        'driver_id': str(driver_id) if driver_id != None else None,
+        'client_names': client_names,
+    }
+    data.update(report.getJSONData())
+    response = JsonResponse(data)
+    profile.add('render', perf_start)
+    profile.log(request, 'report-json', date_start, date_end, report)
+    return response
+
+@permission_required(['transit.view_trip', 'transit.view_shift'])
+def reportJSONMonth(request, year, month):
+    date_start = datetime.date(year, month, 1)
+    date_end = date_start
+    if date_end.month == 12:
+        date_end = date_end.replace(day=31)
+    else:
+        date_end = datetime.date(year, month+1, 1) + datetime.timedelta(days=-1)
 
+    return HttpResponseRedirect(reverse('report-json', kwargs={'start_year':date_start.year, 'start_month':date_start.month, 'start_day':date_start.day, 'end_year':date_end.year, 'end_month':date_end.month, 'end_day':date_end.day}) + '?' + request.GET.urlencode())
 
 @permission_required(['transit.view_trip', 'transit.view_shift'])
 def reportMonth(request, year, month):
@@ -1387,19 +2866,34 @@ def reportXLSX(request, start_year, start_month, start_day, end_year, end_month,
         date_start = date_end
         date_end = swap_date
 
-    trip_types = TripType.objects.filter(is_trip_counted=True)
-    tags = Tag.objects.all()
+    if reportJobIsNeeded(date_start, date_end):
+        return reportJobRedirect(request, date_start, date_end)
 
     filter_results = reportFilter(request)
     client_names = filter_results[0]
     driver_id = filter_results[1]
 
-    report = Report()
-    report.load(date_start, date_end, driver_id=driver_id, client_names=client_names)
+    profile = Report.Profile()
+    report = Report.loadCached(date_start, date_end, driver_id=driver_id, client_names=client_names, profile=profile)
 
+    perf_start = perf_counter()
     temp_file = tempfile.NamedTemporaryFile()
+    reportWriteXLSX(report, temp_file)
+    temp_file.seek(0)
+
+    profile.add('xlsx', perf_start)
+    profile.log(request, 'report-xlsx', date_start, date_end, report)
+
+    # FileResponse sends the file in blocks, and the temporary file is removed once the response closes it
+    return FileResponse(temp_file, filename='Transit_Report_' + date_start.strftime('%Y-%m-%d') + '_to_' + date_end.strftime('%Y-%m-%d') + '.xlsx', as_attachment=True)
+
+def reportWriteXLSX(report, output):
+    # writes a loaded Report as an Excel workbook to a file (or file-like object)
+    trip_types = TripType.objects.filter(is_trip_counted=True)
+    tags = Tag.objects.all()
 
-    wb = Workbook()
+    # write-only workbooks write each row out as it is appended, rather than keeping every cell in memory
+    wb = Workbook(write_only=True)
 
     style_font_normal = Font(name='Arial', size=10)
     style_border_normal_side = Side(border_style='thin', color='FF000000')
@@ -1415,139 +2909,117 @@ def reportXLSX(request, start_year, start_month, start_day, end_year, end_month,
     style_font_total = Font(name='Arial', size=10, bold=True, color='FFFFFFFF')
     style_fill_total = PatternFill(fill_type='solid', fgColor='27A343')
 
-    #####
-    #### All Vehicle Totals
-    #####
-    report_all = []
-    for i in report.report_all:
-        if i.hasVehicleInShift():
-            report_all.append(i)
-
-    ws = wb.active
-    ws.title = 'Totals for All Vehicles'
-
-    row_header = 1
-    row_total = row_header + len(report_all) + 1
-
-    trip_type_sub_cols = 3
-    trip_type_cols = len(trip_types) * trip_type_sub_cols
-    trip_type_start = 8
-    trip_type_end = trip_type_start + trip_type_cols + trip_type_sub_cols
+    style_number_formats = {
+        'date': 'mmm dd, yyyy',
+        'miles': '0.0',
+        'hours': '0.00',
+        'money': '$0.00',
+        'integer': '0',
+    }
 
-    col_count = 10 + trip_type_cols + trip_type_sub_cols
+    # cells refer to these named styles, instead of each cell being assigned its own font/border/fill
+    def AddNamedStyle(name, font, fill=None, alignment=None):
+        for number_format in [None] + list(style_number_formats.keys()):
+            style_name = name
+            named_style = NamedStyle(name=name, font=font, border=style_border_normal)
+            if number_format != None:
+                style_name = name + '_' + number_format
+                named_style = NamedStyle(name=style_name, font=font, border=style_border_normal, number_format=style_number_formats[number_format])
+            if fill != None:
+                named_style.fill = fill
+            if alignment != None:
+                named_style.alignment = alignment
+            wb.add_named_style(named_style)
+
+    AddNamedStyle('report_header', style_font_header, fill=style_fill_header, alignment=style_alignment_header)
+    AddNamedStyle('report_normal', style_font_normal)
+    AddNamedStyle('report_total', style_font_total, fill=style_fill_total)
+
+    def DriverStyle(driver):
+        # each driver's row is filled with their color
+        style_name = 'report_driver_' + driver.get_color()
+        if style_name not in wb.named_styles:
+            AddNamedStyle(style_name, style_font_normal, fill=PatternFill(fill_type='solid', fgColor=driver.get_color()))
+        return style_name
+
+    def Cell(ws, value, style, number_format=None):
+        cell = WriteOnlyCell(ws, value)
+        if number_format != None:
+            cell.style = style + '_' + number_format
+        else:
+            cell.style = style
+        return cell
 
-    ws.cell(row_header, 2, 'Service Miles')
-    ws.cell(row_header, 3, 'Service Hours')
-    ws.cell(row_header, 4, 'Deadhead Miles')
-    ws.cell(row_header, 5, 'Deadhead Hours')
-    ws.cell(row_header, 6, 'Passenger Miles (PMT)')
-    ws.cell(row_header, 7, 'Fuel')
-    ws.cell(row_header, trip_type_start + trip_type_cols, 'Total Trips')
-    ws.cell(row_header, trip_type_end, 'Cash Collected')
-    ws.cell(row_header, trip_type_end + 1, 'Check Collected')
-    ws.cell(row_header, trip_type_end + 2, 'Total Money Collected')
+    def HeaderRow(ws, row, values):
+        ws.row_dimensions[row].height = style_rowheight_header
+        ws.append([Cell(ws, i, 'report_header') for i in values])
 
-    ws.row_dimensions[row_header].height = style_rowheight_header
+    def SetColumnWidths(ws, widths):
+        for i in range(0, len(widths)):
+            if widths[i] != None:
+                ws.column_dimensions[get_column_letter(i+1)].width = widths[i]
 
-    total_data = report.all_vehicles
+    def WriteVehicleSheet(ws, days, total_data):
+        trip_type_sub_cols = 3
+        trip_type_cols = len(trip_types) * trip_type_sub_cols
+        trip_type_start = 8
+        trip_type_end = trip_type_start + trip_type_cols + trip_type_sub_cols
 
-    for i in range(0, row_total):
-        row = i + 1
+        col_count = 10 + trip_type_cols + trip_type_sub_cols
 
-        # apply styles
+        widths = []
         for col in range(1, col_count+1):
-            ws.cell(row, col).border = style_border_normal
+            if col >= trip_type_start and col < trip_type_end:
+                widths.append(style_colwidth_small)
 
-            if row == row_header:
-                if col >= trip_type_start and col < trip_type_end:
-                    ws.column_dimensions[get_column_letter(col)].width = style_colwidth_small
-
-                    # merge trip type column headers
-                    if (col-trip_type_start) % trip_type_sub_cols == 0:
-                        ws.merge_cells(start_row=row_header, start_column=col, end_row=row_header, end_column=col+trip_type_sub_cols-1)
-                else:
-                    ws.column_dimensions[get_column_letter(col)].width = style_colwidth_normal
-
-                ws.cell(row, col).font = style_font_header
-                ws.cell(row, col).alignment = style_alignment_header
-                ws.cell(row, col).fill = style_fill_header
-            elif row == row_total:
-                ws.cell(row, col).font = style_font_total
-                ws.cell(row, col).fill = style_fill_total
+                # merge trip type column headers
+                if (col-trip_type_start) % trip_type_sub_cols == 0:
+                    ws.merged_cells.add(get_column_letter(col) + '1:' + get_column_letter(col+trip_type_sub_cols-1) + '1')
             else:
-                ws.cell(row, col).font = style_font_normal
-
-            # number formats
-            if row > row_header:
-                if row < row_total:
-                    ws.cell(row, 1).number_format = 'mmm dd, yyyy'
-                ws.cell(row, 2).number_format = '0.0'
-                ws.cell(row, 3).number_format = '0.00'
-                ws.cell(row, 4).number_format = '0.0'
-                ws.cell(row, 5).number_format = '0.00'
-                ws.cell(row, 6).number_format = '0.0'
-                ws.cell(row, 7).number_format = '0.0'
-                ws.cell(row, trip_type_end).number_format = '$0.00'
-                ws.cell(row, trip_type_end + 1).number_format = '$0.00'
-                ws.cell(row, trip_type_end + 2).number_format = '$0.00'
-
-        if row == row_header:
-            continue
-
-        if row == row_total:
-            ws.cell(row_total, 1, 'TOTAL')
-            ws.cell(row_total, 2, total_data.service_miles)
-            ws.cell(row_total, 3, total_data.service_hours)
-            ws.cell(row_total, 4, total_data.deadhead_miles)
-            ws.cell(row_total, 5, total_data.deadhead_hours)
-            ws.cell(row_total, 6, total_data.pmt)
-            ws.cell(row_total, 7, total_data.fuel)
-
-            for trip_type_index in range(0, len(trip_types)):
-                trip_type = trip_types[trip_type_index]
-                trip_type_col = trip_type_start + (trip_type_index * trip_type_sub_cols)
-                ws.cell(row_header, trip_type_col, 'Trip Type: ' + str(trip_type))
-                ws.cell(row_total, trip_type_col, total_data.trip_types[trip_type].passenger)
-                ws.cell(row_total, trip_type_col + 1, total_data.trip_types[trip_type].no_passenger)
-                ws.cell(row_total, trip_type_col + 2, total_data.trip_types[trip_type].total)
-
-            ws.cell(row_total, trip_type_start + trip_type_cols, total_data.trip_types_total.passenger)
-            ws.cell(row_total, trip_type_start + trip_type_cols + 1, total_data.trip_types_total.no_passenger)
-            ws.cell(row_total, trip_type_start + trip_type_cols + 2, total_data.trip_types_total.total)
-
-            ws.cell(row_total, trip_type_end, total_data.collected_cash.to_float())
-            ws.cell(row_total, trip_type_end + 1, total_data.collected_check.to_float())
-            ws.cell(row_total, trip_type_end + 2, total_data.total_collected_money.to_float())
-
-            continue
+                widths.append(style_colwidth_normal)
+        SetColumnWidths(ws, widths)
+
+        header = [None, 'Service Miles', 'Service Hours', 'Deadhead Miles', 'Deadhead Hours', 'Passenger Miles (PMT)', 'Fuel']
+        for trip_type in trip_types:
+            header += ['Trip Type: ' + str(trip_type), None, None]
+        header += ['Total Trips', None, None, 'Cash Collected', 'Check Collected', 'Total Money Collected']
+        HeaderRow(ws, 1, header)
+
+        def SummaryRow(label, data, style, label_format=None):
+            row = [
+                Cell(ws, label, style, label_format),
+                Cell(ws, data.service_miles, style, 'miles'),
+                Cell(ws, data.service_hours, style, 'hours'),
+                Cell(ws, data.deadhead_miles, style, 'miles'),
+                Cell(ws, data.deadhead_hours, style, 'hours'),
+                Cell(ws, data.pmt, style, 'miles'),
+                Cell(ws, data.fuel, style, 'miles'),
+            ]
+
+            for trip_type in trip_types:
+                row.append(Cell(ws, data.trip_types[trip_type].passenger, style))
+                row.append(Cell(ws, data.trip_types[trip_type].no_passenger, style))
+                row.append(Cell(ws, data.trip_types[trip_type].total, style))
+
+            row.append(Cell(ws, data.trip_types_total.passenger, style))
+            row.append(Cell(ws, data.trip_types_total.no_passenger, style))
+            row.append(Cell(ws, data.trip_types_total.total, style))
+
+            row.append(Cell(ws, data.collected_cash.to_float(), style, 'money'))
+            row.append(Cell(ws, data.collected_check.to_float(), style, 'money'))
+            row.append(Cell(ws, data.total_collected_money.to_float(), style, 'money'))
+            return row
+
+        for day in days:
+            ws.append(SummaryRow(day[0], day[1], 'report_normal', 'date'))
+
+        ws.append(SummaryRow('TOTAL', total_data, 'report_total'))
 
-        # daily report data
-        rdata = report_all[i-1]
-        rdata_date = rdata.date
-        rdata_all = rdata.all
-
-        ws.cell(row, 1, rdata_date)
-        ws.cell(row, 2, rdata_all.service_miles)
-        ws.cell(row, 3, rdata_all.service_hours)
-        ws.cell(row, 4, rdata_all.deadhead_miles)
-        ws.cell(row, 5, rdata_all.deadhead_hours)
-        ws.cell(row, 6, rdata_all.pmt)
-        ws.cell(row, 7, rdata_all.fuel)
-
-        for trip_type_index in range(0, len(trip_types)):
-            trip_type = trip_types[trip_type_index]
-            trip_type_col = trip_type_start + (trip_type_index * trip_type_sub_cols)
-            ws.cell(row, trip_type_col, rdata_all.trip_types[trip_type].passenger)
-            ws.cell(row, trip_type_col + 1, rdata_all.trip_types[trip_type].no_passenger)
-            ws.cell(row, trip_type_col + 2, rdata_all.trip_types[trip_type].total)
-
-        ws.cell(row, trip_type_start + trip_type_cols, rdata_all.trip_types_total.passenger)
-        ws.cell(row, trip_type_start + trip_type_cols + 1, rdata_all.trip_types_total.no_passenger)
-        ws.cell(row, trip_type_start + trip_type_cols + 2, rdata_all.trip_types_total.total)
-
-        ws.cell(row, trip_type_end, rdata_all.collected_cash.to_float())
-        ws.cell(row, trip_type_end + 1, rdata_all.collected_check.to_float())
-        ws.cell(row, trip_type_end + 2, rdata_all.total_collected_money.to_float())
+    #####
+    #### All Vehicle Totals
+    #####
+    ws = wb.create_sheet('Totals for All Vehicles')
+    WriteVehicleSheet(ws, [(i.date, i.all) for i in report.report_all if i.hasVehicleInShift()], report.all_vehicles)
 
     #####
     #### Per-Vehicle Reports
@@ -1557,813 +3029,188 @@ def reportXLSX(request, start_year, start_month, start_day, end_year, end_month,
             continue
 
         ws = wb.create_sheet('Vehicle - ' + str(vr.vehicle))
-
-        row_header = 1
-        row_total = row_header + len(vr.days) + 1
-
-        trip_type_sub_cols = 3
-        trip_type_cols = len(trip_types) * trip_type_sub_cols
-        trip_type_start = 8
-        trip_type_end = trip_type_start + trip_type_cols + trip_type_sub_cols
-
-        col_count = 10 + trip_type_cols + trip_type_sub_cols
-
-        ws.cell(row_header, 2, 'Service Miles')
-        ws.cell(row_header, 3, 'Service Hours')
-        ws.cell(row_header, 4, 'Deadhead Miles')
-        ws.cell(row_header, 5, 'Deadhead Hours')
-        ws.cell(row_header, 6, 'Passenger Miles (PMT)')
-        ws.cell(row_header, 7, 'Fuel')
-        ws.cell(row_header, trip_type_start + trip_type_cols, 'Total Trips')
-        ws.cell(row_header, trip_type_end, 'Cash Collected')
-        ws.cell(row_header, trip_type_end + 1, 'Check Collected')
-        ws.cell(row_header, trip_type_end + 2, 'Total Money Collected')
-
-        ws.row_dimensions[row_header].height = style_rowheight_header
-
-        total_data = vr.totals
-
-        for i in range(0, row_total):
-            row = i + 1
-
-            # apply styles
-            for col in range(1, col_count+1):
-                ws.cell(row, col).border = style_border_normal
-
-                if row == row_header:
-                    if col >= trip_type_start and col < trip_type_end:
-                        ws.column_dimensions[get_column_letter(col)].width = style_colwidth_small
-
-                        # merge trip type column headers
-                        if (col-trip_type_start) % trip_type_sub_cols == 0:
-                            ws.merge_cells(start_row=row_header, start_column=col, end_row=row_header, end_column=col+trip_type_sub_cols-1)
-                    else:
-                        ws.column_dimensions[get_column_letter(col)].width = style_colwidth_normal
-
-                    ws.cell(row, col).font = style_font_header
-                    ws.cell(row, col).alignment = style_alignment_header
-                    ws.cell(row, col).fill = style_fill_header
-                elif row == row_total:
-                    ws.cell(row, col).font = style_font_total
-                    ws.cell(row, col).fill = style_fill_total
-                else:
-                    ws.cell(row, col).font = style_font_normal
-
-                # number formats
-                if row > row_header:
-                    if row < row_total:
-                        ws.cell(row, 1).number_format = 'mmm dd, yyyy'
-                    ws.cell(row, 2).number_format = '0.0'
-                    ws.cell(row, 3).number_format = '0.00'
-                    ws.cell(row, 4).number_format = '0.0'
-                    ws.cell(row, 5).number_format = '0.00'
-                    ws.cell(row, 6).number_format = '0.0'
-                    ws.cell(row, 7).number_format = '0.0'
-                    ws.cell(row, trip_type_end).number_format = '$0.00'
-                    ws.cell(row, trip_type_end + 1).number_format = '$0.00'
-                    ws.cell(row, trip_type_end + 2).number_format = '$0.00'
-
-            if row == row_header:
-                continue
-
-            if row == row_total:
-                ws.cell(row_total, 1, 'TOTAL')
-                ws.cell(row_total, 2, total_data.service_miles)
-                ws.cell(row_total, 3, total_data.service_hours)
-                ws.cell(row_total, 4, total_data.deadhead_miles)
-                ws.cell(row_total, 5, total_data.deadhead_hours)
-                ws.cell(row_total, 6, total_data.pmt)
-                ws.cell(row_total, 7, total_data.fuel)
-
-                for trip_type_index in range(0, len(trip_types)):
-                    trip_type = trip_types[trip_type_index]
-                    trip_type_col = trip_type_start + (trip_type_index * trip_type_sub_cols)
-                    ws.cell(row_header, trip_type_col, 'Trip Type: ' + str(trip_type))
-                    ws.cell(row_total, trip_type_col, total_data.trip_types[trip_type].passenger)
-                    ws.cell(row_total, trip_type_col + 1, total_data.trip_types[trip_type].no_passenger)
-                    ws.cell(row_total, trip_type_col + 2, total_data.trip_types[trip_type].total)
-
-                ws.cell(row_total, trip_type_start + trip_type_cols, total_data.trip_types_total.passenger)
-                ws.cell(row_total, trip_type_start + trip_type_cols + 1, total_data.trip_types_total.no_passenger)
-                ws.cell(row_total, trip_type_start + trip_type_cols + 2, total_data.trip_types_total.total)
-
-                ws.cell(row_total, trip_type_end, total_data.collected_cash.to_float())
-                ws.cell(row_total, trip_type_end + 1, total_data.collected_check.to_float())
-                ws.cell(row_total, trip_type_end + 2, total_data.total_collected_money.to_float())
-
-                continue
-
-            # daily report data
-            rdata = vr.days[i-1]
-            rdata_date = rdata['date']
-            rdata_all = rdata['data']
-
-            ws.cell(row, 1, rdata_date)
-            ws.cell(row, 2, rdata_all.service_miles)
-            ws.cell(row, 3, rdata_all.service_hours)
-            ws.cell(row, 4, rdata_all.deadhead_miles)
-            ws.cell(row, 5, rdata_all.deadhead_hours)
-            ws.cell(row, 6, rdata_all.pmt)
-            ws.cell(row, 7, rdata_all.fuel)
-
-            for trip_type_index in range(0, len(trip_types)):
-                trip_type = trip_types[trip_type_index]
-                trip_type_col = trip_type_start + (trip_type_index * trip_type_sub_cols)
-                ws.cell(row, trip_type_col, rdata_all.trip_types[trip_type].passenger)
-                ws.cell(row, trip_type_col + 1, rdata_all.trip_types[trip_type].no_passenger)
-                ws.cell(row, trip_type_col + 2, rdata_all.trip_types[trip_type].total)
-
-            ws.cell(row, trip_type_start + trip_type_cols, rdata_all.trip_types_total.passenger)
-            ws.cell(row, trip_type_start + trip_type_cols + 1, rdata_all.trip_types_total.no_passenger)
-            ws.cell(row, trip_type_start + trip_type_cols + 2, rdata_all.trip_types_total.total)
-
-            ws.cell(row, trip_type_end, rdata_all.collected_cash.to_float())
-            ws.cell(row, trip_type_end + 1, rdata_all.collected_check.to_float())
-            ws.cell(row, trip_type_end + 2, rdata_all.total_collected_money.to_float())
+        WriteVehicleSheet(ws, [(i['date'], i['data']) for i in vr.days], vr.totals)
 
     #####
     #### Unique rider summary
     #####
     ws = wb.create_sheet('Rider Summary')
 
-    row_header = 1
-    row_total = row_header + 3
-
-    row_header_trips = row_total + 2
-    row_total_trips = row_header_trips + 3
-
-    row_header_riders = row_total_trips + 2
-    row_riders = row_header_riders + 1
-    row_riders_end = row_riders + len(report.unique_riders.names)
-
-    ws.row_dimensions[row_header].height = style_rowheight_header
-    ws.row_dimensions[row_header_trips].height = style_rowheight_header
-    ws.row_dimensions[row_header_riders].height = style_rowheight_header
-
-    ws.cell(row_header, 2, 'Elderly Ambulatory')
-    ws.cell(row_header, 3, 'Elderly Non-Ambulatory')
-    ws.cell(row_header, 4, 'Non-Elderly Ambulatory')
-    ws.cell(row_header, 5, 'Non-Elderly Non-Ambulatory')
-    ws.cell(row_header, 6, 'Unknown')
-    ws.cell(row_header, 7, 'Total')
-    ws.cell(row_header, 8, 'Staff')
-    ws.cell(row_header, 9, 'Total (with staff)')
-
-    ws.cell(row_header+1, 1, 'On vehicle')
-    ws.cell(row_header+2, 1, 'Not on vehicle')
-    ws.cell(row_total, 1, 'TOTAL')
-    for i in range(0, 8):
-        ws.cell(row_header+1, i+2, report.unique_riders.by_individuals[i].passenger)
-        ws.cell(row_header+2, i+2, report.unique_riders.by_individuals[i].no_passenger)
-        ws.cell(row_total, i+2, report.unique_riders.by_individuals[i].total)
-
-    ws.cell(row_header_trips, 2, 'Elderly Ambulatory')
-    ws.cell(row_header_trips, 3, 'Elderly Non-Ambulatory')
-    ws.cell(row_header_trips, 4, 'Non-Elderly Ambulatory')
-    ws.cell(row_header_trips, 5, 'Non-Elderly Non-Ambulatory')
-    ws.cell(row_header_trips, 6, 'Unknown')
-    ws.cell(row_header_trips, 7, 'Total')
-    ws.cell(row_header_trips, 8, 'Staff')
-    ws.cell(row_header_trips, 9, 'Total (with staff)')
-
-    ws.cell(row_header_trips+1, 1, 'Trips on vehicle')
-    ws.cell(row_header_trips+2, 1, 'Not on vehicle')
-    ws.cell(row_total, 1, 'TOTAL')
-    for i in range(0,8):
-        ws.cell(row_header_trips+1, i+2, report.unique_riders.by_trips[i].passenger)
-        ws.cell(row_header_trips+2, i+2, report.unique_riders.by_trips[i].no_passenger)
-        ws.cell(row_total_trips, i+2, report.unique_riders.by_trips[i].total)
-
-    ws.cell(row_header_riders, 1, 'Name')
-    ws.cell(row_header_riders, 3, 'Elderly')
-    ws.cell(row_header_riders, 4, 'Ambulatory')
-    ws.cell(row_header_riders, 5, 'Trips on vehicle')
-    ws.cell(row_header_riders, 6, 'Trips not on vehicle')
-    ws.cell(row_header_riders, 7, 'No-Show')
-    ws.cell(row_header_riders, 8, 'Canceled (late)')
-    ws.cell(row_header_riders, 9, 'Canceled (same-day)')
-    ws.cell(row_header_riders, 10, 'Total Trips')
-
-    rider_index = 0
-
-    unique_rider_list = list(report.unique_riders.names.values())
-
-    for i in range(0, row_riders_end):
-        row = i + 1
-
-        # apply styles
-        if row <= row_total_trips:
-            for col in range(1, 10):
-                ws.cell(row, col).border = style_border_normal
-                if row == row_header or row == row_header_trips:
-                    ws.column_dimensions[get_column_letter(col)].width = style_colwidth_normal
-                    ws.cell(row, col).font = style_font_header
-                    ws.cell(row, col).alignment = style_alignment_header
-                    ws.cell(row, col).fill = style_fill_header
-                elif row == row_total or row == row_total_trips:
-                    ws.cell(row, col).font = style_font_total
-                    ws.cell(row, col).fill = style_fill_total
-                else:
-                    ws.cell(row, col).font = style_font_normal
-            continue
-        elif row == row_header_riders:
-            for col in range(1, 11):
-                ws.merge_cells(start_row=row, start_column=1, end_row=row, end_column=2)
-                ws.cell(row, col).border = style_border_normal
-                ws.cell(row, col).font = style_font_header
-                ws.cell(row, col).alignment = style_alignment_header
-                ws.cell(row, col).fill = style_fill_header
-            continue
-        elif row < row_header_riders:
-            continue
-
-        if rider_index >= len(report.unique_riders.names):
-            break
-
-        while rider_index < len(unique_rider_list):
-            rdata = unique_rider_list[rider_index]
-            rider_index += 1
-            if rdata.trips.total > 0:
-                ws.cell(row, 1, rdata.name)
-                ws.cell(row, 3, rdata.elderly)
-                ws.cell(row, 4, rdata.ambulatory)
-                ws.cell(row, 5, rdata.trips.passenger)
-                ws.cell(row, 6, rdata.trips.no_passenger)
-                ws.cell(row, 7, rdata.trips_no_show.total)
-                ws.cell(row, 8, rdata.trips_canceled_late.total)
-                ws.cell(row, 9, rdata.trips_canceled_very_late.total)
-                ws.cell(row, 10, rdata.trips.total)
-
-                # apply rider row styles
-                ws.merge_cells(start_row=row, start_column=1, end_row=row, end_column=2)
-                for col in range(1, 11):
-                    ws.cell(row, col).border = style_border_normal
-                    ws.cell(row, col).font = style_font_normal
-                    if col == 3 or col == 4:
-                        ws.cell(row, col).number_format = '0'
-
-                break
+    SetColumnWidths(ws, [style_colwidth_normal] * 9)
+
+    rider_categories = ['Elderly Ambulatory', 'Elderly Non-Ambulatory', 'Non-Elderly Ambulatory', 'Non-Elderly Non-Ambulatory', 'Unknown', 'Total', 'Staff', 'Total (with staff)']
+
+    HeaderRow(ws, 1, [None] + rider_categories)
+    ws.append([Cell(ws, 'On vehicle', 'report_normal')] + [Cell(ws, i.passenger, 'report_normal') for i in report.unique_riders.by_individuals])
+    ws.append([Cell(ws, 'Not on vehicle', 'report_normal')] + [Cell(ws, i.no_passenger, 'report_normal') for i in report.unique_riders.by_individuals])
+    ws.append([Cell(ws, 'TOTAL', 'report_total')] + [Cell(ws, i.total, 'report_total') for i in report.unique_riders.by_individuals])
+    ws.append([Cell(ws, None, 'report_normal') for i in range(0, 9)])
+
+    HeaderRow(ws, 6, [None] + rider_categories)
+    ws.append([Cell(ws, 'Trips on vehicle', 'report_normal')] + [Cell(ws, i.passenger, 'report_normal') for i in report.unique_riders.by_trips])
+    ws.append([Cell(ws, 'Not on vehicle', 'report_normal')] + [Cell(ws, i.no_passenger, 'report_normal') for i in report.unique_riders.by_trips])
+    ws.append([Cell(ws, None, 'report_total')] + [Cell(ws, i.total, 'report_total') for i in report.unique_riders.by_trips])
+    ws.append([])
+
+    row = 11
+    ws.merged_cells.add('A' + str(row) + ':B' + str(row))
+    HeaderRow(ws, row, ['Name', None, 'Elderly', 'Ambulatory', 'Trips on vehicle', 'Trips not on vehicle', 'No-Show', 'Canceled (late)', 'Canceled (same-day)', 'Total Trips'])
+
+    for rdata in report.unique_riders.names.values():
+        if rdata.trips.total > 0:
+            row += 1
+            ws.merged_cells.add('A' + str(row) + ':B' + str(row))
+            ws.append([
+                Cell(ws, rdata.name, 'report_normal'),
+                Cell(ws, None, 'report_normal'),
+                Cell(ws, rdata.elderly, 'report_normal', 'integer'),
+                Cell(ws, rdata.ambulatory, 'report_normal', 'integer'),
+                Cell(ws, rdata.trips.passenger, 'report_normal'),
+                Cell(ws, rdata.trips.no_passenger, 'report_normal'),
+                Cell(ws, rdata.trips_no_show.total, 'report_normal'),
+                Cell(ws, rdata.trips_canceled_late.total, 'report_normal'),
+                Cell(ws, rdata.trips_canceled_very_late.total, 'report_normal'),
+                Cell(ws, rdata.trips.total, 'report_normal'),
+            ])
 
     #####
     #### Trip Types and Tags
     #####
     ws = wb.create_sheet('Trip Types and Tags')
 
-    row_header = 1
-    row_trip_type = row_header + 1
-    row_trip_type_unknown = row_trip_type + len(trip_types)
-    row_trip_type_total = row_trip_type_unknown + 1
-    row_header_tags = row_trip_type_total + 2
-    row_tags = row_header_tags + 1
-    row_tags_end = row_tags + len(tags)
-
-    ws.cell(row_header, 1, 'Trip Type')
-    ws.cell(row_header, 2, 'Trips on vehicle')
-    ws.cell(row_header, 3, 'Trips not on vehicle')
-    ws.cell(row_header, 4, 'Total Trips')
-
-    ws.cell(row_trip_type_unknown, 1, 'Unknown')
-    ws.cell(row_trip_type_unknown, 2, report.all_vehicles.trip_types_unknown.passenger)
-    ws.cell(row_trip_type_unknown, 3, report.all_vehicles.trip_types_unknown.no_passenger)
-    ws.cell(row_trip_type_unknown, 4, report.all_vehicles.trip_types_unknown.total)
-
-    ws.cell(row_trip_type_total, 1, 'TOTAL')
-    ws.cell(row_trip_type_total, 2, report.all_vehicles.trip_types_total.passenger)
-    ws.cell(row_trip_type_total, 3, report.all_vehicles.trip_types_total.no_passenger)
-    ws.cell(row_trip_type_total, 4, report.all_vehicles.trip_types_total.total)
-
-    ws.cell(row_header_tags, 1, 'Tag')
-    ws.cell(row_header_tags, 2, 'Trips on vehicle')
-    ws.cell(row_header_tags, 3, 'Trips not on vehicle')
-    ws.cell(row_header_tags, 4, 'Total Trips')
-
-    ws.row_dimensions[row_header].height = style_rowheight_header
-    ws.row_dimensions[row_header_tags].height = style_rowheight_header
-    ws.column_dimensions[get_column_letter(1)].width = style_colwidth_normal * 2
-
-    for i in range(0, row_tags_end):
-        row = i + 1
-
-        if row == row_trip_type_total + 1:
-            continue
+    SetColumnWidths(ws, [style_colwidth_normal * 2] + [style_colwidth_normal] * 3)
 
-        # apply styles
-        for col in range(1, 5):
+    def TripCountRow(label, trip_count, style):
+        return [Cell(ws, label, style), Cell(ws, trip_count.passenger, style), Cell(ws, trip_count.no_passenger, style), Cell(ws, trip_count.total, style)]
 
-            if col > 1:
-                ws.column_dimensions[get_column_letter(col)].width = style_colwidth_normal
+    HeaderRow(ws, 1, ['Trip Type', 'Trips on vehicle', 'Trips not on vehicle', 'Total Trips'])
+    for trip_type in trip_types:
+        ws.append(TripCountRow(str(trip_type), report.all_vehicles.trip_types[trip_type], 'report_normal'))
+    ws.append(TripCountRow('Unknown', report.all_vehicles.trip_types_unknown, 'report_normal'))
+    ws.append(TripCountRow('TOTAL', report.all_vehicles.trip_types_total, 'report_total'))
+    ws.append([])
 
-            if row == row_trip_type_total:
-                ws.cell(row, col).font = style_font_total
-                ws.cell(row, col).fill = style_fill_total
-                ws.cell(row, col).border = style_border_normal
-            elif row == row_header or row == row_header_tags:
-                ws.cell(row, col).font = style_font_header
-                ws.cell(row, col).alignment = style_alignment_header
-                ws.cell(row, col).fill = style_fill_header
-            else:
-                ws.cell(row, col).font = style_font_normal
-
-            if row < row_tags_end:
-                ws.cell(row, col).border = style_border_normal
-
-        if row >= row_trip_type and row < row_trip_type_unknown:
-            trip_type = trip_types[row - row_trip_type]
-            ws.cell(row, 1, str(trip_type))
-            ws.cell(row, 2, report.all_vehicles.trip_types[trip_type].passenger)
-            ws.cell(row, 3, report.all_vehicles.trip_types[trip_type].no_passenger)
-            ws.cell(row, 4, report.all_vehicles.trip_types[trip_type].total)
-        elif row >= row_tags and row < row_tags_end:
-            tag = str(tags[row - row_tags])
-            ws.cell(row, 1, tag)
-            ws.cell(row, 2, report.all_vehicles.tags[tag].passenger)
-            ws.cell(row, 3, report.all_vehicles.tags[tag].no_passenger)
-            ws.cell(row, 4, report.all_vehicles.tags[tag].total)
+    HeaderRow(ws, len(trip_types) + 5, ['Tag', 'Trips on vehicle', 'Trips not on vehicle', 'Total Trips'])
+    for tag in tags:
+        ws.append(TripCountRow(str(tag), report.all_vehicles.tags[str(tag)], 'report_normal'))
 
     #####
     #### Frequent Destinations
     #####
     ws = wb.create_sheet('Frequent Destinations')
 
-    row_header = 1
-    row_dest = row_header + 1
-    row_dest_end = row_dest + len(report.frequent_destinations)
-
-    ws.cell(row_header, 1, 'Address')
-    ws.cell(row_header, 2, 'Trips on vehicle')
-    ws.cell(row_header, 3, 'Trips not on vehicle')
-    ws.cell(row_header, 4, 'Total Trips')
-    ws.cell(row_header, 5, 'Average Mileage')
-
-    ws.row_dimensions[row_header].height = style_rowheight_header
-    ws.column_dimensions[get_column_letter(1)].width = style_colwidth_normal * 2
-
-    frequent_destinations = list(report.frequent_destinations.values())
-    for i in range(0, row_dest_end):
-        row = i + 1
-
-        # apply styles
-        for col in range(1, 6):
-            if col > 1:
-                ws.column_dimensions[get_column_letter(col)].width = style_colwidth_normal
-
-            if row < row_dest_end:
-                ws.cell(row, col).border = style_border_normal
-
-            if row == row_header:
-                ws.cell(row, col).font = style_font_header
-                ws.cell(row, col).alignment = style_alignment_header
-                ws.cell(row, col).fill = style_fill_header
-            else:
-                ws.cell(row, col).font = style_font_normal
-
-        if row < row_dest or row == row_dest_end:
-            continue
-
-        rdata = frequent_destinations[i-1]
-
-        ws.cell(row, 1, rdata.address)
-        ws.cell(row, 2, rdata.trips.passenger)
-        ws.cell(row, 3, rdata.trips.no_passenger)
-        ws.cell(row, 4, rdata.trips.total)
-        ws.cell(row, 5, rdata.avg_mileage)
-        ws.cell(row, 5).number_format = '0.0'
+    SetColumnWidths(ws, [style_colwidth_normal * 2] + [style_colwidth_normal] * 4)
+
+    HeaderRow(ws, 1, ['Address', 'Trips on vehicle', 'Trips not on vehicle', 'Total Trips', 'Average Mileage'])
+    for rdata in report.frequent_destinations.values():
+        ws.append([
+            Cell(ws, rdata.address, 'report_normal'),
+            Cell(ws, rdata.trips.passenger, 'report_normal'),
+            Cell(ws, rdata.trips.no_passenger, 'report_normal'),
+            Cell(ws, rdata.trips.total, 'report_normal'),
+            Cell(ws, rdata.avg_mileage, 'report_normal', 'miles'),
+        ])
+    if report.frequent_destinations_other:
+        rdata = report.frequent_destinations_other
+        ws.append([
+            Cell(ws, 'Other (' + str(rdata.destination_count) + ' destinations)', 'report_normal'),
+            Cell(ws, rdata.trips.passenger, 'report_normal'),
+            Cell(ws, rdata.trips.no_passenger, 'report_normal'),
+            Cell(ws, rdata.trips.total, 'report_normal'),
+            Cell(ws, rdata.avg_mileage, 'report_normal', 'miles'),
+        ])
 
     #####
     #### Fares & Payments (by client)
     #####
     ws = wb.create_sheet('Fares & Payments (by client)')
 
-    row_header = 1
-    row_data = row_header + 1
-    row_total = row_data
-    row_data_max = row_data + len(report.unique_riders.names)
-
-    ws.cell(row_header, 1, 'Name')
-    ws.cell(row_header, 2, 'Cash (driver collected)')
-    ws.cell(row_header, 3, 'Check (driver collected)')
-    ws.cell(row_header, 4, 'Cash (not driver collected)')
-    ws.cell(row_header, 5, 'Check (not driver collected)')
-    ws.cell(row_header, 6, 'Total Payments')
-    ws.cell(row_header, 7, 'Total Fares')
-    ws.cell(row_header, 8, 'Total Owed')
-
-    ws.row_dimensions[row_header].height = style_rowheight_header
-    ws.column_dimensions[get_column_letter(1)].width = style_colwidth_normal * 2
-
-    data_index = 0
-
-    for i in range(0, row_data_max):
-        row = i + 1
-
-        if row == row_header:
-            # apply styles
-            for col in range(1, 9):
-                if col > 1:
-                    ws.column_dimensions[get_column_letter(col)].width = style_colwidth_normal
-                ws.cell(row, col).border = style_border_normal
-                ws.cell(row, col).font = style_font_header
-                ws.cell(row, col).alignment = style_alignment_header
-                ws.cell(row, col).fill = style_fill_header
-        else:
-            row_total = row
-
-            while data_index < len(unique_rider_list):
-                rdata = unique_rider_list[data_index]
-                data_index += 1
-
-                if rdata.total_payments.value > 0 or rdata.total_fares.value > 0:
-                    ws.cell(row, 1, rdata.name)
-                    ws.cell(row, 2, rdata.collected_cash.to_float())
-                    ws.cell(row, 3, rdata.collected_check.to_float())
-                    ws.cell(row, 4, rdata.paid_cash.to_float())
-                    ws.cell(row, 5, rdata.paid_check.to_float())
-                    ws.cell(row, 6, rdata.total_payments.to_float())
-                    ws.cell(row, 7, rdata.total_fares.to_float())
-                    ws.cell(row, 8, rdata.total_owed.to_float())
-
-                    # apply styles
-                    for col in range(1, 9):
-                        if col > 1:
-                            ws.cell(row, col).number_format = '$0.00'
-                        ws.cell(row, col).border = style_border_normal
-                        ws.cell(row, col).font = style_font_normal
-
-                    row_total += 1
-
-                    break
-
-            if row == row_total:
-                ws.cell(row, 1, 'TOTAL')
-                ws.cell(row, 2, report.unique_riders.total_collected_cash.to_float())
-                ws.cell(row, 3, report.unique_riders.total_collected_check.to_float())
-                ws.cell(row, 4, report.unique_riders.total_paid_cash.to_float())
-                ws.cell(row, 5, report.unique_riders.total_paid_check.to_float())
-                ws.cell(row, 6, report.unique_riders.total_total_payments.to_float())
-                ws.cell(row, 7, report.unique_riders.total_total_fares.to_float())
-                ws.cell(row, 8, report.unique_riders.total_total_owed.to_float())
-
-                # apply styles
-                for col in range(1, 9):
-                    if col > 1:
-                        ws.cell(row, col).number_format = '$0.00'
-                    ws.cell(row, col).border = style_border_normal
-                    ws.cell(row, col).font = style_font_total
-                    ws.cell(row, col).fill = style_fill_total
-
-                break
+    SetColumnWidths(ws, [style_colwidth_normal * 2] + [style_colwidth_normal] * 7)
+
+    def MoneyRow(label, values, style, label_format=None):
+        return [Cell(ws, label, style, label_format)] + [Cell(ws, i.to_float(), style, 'money') for i in values]
+
+    HeaderRow(ws, 1, ['Name', 'Cash (driver collected)', 'Check (driver collected)', 'Cash (not driver collected)', 'Check (not driver collected)', 'Total Payments', 'Total Fares', 'Total Owed'])
+    for rdata in report.unique_riders.names.values():
+        if rdata.total_payments.value > 0 or rdata.total_fares.value > 0:
+            ws.append(MoneyRow(rdata.name, [rdata.collected_cash, rdata.collected_check, rdata.paid_cash, rdata.paid_check, rdata.total_payments, rdata.total_fares, rdata.total_owed], 'report_normal'))
+
+    unique_riders = report.unique_riders
+    ws.append(MoneyRow('TOTAL', [unique_riders.total_collected_cash, unique_riders.total_collected_check, unique_riders.total_paid_cash, unique_riders.total_paid_check, unique_riders.total_total_payments, unique_riders.total_total_fares, unique_riders.total_total_owed], 'report_total'))
 
     #####
     #### Fares & Payments (by date)
     #####
     ws = wb.create_sheet('Fares & Payments (by date)')
 
-    row_header = 1
-    row_data = row_header + 1
-    row_total = row_data
-    row_data_max = row_data + len(report.report_all)
-
-    ws.cell(row_header, 1, 'Date')
-    ws.cell(row_header, 2, 'Cash (driver collected)')
-    ws.cell(row_header, 3, 'Check (driver collected)')
-    ws.cell(row_header, 4, 'Cash (not driver collected)')
-    ws.cell(row_header, 5, 'Check (not driver collected)')
-    ws.cell(row_header, 6, 'Total Payments')
-    ws.cell(row_header, 7, 'Total Fares')
-
-    ws.row_dimensions[row_header].height = style_rowheight_header
-
-    data_index = 0
-
-    for i in range(0, row_data_max):
-        row = i + 1
-
-        if row == row_header:
-            # apply styles
-            for col in range(1, 8):
-                ws.column_dimensions[get_column_letter(col)].width = style_colwidth_normal
-                ws.cell(row, col).border = style_border_normal
-                ws.cell(row, col).font = style_font_header
-                ws.cell(row, col).alignment = style_alignment_header
-                ws.cell(row, col).fill = style_fill_header
-        else:
-            row = row_total
-
-            while data_index < len(report.report_all):
-                rdata = report.report_all[data_index]
-                data_index += 1
-
-                if rdata.total_payments.value > 0 or rdata.total_fares.value > 0:
-                    ws.cell(row, 1, rdata.date)
-                    ws.cell(row, 2, rdata.collected_cash.to_float())
-                    ws.cell(row, 3, rdata.collected_check.to_float())
-                    ws.cell(row, 4, rdata.paid_cash.to_float())
-                    ws.cell(row, 5, rdata.paid_check.to_float())
-                    ws.cell(row, 6, rdata.total_payments.to_float())
-                    ws.cell(row, 7, rdata.total_fares.to_float())
-
-                    # apply styles
-                    for col in range(1, 8):
-                        if col == 1:
-                            ws.cell(row, col).number_format = 'mmm dd, yyyy'
-                        else:
-                            ws.cell(row, col).number_format = '$0.00'
-                        ws.cell(row, col).border = style_border_normal
-                        ws.cell(row, col).font = style_font_normal
-
-                    row_total += 1
+    SetColumnWidths(ws, [style_colwidth_normal] * 7)
 
-                    break
+    HeaderRow(ws, 1, ['Date', 'Cash (driver collected)', 'Check (driver collected)', 'Cash (not driver collected)', 'Check (not driver collected)', 'Total Payments', 'Total Fares'])
+    for rdata in report.report_all:
+        if rdata.total_payments.value > 0 or rdata.total_fares.value > 0:
+            ws.append(MoneyRow(rdata.date, [rdata.collected_cash, rdata.collected_check, rdata.paid_cash, rdata.paid_check, rdata.total_payments, rdata.total_fares], 'report_normal', 'date'))
 
-            if row == row_total:
-                ws.cell(row, 1, 'TOTAL')
-                ws.cell(row, 2, report.unique_riders.total_collected_cash.to_float())
-                ws.cell(row, 3, report.unique_riders.total_collected_check.to_float())
-                ws.cell(row, 4, report.unique_riders.total_paid_cash.to_float())
-                ws.cell(row, 5, report.unique_riders.total_paid_check.to_float())
-                ws.cell(row, 6, report.unique_riders.total_total_payments.to_float())
-                ws.cell(row, 7, report.unique_riders.total_total_fares.to_float())
-
-                # apply styles
-                for col in range(1, 8):
-                    if col > 1:
-                        ws.cell(row, col).number_format = '$0.00'
-                    ws.cell(row, col).border = style_border_normal
-                    ws.cell(row, col).font = style_font_total
-                    ws.cell(row, col).fill = style_fill_total
-
-                break
+    ws.append(MoneyRow('TOTAL', [unique_riders.total_collected_cash, unique_riders.total_collected_check, unique_riders.total_paid_cash, unique_riders.total_paid_check, unique_riders.total_total_payments, unique_riders.total_total_fares], 'report_total'))
 
     #####
     #### Money Collected by the Drivers
     #####
     ws = wb.create_sheet('Driver-collected Money')
 
-    row_header = 1
-    row_data = row_header + 1
-    row_total = row_data
-    row_data_max = row_data + len(report.money_trips)
-
-    ws.cell(row_header, 1, 'Date')
-    ws.cell(row_header, 2, 'Name')
-    ws.cell(row_header, 3, 'Cash')
-    ws.cell(row_header, 4, 'Check')
-
-    ws.row_dimensions[row_header].height = style_rowheight_header
-    ws.column_dimensions[get_column_letter(2)].width = style_colwidth_normal * 2
-
-    data_index = 0
-
-    for i in range(0, row_data_max):
-        row = i + 1
-
-        if row == row_header:
-            # apply styles
-            for col in range(1, 5):
-                if col != 2:
-                    ws.column_dimensions[get_column_letter(col)].width = style_colwidth_normal
-                ws.cell(row, col).border = style_border_normal
-                ws.cell(row, col).font = style_font_header
-                ws.cell(row, col).alignment = style_alignment_header
-                ws.cell(row, col).fill = style_fill_header
-        else:
-            row_total = row
-
-            if data_index < len(report.money_trips):
-                rdata = report.money_trips[data_index]
-                data_index += 1
-
-                ws.cell(row, 1, rdata.trip.date)
-                ws.cell(row, 2, rdata.trip.name)
-                ws.cell(row, 3, rdata.collected_cash.to_float())
-                ws.cell(row, 4, rdata.collected_check.to_float())
-
-                # apply styles
-                for col in range(1, 5):
-                    if col == 1:
-                        ws.cell(row, col).number_format = 'mmm dd, yyyy'
-                    elif col == 3 or col == 4:
-                        ws.cell(row, col).number_format = '$0.00'
-                    ws.cell(row, col).border = style_border_normal
-                    ws.cell(row, col).font = style_font_normal
-
-                row_total += 1
-
-            if row == row_total:
-                ws.cell(row, 1, 'TOTAL')
-                ws.cell(row, 3, report.money_trips_summary.collected_cash.to_float())
-                ws.cell(row, 4, report.money_trips_summary.collected_check.to_float())
-
-                # apply styles
-                for col in range(1, 5):
-                    if col == 3 or col == 4:
-                        ws.cell(row, col).number_format = '$0.00'
-                    ws.cell(row, col).border = style_border_normal
-                    ws.cell(row, col).font = style_font_total
-                    ws.cell(row, col).fill = style_fill_total
-
-                break
+    SetColumnWidths(ws, [style_colwidth_normal, style_colwidth_normal * 2, style_colwidth_normal, style_colwidth_normal])
+
+    HeaderRow(ws, 1, ['Date', 'Name', 'Cash', 'Check'])
+    for rdata in report.money_trips:
+        ws.append([Cell(ws, rdata.trip.date, 'report_normal', 'date')] + MoneyRow(rdata.trip.name, [rdata.collected_cash, rdata.collected_check], 'report_normal'))
+
+    ws.append([Cell(ws, 'TOTAL', 'report_total')] + MoneyRow(None, [report.money_trips_summary.collected_cash, report.money_trips_summary.collected_check], 'report_total'))
 
     #####
     #### Money Not Collected by the Drivers
     #####
     ws = wb.create_sheet('Non-Driver-collected Money')
 
-    row_header = 1
-    row_data = row_header + 1
-    row_total = row_data
-    row_data_max = row_data + len(report.money_payments)
-
-    ws.cell(row_header, 1, 'Date')
-    ws.cell(row_header, 2, 'Name')
-    ws.cell(row_header, 3, 'Cash')
-    ws.cell(row_header, 4, 'Check')
-
-    ws.row_dimensions[row_header].height = style_rowheight_header
-    ws.column_dimensions[get_column_letter(2)].width = style_colwidth_normal * 2
-
-    data_index = 0
-
-    for i in range(0, row_data_max):
-        row = i + 1
-
-        if row == row_header:
-            # apply styles
-            for col in range(1, 5):
-                if col != 2:
-                    ws.column_dimensions[get_column_letter(col)].width = style_colwidth_normal
-                ws.cell(row, col).border = style_border_normal
-                ws.cell(row, col).font = style_font_header
-                ws.cell(row, col).alignment = style_alignment_header
-                ws.cell(row, col).fill = style_fill_header
-        else:
-            row_total = row
-
-            if data_index < len(report.money_payments):
-                rdata = report.money_payments[data_index]
-                data_index += 1
-
-                ws.cell(row, 1, rdata.date)
-                ws.cell(row, 2, rdata.client.name)
-                ws.cell(row, 3, rdata.cash.to_float())
-                ws.cell(row, 4, rdata.check.to_float())
-
-                # apply styles
-                for col in range(1, 5):
-                    if col == 1:
-                        ws.cell(row, col).number_format = 'mmm dd, yyyy'
-                    elif col == 3 or col == 4:
-                        ws.cell(row, col).number_format = '$0.00'
-                    ws.cell(row, col).border = style_border_normal
-                    ws.cell(row, col).font = style_font_normal
-
-                row_total += 1
-
-            if row == row_total:
-                ws.cell(row, 1, 'TOTAL')
-                ws.cell(row, 3, report.money_payments_summary.cash.to_float())
-                ws.cell(row, 4, report.money_payments_summary.check.to_float())
-
-                # apply styles
-                for col in range(1, 5):
-                    if col == 3 or col == 4:
-                        ws.cell(row, col).number_format = '$0.00'
-                    ws.cell(row, col).border = style_border_normal
-                    ws.cell(row, col).font = style_font_total
-                    ws.cell(row, col).fill = style_fill_total
-
-                break
+    SetColumnWidths(ws, [style_colwidth_normal, style_colwidth_normal * 2, style_colwidth_normal, style_colwidth_normal])
+
+    HeaderRow(ws, 1, ['Date', 'Name', 'Cash', 'Check'])
+    for rdata in report.money_payments:
+        ws.append([Cell(ws, rdata.date, 'report_normal', 'date')] + MoneyRow(rdata.client.name, [rdata.cash, rdata.check], 'report_normal'))
+
+    ws.append([Cell(ws, 'TOTAL', 'report_total')] + MoneyRow(None, [report.money_payments_summary.cash, report.money_payments_summary.check], 'report_total'))
 
     #####
     #### Per-Driver Summary
     #####
     ws = wb.create_sheet('Per-Driver Summary')
 
-    row_header = 1
-    row_data = row_header + 1
-    row_total = row_data
-    row_data_max = row_data + len(report.driver_reports)
-
-    ws.cell(row_header, 1, 'Driver')
-    ws.cell(row_header, 2, 'Service Miles')
-    ws.cell(row_header, 3, 'Service Hours')
-    ws.cell(row_header, 4, 'Deadhead Miles')
-    ws.cell(row_header, 5, 'Deadhead Hours')
-    ws.cell(row_header, 6, 'Total Miles')
-    ws.cell(row_header, 7, 'Total Hours')
-    ws.cell(row_header, 8, 'Days of Service')
-
-    ws.row_dimensions[row_header].height = style_rowheight_header
-
-    data_index = 0
-
-    for i in range(0, row_data_max):
-        row = i + 1
-
-        if row == row_header:
-            # apply styles
-            for col in range(1, 9):
-                ws.column_dimensions[get_column_letter(col)].width = style_colwidth_normal
-                ws.cell(row, col).border = style_border_normal
-                ws.cell(row, col).font = style_font_header
-                ws.cell(row, col).alignment = style_alignment_header
-                ws.cell(row, col).fill = style_fill_header
-        else:
-            row_total = row
-
-            if data_index < len(report.driver_reports):
-                rdata = report.driver_reports[data_index]
-                data_index += 1
-
-                ws.cell(row, 1, str(rdata.driver))
-                ws.cell(row, 2, rdata.totals.service_miles)
-                ws.cell(row, 3, rdata.totals.service_hours)
-                ws.cell(row, 4, rdata.totals.deadhead_miles)
-                ws.cell(row, 5, rdata.totals.deadhead_hours)
-                ws.cell(row, 6, rdata.totals.total_miles)
-                ws.cell(row, 7, rdata.totals.total_hours)
-                ws.cell(row, 8, len(rdata.days))
-
-                # apply styles
-                style_fill_driver = PatternFill(fill_type='solid', fgColor=rdata.driver.get_color())
-                for col in range(1, 9):
-                    ws.cell(row, col).border = style_border_normal
-                    ws.cell(row, col).font = style_font_normal
-                    ws.cell(row, col).fill = style_fill_driver
-                    if col == 2 or col == 4 or col == 6:
-                        ws.cell(row, col).number_format = '0.0'
-                    if col == 3 or col == 5 or col == 7:
-                        ws.cell(row, col).number_format = '0.00'
-
-                row_total += 1
-
-            if row == row_total:
-                ws.cell(row, 1, 'TOTAL')
-                ws.cell(row, 2, report.driver_reports_total.totals.service_miles)
-                ws.cell(row, 3, report.driver_reports_total.totals.service_hours)
-                ws.cell(row, 4, report.driver_reports_total.totals.deadhead_miles)
-                ws.cell(row, 5, report.driver_reports_total.totals.deadhead_hours)
-                ws.cell(row, 6, report.driver_reports_total.totals.total_miles)
-                ws.cell(row, 7, report.driver_reports_total.totals.total_hours)
-                ws.cell(row, 8, report.total_vehicle_days_of_service)
-
-                # apply styles
-                for col in range(1, 9):
-                    ws.cell(row, col).border = style_border_normal
-                    ws.cell(row, col).font = style_font_total
-                    ws.cell(row, col).fill = style_fill_total
-                    if col == 2 or col == 4 or col == 6:
-                        ws.cell(row, col).number_format = '0.0'
-                    if col == 3 or col == 5 or col == 7:
-                        ws.cell(row, col).number_format = '0.00'
-
-                break
+    SetColumnWidths(ws, [style_colwidth_normal] * 8)
+
+    def DriverRow(label, totals, days_of_service, style):
+        return [
+            Cell(ws, label, style),
+            Cell(ws, totals.service_miles, style, 'miles'),
+            Cell(ws, totals.service_hours, style, 'hours'),
+            Cell(ws, totals.deadhead_miles, style, 'miles'),
+            Cell(ws, totals.deadhead_hours, style, 'hours'),
+            Cell(ws, totals.total_miles, style, 'miles'),
+            Cell(ws, totals.total_hours, style, 'hours'),
+            Cell(ws, days_of_service, style),
+        ]
+
+    HeaderRow(ws, 1, ['Driver', 'Service Miles', 'Service Hours', 'Deadhead Miles', 'Deadhead Hours', 'Total Miles', 'Total Hours', 'Days of Service'])
+    for rdata in report.driver_reports:
+        ws.append(DriverRow(str(rdata.driver), rdata.totals, len(rdata.days), DriverStyle(rdata.driver)))
+
+    ws.append(DriverRow('TOTAL', report.driver_reports_total.totals, report.total_vehicle_days_of_service, 'report_total'))
 
     #####
     #### Trips per Weekday
     #####
     ws = wb.create_sheet('Trips per Weekday')
 
-    row_header = 1
-    row_data = row_header + 1
-    row_total = row_data
-
-    ws.cell(row_header, 1, 'Monday')
-    ws.cell(row_header, 2, 'Tuesday')
-    ws.cell(row_header, 3, 'Wednesday')
-    ws.cell(row_header, 4, 'Thursday')
-    ws.cell(row_header, 5, 'Friday')
-    ws.cell(row_header, 6, 'Saturday')
-    ws.cell(row_header, 7, 'Sunday')
-
-    ws.row_dimensions[row_header].height = style_rowheight_header
-
-    data_index = 0
-
-    for i in range(0, row_data_max):
-        row = i + 1
-
-        if row == row_header:
-            # apply styles
-            for col in range(1, 8):
-                ws.column_dimensions[get_column_letter(col)].width = style_colwidth_normal
-                ws.cell(row, col).border = style_border_normal
-                ws.cell(row, col).font = style_font_header
-                ws.cell(row, col).alignment = style_alignment_header
-                ws.cell(row, col).fill = style_fill_header
-        else:
-            row_total = row
-
-            if row == row_total:
-                for col in range(1, 8):
-                    ws.cell(row, col, report.weekday_totals[col-1].total)
-
-                    # apply styles
-                    ws.cell(row, col).border = style_border_normal
-                    ws.cell(row, col).font = style_font_normal
-
-                break
+    SetColumnWidths(ws, [style_colwidth_normal] * 7)
 
-    wb.save(filename=temp_file.name)
+    HeaderRow(ws, 1, ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'])
+    ws.append([Cell(ws, i.total, 'report_normal') for i in report.weekday_totals])
 
-    return FileResponse(open(temp_file.name, 'rb'), filename='Transit_Report_' + date_start.strftime('%Y-%m-%d') + '_to_' + date_end.strftime('%Y-%m-%d') + '.xlsx', as_attachment=True)
+    wb.save(output)
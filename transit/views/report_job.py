@@ -0,0 +1,178 @@
+# Copyright © 2019-2023 Justin Jacobs
+#
+# This file is part of the Transit Log System.
+#
+# The Transit Log System is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+#
+# The Transit Log System is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# The Transit Log System.  If not, see http://www.gnu.org/licenses/
+
+import os
+import datetime
+
+from time import perf_counter
+
+from django.http import HttpResponseRedirect, JsonResponse, FileResponse, Http404
+from django.shortcuts import render, get_object_or_404
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.conf import settings
+from django.utils import timezone
+
+from transit.models import Driver, Vehicle, ReportJob, SiteSettings
+from transit.views.report import Report, reportFilter, reportJobIsNeeded, reportWriteXLSX
+
+from django.contrib.auth.decorators import permission_required
+
+def reportJobRun(job):
+    # loads a claimed job's report and writes its HTML snapshot and workbook to REPORT_JOB_DIR
+    # called by the report_jobs management command
+    perf_progress = perf_counter()
+
+    def Progress(days_done, days_total):
+        nonlocal perf_progress
+
+        # writing every day would slow the load down, so the progress is saved about once a second
+        if days_done < days_total and perf_counter() - perf_progress < 1:
+            return
+        perf_progress = perf_counter()
+        ReportJob.objects.filter(id=job.id).update(days_done=days_done, days_total=days_total)
+
+    try:
+        report = Report()
+        # jobs are for long ranges, so the report is streamed to keep the memory used by the worker flat
+        report.load(job.date_start, job.date_end, driver_id=job.driver_id, client_names=job.client_names, progress=Progress, stream=True)
+
+        selected_driver = None
+        if job.driver_id != None:
+            selected_driver = Driver.objects.filter(id=job.driver_id).first()
+
+        # the print template is used for the snapshot, since it doesn't need anything from the request
+        context = {
+            'user': job.created_by,
+            'settings': SiteSettings.load(),
+            'date_start': job.date_start,
+            'date_end': job.date_end,
+            'report': report,
+            'show_daily_data': job.show_daily_data,
+            'is_short_report': len(report.report_all) <= 31,
+            'vehicle_table_colspan': 13 + (3 * len(report.context.triptypes)),
+            'vehicles': Vehicle.objects.all(),
+            'selected_driver': selected_driver,
+            'selected_clients': job.client_names,
+            'is_filtered': job.clients_filtered or selected_driver,
+            'clients_filtered': job.clients_filtered,
+        }
+
+        os.makedirs(settings.REPORT_JOB_DIR, exist_ok=True)
+
+        # the files are written under a temporary name, so that a download never sees a partially written file
+        html_path = job.getFilePath('html')
+        with open(html_path + '.tmp', 'w', encoding='utf-8') as html_file:
+            html_file.write(render_to_string('report/print.html', context))
+        os.replace(html_path + '.tmp', html_path)
+
+        xlsx_path = job.getFilePath('xlsx')
+        with open(xlsx_path + '.tmp', 'wb') as xlsx_file:
+            reportWriteXLSX(report, xlsx_file)
+        os.replace(xlsx_path + '.tmp', xlsx_path)
+    except Exception as e:
+        job.deleteFiles()
+        ReportJob.objects.filter(id=job.id).update(status=ReportJob.STATUS_FAILED, finished=timezone.now(), error=type(e).__name__ + ': ' + str(e))
+        return False
+
+    ReportJob.objects.filter(id=job.id).update(status=ReportJob.STATUS_DONE, finished=timezone.now())
+    return True
+
+@permission_required(['transit.view_trip', 'transit.view_shift'])
+def reportJobCreate(request, start_year, start_month, start_day, end_year, end_month, end_day):
+    date_start = datetime.date(start_year, start_month, start_day)
+    date_end = datetime.date(end_year, end_month, end_day)
+
+    if date_start > date_end:
+        swap_date = date_start
+        date_start = date_end
+        date_end = swap_date
+
+    filter_results = reportFilter(request)
+    client_names = filter_results[0]
+    driver_id = filter_results[1]
+    clients_filtered = filter_results[2]
+
+    if request.method == 'POST':
+        job = ReportJob()
+        job.created_by = request.user
+        job.date_start = date_start
+        job.date_end = date_end
+        job.driver_id = driver_id
+        job.client_names = client_names
+        job.clients_filtered = clients_filtered
+        job.show_daily_data = request.session.get('report_show_daily_data', False)
+        job.query_string = request.GET.urlencode()
+        job.days_total = (date_end - date_start).days + 1
+        job.save()
+        return HttpResponseRedirect(reverse('report-job', kwargs={'id': job.id}))
+
+    # earlier jobs for the same report, so that they don't have to be run again
+    jobs = ReportJob.objects.filter(date_start=date_start, date_end=date_end, driver_id=driver_id, query_string=request.GET.urlencode()).exclude(status=ReportJob.STATUS_FAILED)
+
+    context = {
+        'date_start': date_start,
+        'date_end': date_end,
+        'day_count': (date_end - date_start).days + 1,
+        'jobs': jobs,
+        'url_report': reverse('report', kwargs={'start_year': date_start.year, 'start_month': date_start.month, 'start_day': date_start.day, 'end_year': date_end.year, 'end_month': date_end.month, 'end_day': date_end.day}),
+        'is_needed': reportJobIsNeeded(date_start, date_end),
+        'is_filtered': clients_filtered or driver_id != None,
+    }
+    return render(request, 'report/job_create.html', context)
+
+@permission_required(['transit.view_trip', 'transit.view_shift'])
+def reportJobView(request, id):
+    job = get_object_or_404(ReportJob, id=id)
+
+    context = {
+        'job': job,
+        'url_status': reverse('report-job-status', kwargs={'id': job.id}),
+    }
+    return render(request, 'report/job_view.html', context)
+
+@permission_required(['transit.view_trip', 'transit.view_shift'])
+def reportJobStatus(request, id):
+    # polled by the job page, so it only reads the job itself
+    job = get_object_or_404(ReportJob, id=id)
+
+    data = {
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'days_done': job.days_done,
+        'days_total': job.days_total,
+        'progress': job.getProgress(),
+        'error': job.error,
+    }
+    if job.status == ReportJob.STATUS_DONE:
+        data['url_html'] = reverse('report-job-download', kwargs={'id': job.id, 'file_type': 'html'})
+        data['url_xlsx'] = reverse('report-job-download', kwargs={'id': job.id, 'file_type': 'xlsx'})
+    return JsonResponse(data)
+
+@permission_required(['transit.view_trip', 'transit.view_shift'])
+def reportJobDownload(request, id, file_type):
+    job = get_object_or_404(ReportJob, id=id, status=ReportJob.STATUS_DONE)
+
+    if file_type not in ('html', 'xlsx'):
+        raise Http404
+
+    try:
+        job_file = open(job.getFilePath(file_type), 'rb')
+    except FileNotFoundError:
+        raise Http404
+
+    if file_type == 'html':
+        return FileResponse(job_file, content_type='text/html; charset=utf-8')
+    return FileResponse(job_file, filename='Transit_Report_' + job.date_start.strftime('%Y-%m-%d') + '_to_' + job.date_end.strftime('%Y-%m-%d') + '.xlsx', as_attachment=True)
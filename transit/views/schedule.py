@@ -21,7 +21,7 @@ from django.urls import reverse
 from django.db.models import Q
 from django.utils import timezone
 
-from transit.models import Trip, Shift, Driver, Vehicle, Template, TemplateTrip, ScheduleMessage, SiteSettings, TripType
+from transit.models import Trip, Shift, Driver, Vehicle, Template, TemplateTrip, ScheduleMessage, SiteSettings
 from transit.forms import DatePickerForm, EditScheduleMessageForm
 from transit.views.report import Report
 
@@ -604,68 +604,21 @@ def ajaxSchedulePrintDailyLog(request, year, month, day):
 
     day_date = datetime.date(year, month, day)
 
-    shifts = Shift.objects.filter(date=day_date, status=Shift.STATUS_NORMAL)
+    shifts = Shift.objects.filter(date=day_date, status=Shift.STATUS_NORMAL).select_related('driver', 'vehicle')
     shifts = shifts.exclude(start_miles='')
     shifts = shifts.exclude(end_miles='')
-    report = Report()
 
     shift_id = request.session.get('schedule_print_daily_log_id', None)
 
+    # the logs for all of the day's shifts are built together, so switching between shifts doesn't reload the day
+    daily_logs = Report.loadDailyLogs(day_date)
+
     if shift_id == None:
         current_shift = None
-        report.load(day_date, day_date)
-        if len(report.report_all) > 0:
-            report_summary = report.all_vehicles
+        daily_log = daily_logs[None]
     else:
         current_shift = get_object_or_404(Shift, id=uuid.UUID(shift_id))
-        report.load(day_date, day_date, daily_log_shift=uuid.UUID(shift_id))
-        if len(report.report_all) > 0:
-            report_summary = report.report_all[0].by_vehicle[Report.getVehicleIndex(current_shift.vehicle)]
-
-    try:
-        trips_medical = report_summary.trip_types[TripType.objects.get(name='Medical')]
-    except:
-        trips_medical = 0
-
-    try:
-        trips_nutrition = report_summary.trip_types[TripType.objects.get(name='Nutrition')]
-    except:
-        trips_nutrition = 0
-
-    try:
-        trips_social = report_summary.trip_types[TripType.objects.get(name='Social/Recreation')]
-    except:
-        trips_social = 0
-
-    try:
-        trips_shopping = report_summary.trip_types[TripType.objects.get(name='Shopping')]
-    except:
-        trips_shopping = 0
-
-    try:
-        trips_other = report_summary.trip_types[TripType.objects.get(name='Other')]
-    except:
-        trips_other = 0
-
-    try:
-        money_cash = report_summary.collected_cash
-    except:
-        money_cash = Report.Money(0)
-
-    try:
-        money_check = report_summary.collected_check
-    except:
-        money_check = Report.Money(0)
-
-    money_total = money_cash + money_check
-
-    try:
-        trips_employment = report_summary.other_employment
-    except:
-        trips_employment = 0
-
-    # don't include employment/education in Other total
-    trips_other = trips_other - trips_employment
+        daily_log = daily_logs.get(current_shift.id, Report.DailyLog())
 
     drivers = []
     for shift in shifts:
@@ -677,17 +630,17 @@ def ajaxSchedulePrintDailyLog(request, year, month, day):
         'date': day_date,
         'shifts': shifts,
         'current_shift': current_shift,
-        'report': report,
-        'trips_medical': trips_medical,
-        'trips_nutrition': trips_nutrition,
-        'trips_social': trips_social,
-        'trips_shopping': trips_shopping,
-        'trips_other': trips_other,
-        'trips_total': trips_medical + trips_nutrition + trips_social + trips_shopping + trips_other + trips_employment,
-        'money_cash': money_cash,
-        'money_check': money_check,
-        'money_total': money_total,
-        'trips_employment': trips_employment,
+        'report': daily_log,
+        'trips_medical': daily_log.trips_medical,
+        'trips_nutrition': daily_log.trips_nutrition,
+        'trips_social': daily_log.trips_social,
+        'trips_shopping': daily_log.trips_shopping,
+        'trips_other': daily_log.trips_other,
+        'trips_total': daily_log.trips_total,
+        'money_cash': daily_log.money_cash,
+        'money_check': daily_log.money_check,
+        'money_total': daily_log.money_total,
+        'trips_employment': daily_log.trips_employment,
         'drivers': drivers,
         'current_timestamp': datetime.datetime.now(),
     }
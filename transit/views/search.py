@@ -317,6 +317,9 @@ def searchGetTrips(request):
         elif result_type == '1':
             trips = trips.filter(format=Trip.FORMAT_ACTIVITY)
 
+    # the results show how late each trip was for its appointment
+    trips = trips.annotate(appointment_diff=Trip.APPOINTMENT_DIFF)
+
     try:
         column_layout_int = int(column_layout)
     except:
@@ -237,18 +237,8 @@ def shiftStart(request, id):
     shift = get_object_or_404(Shift, id=id)
     date = shift.date
 
-    previous_shift = None
-    previous_shifts = Shift.objects.filter(vehicle=shift.vehicle, status=Shift.STATUS_NORMAL).exclude(start_miles='').exclude(end_miles='')
-    for i in previous_shifts:
-        if previous_shift == None:
-            previous_shift = i
-            continue
-
-        try:
-            if float(i.end_miles) >= float(previous_shift.end_miles):
-                previous_shift = i
-        except:
-            continue
+    # the shift with the highest end reading; ties go to the earliest one
+    previous_shift = Shift.objects.filter(vehicle=shift.vehicle, status=Shift.STATUS_NORMAL, end_odometer__isnull=False).exclude(start_miles='').order_by('-end_odometer', 'date', '-sort_index').first()
 
     if previous_shift == None:
         previous_shift_end_miles = ''
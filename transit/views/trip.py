@@ -467,29 +467,24 @@ def getStartAndPrevMiles(date, start_miles, prev_miles, vehicles, all_trips):
     active_shift_driver = None
 
     # get the starting mileage for all vehicles
-    all_previous_shifts = Shift.objects.exclude(start_miles='').exclude(end_miles='')
+    all_previous_shifts = Shift.objects.filter(end_odometer__isnull=False).exclude(start_miles='').order_by('-end_odometer', 'date', '-sort_index')
+    start_odometers = {}
     for vehicle in vehicles.filter(is_logged=True):
         start_miles[str(vehicle)] = ''
-        previous_shift = None
-        previous_shifts = all_previous_shifts.filter(vehicle=vehicle)
-        for i in previous_shifts:
-            try:
-                if previous_shift == None or float(i.end_miles) >= float(previous_shift.end_miles):
-                    previous_shift = i
-            except:
-                continue
-
+        previous_shift = all_previous_shifts.filter(vehicle=vehicle).only('end_miles', 'end_odometer').first()
         if previous_shift != None:
             start_miles[str(vehicle)] = previous_shift.end_miles
+            start_odometers[str(vehicle)] = previous_shift.end_odometer
 
     day_shifts = Shift.objects.filter(date=date, status=Shift.STATUS_NORMAL)
     for shift in day_shifts:
         if shift.start_miles != '':
-            try:
-                if float(shift.start_miles) > float(start_miles[str(shift.vehicle)]):
-                    start_miles[str(shift.vehicle)] = shift.start_miles
-            except:
+            # skips vehicles that have no readings yet, or aren't logged
+            if str(shift.vehicle) not in start_odometers or shift.start_odometer == None:
                 continue
+            if shift.start_odometer > start_odometers[str(shift.vehicle)]:
+                start_miles[str(shift.vehicle)] = shift.start_miles
+                start_odometers[str(shift.vehicle)] = shift.start_odometer
 
             if shift.end_miles == '':
                 active_shift_driver = shift.driver
@@ -45,30 +45,15 @@ def tripDeltaTimeAverageRegen(request):
         trips = Trip.objects.filter(format=Trip.FORMAT_NORMAL, status=Trip.STATUS_NORMAL, passenger=True).exclude(start_miles='', start_time='', end_miles='', end_time='')
         trip_times = {}
 
-        for trip in trips:
-            try:
-                start_time = datetime.datetime.strptime(trip.start_time, '%I:%M %p')
-            except:
-                print('Could not parse start time for: ' + str(trip))
-                continue # time parsing failed, skip trip
-
-            try:
-                end_time = datetime.datetime.strptime(trip.end_time, '%I:%M %p')
-            except:
-                print('Could not parse end time for: ' + str(trip))
-                continue # time parsing failed, skip trip
-
-            if start_time > end_time:
-                print('Invalid time delta for: ' + str(trip))
-                continue # invalid time delta, skip trip
-
-            trip_delta_time = end_time - start_time
+        # the durations are calculated by the database; trips with missing or invalid times, or that end before they start, are skipped
+        trip_durations = trips.annotate(duration=Trip.DURATION).filter(duration__gte=0).values_list('address', 'destination', 'duration')
 
+        for address, destination, duration in trip_durations:
             address_concat = ''
-            if trip.address <= trip.destination:
-                address_concat = trip.address + trip.destination
+            if address <= destination:
+                address_concat = address + destination
             else:
-                address_concat = trip.destination + trip.address
+                address_concat = destination + address
 
             address_uuid = uuid.uuid5(uuid.NAMESPACE_URL, address_concat)
 
@@ -76,9 +61,9 @@ def tripDeltaTimeAverageRegen(request):
                 trip_times[address_uuid] = 0
 
             if trip_times[address_uuid] == 0:
-                trip_times[address_uuid] = trip_delta_time.total_seconds()
+                trip_times[address_uuid] = duration * 60
             else:
-                trip_times[address_uuid] = int((trip_times[address_uuid] + trip_delta_time.total_seconds()) / 2)
+                trip_times[address_uuid] = int((trip_times[address_uuid] + duration * 60) / 2)
 
         for key in trip_times:
             trip_delta_time_obj = TripDeltaTimeAverage()
@@ -122,29 +107,12 @@ def TripDeltaTimeAverageRegenSingle(src_trip):
 
     trip_times[address_uuid] = trip_delta_time_obj.avg_time
 
-    for trip in trips:
-        try:
-            start_time = datetime.datetime.strptime(trip.start_time, '%I:%M %p')
-        except:
-            print('Could not parse start time for: ' + str(trip))
-            continue # time parsing failed, skip trip
-
-        try:
-            end_time = datetime.datetime.strptime(trip.end_time, '%I:%M %p')
-        except:
-            print('Could not parse end time for: ' + str(trip))
-            continue # time parsing failed, skip trip
-
-        if start_time > end_time:
-            print('Invalid time delta for: ' + str(trip))
-            continue # invalid time delta, skip trip
-
-        trip_delta_time = end_time - start_time
-
+    # trips with missing or invalid times, or that end before they start, are skipped
+    for duration in trips.annotate(duration=Trip.DURATION).filter(duration__gte=0).values_list('duration', flat=True):
         if trip_times[address_uuid] == 0:
-            trip_times[address_uuid] = trip_delta_time.total_seconds()
+            trip_times[address_uuid] = duration * 60
         else:
-            trip_times[address_uuid] = int((trip_times[address_uuid] + trip_delta_time.total_seconds()) / 2)
+            trip_times[address_uuid] = int((trip_times[address_uuid] + duration * 60) / 2)
 
     trip_delta_time_obj.avg_time = trip_times[address_uuid]
     trip_delta_time_obj.save()